@@ -5,6 +5,9 @@ Configuration du filtrage des fichiers pour FluxVision
 Centralise les règles de filtrage des fichiers CSV
 """
 
+import os
+import re
+
 # Préfixes de fichiers autorisés pour la base de données FluxVision
 # Basé sur le fichier database_source_files.txt
 ALLOWED_FILE_PREFIXES = [
@@ -46,6 +49,36 @@ IGNORED_FILE_EXAMPLES = [
     'Dispo_*'
 ]
 
+# Types de fichiers historiques chargés par tools/etl/populate_facts_*.py
+# (source unique des regex: les chargeurs délèguent à get_hist_file_type / get_lieu_file_type)
+FACT_FILE_PATTERNS = [
+    (r"^SejourDuree_(20\d{2}B\d+).*$", "SejourDuree", re.IGNORECASE),
+    (r"^SejourDuree_Departement_(20\d{2}B\d+).*$", "SejourDuree_Departement", re.IGNORECASE),
+    (r"^SejourDuree_Pays_(20\d{2}B\d+).*$", "SejourDuree_Pays", re.IGNORECASE),
+    (r"^Nuitee_20\d{2}B\d+_[^_]+$", "Nuitee", 0),
+    (r"^Diurne_20\d{2}B\d+_[^_]+$", "Diurne", 0),
+    (r"^Nuitee_Pays_20\d{2}B\d+", "Nuitee_Pays", 0),
+    (r"^Diurne_Pays_20\d{2}B\d+", "Diurne_Pays", 0),
+    (r"^Nuitee_Departement_20\d{2}B\d+", "Nuitee_Departement", re.IGNORECASE),
+    (r"^Diurne_Departement_20\d{2}B\d+", "Diurne_Departement", re.IGNORECASE),
+]
+
+# Préfixes des fichiers Lieu* chargés en base
+ALLOWED_LIEU_PREFIXES = {
+    "LieuActivite_Soir", "LieuActivite_Soir_Departement", "LieuActivite_Soir_Pays",
+    "LieuActivite_Veille", "LieuActivite_Veille_Departement", "LieuActivite_Veille_Pays",
+    "LieuNuitee_Soir", "LieuNuitee_Soir_Departement", "LieuNuitee_Soir_Pays",
+    "LieuNuitee_Veille", "LieuNuitee_Veille_Departement", "LieuNuitee_Veille_Pays",
+}
+
+# Membres d'archives jamais utilisés par les chargeurs (non écrits à l'extraction sélective)
+SKIPPED_MEMBER_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg',  # Images
+    '.pdf',                                           # Documentation
+    '.geojson', '.kml', '.kmz', '.shp', '.shx', '.dbf', '.prj',  # Géospatial
+)
+SKIPPED_MEMBER_KEYWORDS = ('carte', 'semaine')
+
 def is_allowed_file(filename):
     """
     Vérifie si un fichier CSV correspond aux types autorisés pour la base de données
@@ -65,6 +98,83 @@ def is_allowed_file(filename):
     
     return False
 
+def get_fact_file_type(filename):
+    """
+    Détermine le type de fichier de faits tel que le font les chargeurs
+    
+    Args:
+        filename (str): Nom du fichier CSV
+        
+    Returns:
+        str: Type de fichier (ex: 'Nuitee_Pays', 'LieuNuitee_Soir') ou None si non chargé
+    """
+    return get_hist_file_type(filename) or get_lieu_file_type(filename)
+
+def get_hist_file_type(filename):
+    """
+    Type d'un fichier historique (Nuitee, Diurne_Pays, SejourDuree_Departement...)
+    
+    Args:
+        filename (str): Nom du fichier CSV
+        
+    Returns:
+        str: Type de fichier ou None (fichiers semaine, régions, non chargés)
+    """
+    if re.search(r"semaine", filename, re.IGNORECASE):
+        return None
+    base = filename[:-4] if filename.lower().endswith('.csv') else filename
+    
+    for pattern, file_type, flags in FACT_FILE_PATTERNS:
+        if re.match(pattern, base, flags):
+            return file_type
+    return None
+
+def get_lieu_file_type(filename, allowed_prefixes=ALLOWED_LIEU_PREFIXES):
+    """
+    Type (préfixe) d'un fichier Lieu*, restreint à allowed_prefixes
+    
+    Args:
+        filename (str): Nom du fichier CSV
+        allowed_prefixes (set): Préfixes acceptés (par défaut tous les Lieu* chargés)
+        
+    Returns:
+        str: Préfixe (ex: 'LieuNuitee_Soir') ou None
+    """
+    if re.search(r"semaine", filename, re.IGNORECASE):
+        return None
+    base = filename[:-4] if filename.lower().endswith('.csv') else filename
+    parts = re.split(r"_(?=20\d{2}B)", base)
+    if len(parts) >= 2 and parts[0] in allowed_prefixes:
+        return parts[0]
+    return None
+
+def should_extract_member(member_name):
+    """
+    Filtre de membres pour l'extraction sélective des archives ZIP
+    
+    Args:
+        member_name (str): Chemin du membre dans l'archive
+        
+    Returns:
+        bool: True si le membre doit être écrit sur disque
+    """
+    filename = os.path.basename(member_name.rstrip('/'))
+    filename_lower = filename.lower()
+    
+    # Les archives imbriquées sont toujours parcourues
+    if filename_lower.endswith('.zip'):
+        return True
+    if filename_lower.endswith(SKIPPED_MEMBER_EXTENSIONS):
+        return False
+    if any(keyword in filename_lower for keyword in SKIPPED_MEMBER_KEYWORDS):
+        return False
+    
+    # CSV: uniquement les types chargés en base
+    if filename_lower.endswith('.csv'):
+        return is_allowed_file(filename) or get_fact_file_type(filename) is not None
+    
+    return True
+
 def get_table_name(filename):
     """
     Détermine le nom de la table de destination selon le préfixe du fichier
@@ -120,4 +230,9 @@ if __name__ == "__main__":
     for test_file in test_files:
         status = "✅ AUTORISÉ" if is_allowed_file(test_file) else "❌ IGNORÉ"
         table = get_table_name(test_file) or "AUCUNE"
-        print(f"{test_file}: {status} → {table}") 
\ No newline at end of file
+        print(f"{test_file}: {status} → {table}")
+    
+    print("\n=== EXTRACTION SÉLECTIVE ===")
+    for member in test_files + ["LieuNuitee_Soir_2023B1_CABA0.csv", "Nuitee_semaine_2023B1.csv", "docs/Carte_CABA0.png"]:
+        status = "✅ EXTRAIT" if should_extract_member(member) else "❌ IGNORÉ"
+        print(f"{member}: {status} → {get_fact_file_type(os.path.basename(member)) or 'AUCUN'}")
\ No newline at end of file
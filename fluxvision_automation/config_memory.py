@@ -15,6 +15,10 @@ MIN_WORKERS = 2            # Minimum de workers parallèles
 MAX_WORKERS = 8            # Maximum de workers parallèles
 REDUCE_WORKERS_MEMORY_GB = 3.0  # Réduire les workers si mémoire > ce seuil
 
+# Ordonnancement des fusions (process_data)
+MERGE_MEMORY_BUDGET_GB = 3.0    # Budget RSS (processus + workers de lecture) des fusions concurrentes
+MERGE_MAX_CONCURRENT_TASKS = 4  # Nombre maximum de fusions simultanées
+
 # Optimisations Polars
 POLARS_STREAMING = True    # Utiliser le mode streaming de Polars
 POLARS_COMPRESSION = 'zstd'  # Compression Parquet (zstd, lz4, snappy)
@@ -31,6 +35,8 @@ def get_memory_config():
         'batch_size': BATCH_SIZE,
         'min_workers': MIN_WORKERS,
         'max_workers': MAX_WORKERS,
+        'merge_memory_budget_gb': MERGE_MEMORY_BUDGET_GB,
+        'merge_max_concurrent_tasks': MERGE_MAX_CONCURRENT_TASKS,
         'streaming': POLARS_STREAMING,
         'compression': POLARS_COMPRESSION
     }
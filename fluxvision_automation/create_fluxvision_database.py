@@ -24,6 +24,7 @@ from datetime import datetime
 import time
 import os
 import gc
+from staging_cache import load_staged, scan_staged
 # import psutil  # Commented out for now
 
 # Configuration du logging
@@ -407,7 +408,7 @@ class FluxVisionDatabaseCreator:
         try:
             if streaming and self.low_memory:
                 # Mode streaming pour économiser la mémoire
-                df = pl.scan_csv(
+                df = scan_staged(
                     file_path,
                     separator=',',
                     try_parse_dates=True,
@@ -433,7 +434,8 @@ class FluxVisionDatabaseCreator:
                 if self.test_mode:
                     read_params['n_rows'] = self.test_rows
                 
-                df = pl.read_csv(file_path, **read_params)
+                # Staging Parquet partagé: le CSV n'est reparsé que si son contenu a changé
+                df = load_staged(file_path, **read_params)
                 
                 # Log avec indication du mode
                 mode_info = f"(TEST: {self.test_rows} lignes)" if self.test_mode else "(COMPLET)"
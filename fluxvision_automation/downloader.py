@@ -1,5 +1,4 @@
 import os
-import zipfile
 import shutil
 import logging
 import polars as pl
@@ -9,10 +8,16 @@ import hashlib
 import json
 import sys
 import subprocess
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from file_state import file_hash, record_file_digest
+from zip_extraction import extract_recursive, extraction_report
+from zip_reader import ZipMember, csv_source
+from config_filtering import should_extract_member
+
 # Auto-installation des dépendances
 def install_if_needed(package):
     try:
@@ -61,9 +66,16 @@ DATA_EXTRACTED = 'data/data_extracted'
 DATA_CLEAN     = 'data/data_clean'
 STATE_FILE     = 'data/.file_state.json'
 LOCK_FILE      = 'data/.process.lock'
+MANIFEST_FILE  = 'data/.delivery_manifest.json'
 TMP_EXTRACTED  = DATA_EXTRACTED + '_tmp'
 TMP_CLEAN      = DATA_CLEAN + '_tmp'
 
+# Téléchargement
+DOWNLOAD_CHUNK_SIZE = 256 * 1024  # Taille des blocs lus sur le flux HTTP (octets)
+DOWNLOAD_WORKERS    = 1           # Téléchargements simultanés (1 = séquentiel)
+PART_SUFFIX         = '.part'     # Suffixe des fichiers partiels (reprise HTTP Range)
+PART_META_SUFFIX    = '.part.json'  # Validateur HTTP, taille totale et date de livraison du .part
+
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 # ----------------- Configuration et téléchargement -----------------
@@ -83,6 +95,16 @@ class FluxVisionDownloader:
         self.exclude_geospatial = True
         self.filter_year = None
         
+        # Téléchargement concurrent et reprise
+        self.max_workers = DOWNLOAD_WORKERS
+        self.chunk_size = DOWNLOAD_CHUNK_SIZE
+        
+        # Manifeste des livraisons: ne retélécharger que le nouveau/modifié
+        self.skip_unchanged = True
+        self.verify_downloads = False
+        self.manifest = self.load_manifest()
+        self._manifest_lock = threading.Lock()
+        
         # Créer le dossier de téléchargement
         self.downloads_dir.mkdir(exist_ok=True)
         
@@ -130,6 +152,64 @@ class FluxVisionDownloader:
         logging.info("✅ Config OK")
         return True
     
+    def load_manifest(self):
+        """Charger le manifeste local des livraisons téléchargées"""
+        if os.path.exists(MANIFEST_FILE):
+            try:
+                with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️  Manifeste illisible, il sera reconstruit: {e}")
+        return {}
+    
+    def save_manifest(self):
+        """Sauvegarder le manifeste (écriture atomique)"""
+        os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+        tmp_file = MANIFEST_FILE + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_file, MANIFEST_FILE)
+    
+    def record_delivery(self, delivery, file_path, sha256):
+        """Enregistrer une livraison terminée dans le manifeste et dans .file_state.json"""
+        file_path = Path(file_path)
+        # L'empreinte calculée au vol est réutilisée par extract_recursive
+        record_file_digest(STATE_FILE, str(file_path), sha256)
+        entry = {
+            'delivery_code_ref': delivery.get('delivery_code_ref'),
+            'file_last_modified_date': delivery.get('file_last_modified_date'),
+            'size': file_path.stat().st_size,
+            'sha256': sha256,
+            'downloaded_at': datetime.now(timezone.utc).isoformat(),
+        }
+        with self._manifest_lock:
+            self.manifest[file_path.name] = entry
+            self.save_manifest()
+    
+    def is_delivery_current(self, delivery):
+        """Vérifier si la livraison est déjà présente localement et inchangée"""
+        file_name = delivery.get('file_name', 'data.zip')
+        entry = self.manifest.get(file_name)
+        if not entry:
+            return False
+        
+        # Livraison modifiée côté portail
+        if (entry.get('delivery_code_ref') != delivery.get('delivery_code_ref') or
+                entry.get('file_last_modified_date') != delivery.get('file_last_modified_date')):
+            return False
+        
+        # Fichier local absent ou tronqué
+        file_path = self.downloads_dir / file_name
+        if not file_path.exists() or file_path.stat().st_size != entry.get('size'):
+            return False
+        
+        # Vérification complète (optionnelle): relecture et comparaison SHA-256
+        if self.verify_downloads and file_hash(file_path) != entry.get('sha256'):
+            logging.warning(f"⚠️  Empreinte SHA-256 différente pour {file_name}, nouveau téléchargement")
+            return False
+        
+        return True
+    
     def should_download_file(self, delivery):
         """Détermine si un fichier doit être téléchargé selon les filtres"""
         if not self.filters_enabled:
@@ -245,8 +325,31 @@ class FluxVisionDownloader:
             logging.error(f"❌ Erreur API: {e}")
             return []
     
-    def download(self, delivery):
-        """Télécharger un fichier"""
+    @staticmethod
+    def _load_part_meta(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _discard_part(part_path, meta_path):
+        for path in (part_path, meta_path):
+            if path.exists():
+                path.unlink()
+
+    @staticmethod
+    def _save_part_meta(meta_path, delivery, response, total_size):
+        # If-Range n'accepte qu'un ETag fort ou une date HTTP
+        etag = response.headers.get('ETag')
+        validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'validator': validator, 'total_size': total_size,
+                       'file_last_modified_date': delivery.get('file_last_modified_date')}, f)
+
+    def download(self, delivery, show_progress=True):
+        """Télécharger un fichier (reprise depuis le .part via HTTP Range + If-Range)"""
         if not HAS_DOWNLOAD:
             return None
             
@@ -257,32 +360,96 @@ class FluxVisionDownloader:
             logging.error(f"❌ Pas d'URL pour {file_name}")
             return None
         
-        logging.info(f"📥 Téléchargement {file_name}...")
+        file_path = self.downloads_dir / file_name
+        # Partiel propre à la livraison: deux livraisons de même nom ne partagent jamais un .part
+        ref = re.sub(r'[^\w.-]', '_', str(delivery.get('delivery_code_ref') or 'sans_ref'))
+        part_path = file_path.with_name(f"{file_path.name}.{ref}{PART_SUFFIX}")
+        meta_path = file_path.with_name(f"{file_path.name}.{ref}{PART_META_SUFFIX}")
+        
+        # Reprise: seulement si le .part provient de la même version de la livraison
+        meta = self._load_part_meta(meta_path) if part_path.exists() else None
+        if part_path.exists() and (meta is None or meta.get('file_last_modified_date') != delivery.get('file_last_modified_date')):
+            logging.info(f"🗑️  Fichier partiel obsolète ignoré: {part_path.name}")
+            self._discard_part(part_path, meta_path)
+            meta = None
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if meta.get('validator'):
+                # Ressource modifiée côté serveur: réponse 200 complète au lieu de la plage
+                headers['If-Range'] = meta['validator']
+        
+        if offset:
+            logging.info(f"📥 Reprise {file_name} à partir de {offset:,} bytes...")
+        else:
+            logging.info(f"📥 Téléchargement {file_name}...")
         
         try:
-            response = self.session.get(url, stream=True, timeout=60)
+            response = self.session.get(url, stream=True, timeout=60, headers=headers)
+            
+            if offset and response.status_code == 416:
+                # Range non satisfaisable: complet seulement si la taille correspond au total annoncé
+                content_range = response.headers.get('Content-Range', '')
+                response.close()
+                total = int(content_range.rsplit('/', 1)[1]) if re.match(r'^bytes \*/\d+$', content_range) else meta.get('total_size')
+                if not total or offset != total:
+                    logging.warning(f"⚠️  Fichier partiel incohérent pour {file_name} ({offset:,} / {total or '?'} bytes), nouveau téléchargement")
+                    self._discard_part(part_path, meta_path)
+                    return self.download(delivery, show_progress)
+                sha256 = file_hash(part_path)
+                os.replace(part_path, file_path)
+                self._discard_part(part_path, meta_path)
+                self.record_delivery(delivery, file_path, sha256)
+                logging.info(f"✅ Téléchargé (déjà complet): {file_path}")
+                return str(file_path)
+            
             response.raise_for_status()
             
-            file_path = self.downloads_dir / file_name
+            if offset and response.status_code != 206:
+                logging.warning(f"⚠️  Reprise refusée pour {file_name} (livraison modifiée ou Range non supporté), téléchargement complet")
+                offset = 0
+            
+            # Empreinte SHA-256 calculée pendant l'écriture (pas de relecture)
+            hasher = hashlib.sha256()
+            if offset:
+                with open(part_path, 'rb') as pf:
+                    for block in iter(lambda: pf.read(self.chunk_size), b''):
+                        hasher.update(block)
             
             # Téléchargement avec progress
             total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
+            if total_size > 0:
+                total_size += offset
+            downloaded = offset
+            if not offset:
+                self._save_part_meta(meta_path, delivery, response, total_size or None)
             
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
                     if chunk:
                         f.write(chunk)
+                        hasher.update(chunk)
                         downloaded += len(chunk)
-                        if total_size > 0:
+                        if show_progress and total_size > 0:
                             percent = (downloaded / total_size) * 100
                             print(f"\r📥 {percent:.1f}% ({downloaded:,} / {total_size:,} bytes)", end="")
             
-            print(f"\n✅ Téléchargé: {file_path}")
+            if total_size > 0 and downloaded < total_size:
+                # Le .part est conservé pour la prochaine reprise
+                raise IOError(f"transfert incomplet ({downloaded:,} / {total_size:,} bytes)")
+            
+            os.replace(part_path, file_path)
+            self._discard_part(part_path, meta_path)
+            self.record_delivery(delivery, file_path, hasher.hexdigest())
+            if show_progress:
+                print(f"\n✅ Téléchargé: {file_path}")
+            else:
+                logging.info(f"✅ Téléchargé: {file_path} ({downloaded:,} bytes)")
             return str(file_path)
             
         except Exception as e:
-            logging.error(f"❌ Erreur téléchargement: {e}")
+            logging.error(f"❌ Erreur téléchargement {file_name}: {e}")
             return None
     
     def choose_deliveries(self, deliveries):
@@ -335,25 +502,60 @@ class FluxVisionDownloader:
             logging.error("❌ Choix invalide")
             return []
     
+    def _download_series(self, deliveries):
+        """Télécharger l'une après l'autre des livraisons visant le même fichier local"""
+        return [(d, self.download(d, False)) for d in deliveries]
+
     def download_selected(self, deliveries_to_download):
         """Télécharger les livraisons sélectionnées"""
         if not deliveries_to_download:
             return []
         
+        # Ne garder que les livraisons nouvelles ou modifiées
+        if self.skip_unchanged:
+            up_to_date = [d for d in deliveries_to_download if self.is_delivery_current(d)]
+            if up_to_date:
+                logging.info(f"⏭️  {len(up_to_date)} livraison(s) inchangée(s) déjà présente(s), ignorée(s)")
+                deliveries_to_download = [d for d in deliveries_to_download if d not in up_to_date]
+            if not deliveries_to_download:
+                logging.info("✅ Toutes les livraisons sont à jour")
+                return []
+        
         logging.info(f"🚀 Début du téléchargement de {len(deliveries_to_download)} livraison(s)...")
         
         downloaded_files = []
         failed_downloads = []
         
-        for i, delivery in enumerate(deliveries_to_download, 1):
-            logging.info(f"\n--- Livraison {i}/{len(deliveries_to_download)} ---")
-            logging.info(f"📦 {delivery.get('delivery_code_ref')} - {delivery.get('file_name')}")
+        if self.max_workers > 1 and len(deliveries_to_download) > 1:
+            # Pool borné: plusieurs livraisons en parallèle sur la session partagée
+            workers = min(self.max_workers, len(deliveries_to_download))
+            adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+            logging.info(f"⚡ Téléchargement parallèle: {workers} worker(s), blocs de {self.chunk_size // 1024} KiB")
             
-            file_path = self.download(delivery)
-            if file_path:
-                downloaded_files.append(file_path)
-            else:
-                failed_downloads.append(delivery.get('file_name', 'Fichier inconnu'))
+            # Même nom de fichier = même destination: ces livraisons passent en série dans un seul worker
+            by_name = {}
+            for d in deliveries_to_download:
+                by_name.setdefault(d.get('file_name', 'data.zip'), []).append(d)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._download_series, group) for group in by_name.values()]
+                for future in as_completed(futures):
+                    for delivery, file_path in future.result():
+                        if file_path:
+                            downloaded_files.append(file_path)
+                        else:
+                            failed_downloads.append(delivery.get('file_name', 'Fichier inconnu'))
+        else:
+            for i, delivery in enumerate(deliveries_to_download, 1):
+                logging.info(f"\n--- Livraison {i}/{len(deliveries_to_download)} ---")
+                logging.info(f"📦 {delivery.get('delivery_code_ref')} - {delivery.get('file_name')}")
+                
+                file_path = self.download(delivery)
+                if file_path:
+                    downloaded_files.append(file_path)
+                else:
+                    failed_downloads.append(delivery.get('file_name', 'Fichier inconnu'))
         
         # Résumé
         logging.info(f"\n{'='*50}")
@@ -420,6 +622,10 @@ class FluxVisionDownloader:
         else:
             logging.info("📁 Dossier downloads non trouvé")
         
+        # Manifeste des livraisons
+        if self.manifest:
+            logging.info(f"📒 Livraisons dans le manifeste: {len(self.manifest)} ({MANIFEST_FILE})")
+        
         # Vérifier la config
         config_file = self.base_dir / "config.yml"
         if config_file.exists():
@@ -494,16 +700,13 @@ def save_state(state):
         json.dump(state, f, indent=2)
 
 # ----------------- Utils -----------------
-def file_hash(path):
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
-
 def detect_delimiter(path):
-    with open(path, 'r', newline='', encoding='utf-8', errors='ignore') as f:
-        sample = f.read(2048)
+    if isinstance(path, ZipMember):
+        # CSV lu directement dans l'archive
+        sample = path.read_sample(2048).decode('utf-8', errors='ignore')
+    else:
+        with open(path, 'r', newline='', encoding='utf-8', errors='ignore') as f:
+            sample = f.read(2048)
     try:
         return csv.Sniffer().sniff(sample).delimiter
     except Exception:
@@ -511,16 +714,17 @@ def detect_delimiter(path):
 
 def read_polars_csv_safely(path, expected_cols=None):
     delim = detect_delimiter(path)
+    source = csv_source(path)
     try:
         # Polars est généralement bon pour inférer les types.
         # infer_schema_length=0 pour lire tout le fichier pour l'inférence si nécessaire (plus lent)
         # ou un nombre plus élevé de lignes.
         # ignore_errors=True peut skipper les lignes malformées silencieusement
-        df = pl.read_csv(path, separator=delim, infer_schema_length=1000, try_parse_dates=True)
+        df = pl.read_csv(source, separator=delim, infer_schema_length=1000, try_parse_dates=True)
     except Exception as e:
         logging.warning(f"Polars direct read_csv failed for {path} with delimiter '{delim}': {e}. Retrying with ignore_errors=True.")
         try:
-            df = pl.read_csv(path, separator=delim, infer_schema_length=1000, ignore_errors=True, try_parse_dates=True)
+            df = pl.read_csv(source, separator=delim, infer_schema_length=1000, ignore_errors=True, try_parse_dates=True)
         except Exception as read_err:
             logging.error(f"Critical error reading {path} with Polars: {read_err}")
             raise
@@ -608,69 +812,6 @@ def merge_to_csv(csv_paths, out_csv_path, incremental=False):
         logging.error(f"Erreur lors de l'écriture CSV vers {out_csv_path}: {e}")
 
 
-# ----------------- Extraction incrémentale (inchangé) -----------------
-def extract_recursive(src_dir, dst_dir, old_hashes):
-    if os.path.exists(dst_dir):
-        shutil.rmtree(dst_dir)
-    os.makedirs(dst_dir, exist_ok=True)
-
-    new_hashes = {}
-    to_process = []
-    changed_roots = []
-
-    for fname in os.listdir(src_dir):
-        if not fname.lower().endswith('.zip'):
-            continue
-        path = os.path.join(src_dir, fname)
-        h = file_hash(path)
-        new_hashes[fname] = h
-        if old_hashes.get(fname) == h:
-            logging.info(f"Unchanged archive: {fname}")
-            continue
-        stem = os.path.splitext(fname)[0]
-        changed_roots.append(stem)
-        to_process.append((path, os.path.join(dst_dir, stem)))
-
-    if not to_process:
-        logging.warning(f"No new/modified ZIP in {src_dir}")
-
-    abs_dst = os.path.abspath(dst_dir)
-    while to_process:
-        zip_path, extract_folder = to_process.pop()
-        os.makedirs(extract_folder, exist_ok=True)
-        base = os.path.basename(zip_path)
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                logging.info(f"Extracting {base} → {extract_folder}")
-                for member in zf.infolist():
-                    target = os.path.join(extract_folder, member.filename)
-                    if member.is_dir():
-                        os.makedirs(target, exist_ok=True)
-                    elif member.filename.lower().endswith('.zip'):
-                        data = zf.read(member)
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with open(target, 'wb') as nf:
-                            nf.write(data)
-                        to_process.append((target, target[:-4]))
-                    else:
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with zf.open(member) as src, open(target, 'wb') as dst:
-                            shutil.copyfileobj(src, dst)
-        except zipfile.BadZipFile:
-            logging.error(f"Skipping bad zip: {base}")
-        except Exception as e:
-            logging.error(f"Error extracting {base}: {e}")
-        finally:
-            try:
-                # Only remove if the zip_path is INSIDE the extraction destination (nested zips)
-                if os.path.commonpath([os.path.abspath(zip_path), abs_dst]) == abs_dst:
-                    os.remove(zip_path)
-            except Exception: # os.path.commonpath can fail on Windows with different drives
-                pass
-
-
-    return new_hashes, changed_roots
-
 def extract_year(name):
     m = re.search(r"\d{4}", name)
     return m.group(0) if m else 'unknown'
@@ -783,6 +924,8 @@ if __name__ == '__main__':
     download_only = False
     interactive_download = False
     status_only = False
+    selective_extract = False
+    extract_dry_run = False
     
     # Initialiser le downloader pour la configuration des filtres
     downloader = FluxVisionDownloader() if HAS_DOWNLOAD else None
@@ -841,6 +984,36 @@ if __name__ == '__main__':
             else:
                 print(f"❌ Année invalide: {year}. Format attendu: --year=2024")
                 sys.exit(1)
+        elif arg in ['--selective']:
+            selective_extract = True
+            print("✂️  Extraction sélective: seuls les fichiers utiles aux chargeurs sont extraits")
+        elif arg in ['--dry-run-extract']:
+            extract_dry_run = True
+            print("🔎 Mode: Rapport d'extraction sélective (aucune écriture)")
+        elif arg in ['--force-download']:
+            if downloader:
+                downloader.skip_unchanged = False
+                print("🔁 Manifeste ignoré: toutes les livraisons seront retéléchargées")
+        elif arg in ['--verify']:
+            if downloader:
+                downloader.verify_downloads = True
+                print("🔐 Vérification SHA-256 des fichiers déjà téléchargés")
+        elif arg.startswith('--workers='):
+            workers = arg.split('=')[1]
+            if not workers.isdigit() or int(workers) < 1:
+                print(f"❌ Nombre de workers invalide: {workers}. Format attendu: --workers=4")
+                sys.exit(1)
+            if downloader:
+                downloader.max_workers = int(workers)
+                print(f"⚡ Téléchargements simultanés: {workers}")
+        elif arg.startswith('--chunk-size='):
+            chunk_kb = arg.split('=')[1]
+            if not chunk_kb.isdigit() or int(chunk_kb) < 1:
+                print(f"❌ Taille de bloc invalide: {chunk_kb}. Format attendu: --chunk-size=256 (KiB)")
+                sys.exit(1)
+            if downloader:
+                downloader.chunk_size = int(chunk_kb) * 1024
+                print(f"📦 Taille des blocs de téléchargement: {chunk_kb} KiB")
         elif arg in ['--help', '-h']:
             print("""
 🚀 FluxVision Downloader & Processor - Aide
@@ -865,6 +1038,23 @@ CONTRÔLE DES FILTRES:
   --with-geospatial      Inclure les fichiers géospatiaux (KML/GeoJSON)
   --year=YYYY            Filtrer par année spécifique (ex: --year=2024)
 
+PERFORMANCE DU TÉLÉCHARGEMENT:
+  --workers=N            Télécharger N livraisons en parallèle (défaut: 1)
+  --chunk-size=KB        Taille des blocs lus sur le réseau en KiB (défaut: 256)
+                         Les transferts interrompus reprennent depuis le fichier .part
+  --force-download       Ignorer le manifeste et tout retélécharger
+  --verify               Revérifier le SHA-256 des fichiers déjà présents
+
+MANIFESTE DES LIVRAISONS (data/.delivery_manifest.json):
+  Seules les livraisons nouvelles ou modifiées (delivery_code_ref ou
+  file_last_modified_date différents, fichier absent ou de taille différente)
+  sont téléchargées.
+
+EXTRACTION:
+  --selective            N'extraire que les fichiers utiles aux chargeurs
+                         (règles de config_filtering: pas d'images, PDF, cartes, *semaine*)
+  --dry-run-extract      Afficher les volumes conservés/ignorés sans rien extraire
+
 FILTRES PAR DÉFAUT (RECOMMANDÉS):
   ❌ Images exclues       (PNG, JPG, GIF, etc.)
   ❌ Dept_15 exclus       (fichiers commençant par "Dept_15")
@@ -882,6 +1072,7 @@ EXEMPLES:
   python downloader.py --no-filters       # Télécharger TOUT (attention!)
   python downloader.py --with-images      # Inclure les images
   python downloader.py --year=2024        # Seulement les fichiers 2024
+  python downloader.py --download --workers=4  # 4 téléchargements simultanés
 
 MODE PAR DÉFAUT:
   Traite les fichiers ZIP déjà présents dans le dossier 'downloads'
@@ -923,6 +1114,11 @@ PENDANT LE TÉLÉCHARGEMENT INTERACTIF:
             print("❌ Fonctionnalité téléchargement non disponible")
         sys.exit(0)
     
+    # Rapport d'extraction sélective uniquement
+    if extract_dry_run:
+        extraction_report('downloads', should_extract_member)
+        sys.exit(0)
+    
     lock = acquire_lock()
     try:
         # Phase 1: Téléchargement si demandé
@@ -949,14 +1145,13 @@ PENDANT LE TÉLÉCHARGEMENT INTERACTIF:
         state = load_state()
         old_hashes = state.get('hashes', {})
         history    = state.get('history', {})
+        file_meta  = state.setdefault('files', {})
+        extracted  = state.setdefault('extracted', {})
 
-        # L'extraction produit toujours des CSV et autres fichiers bruts
-        new_hashes, changed_roots = extract_recursive('downloads', TMP_EXTRACTED, old_hashes)
-        
-        # Remplacer l'ancien répertoire extrait par le nouveau temporaire
-        if os.path.exists(DATA_EXTRACTED):
-            shutil.rmtree(DATA_EXTRACTED)
-        os.rename(TMP_EXTRACTED, DATA_EXTRACTED)
+        # Extraction incrémentale: seuls les sous-dossiers des archives modifiées sont remplacés
+        new_hashes, changed_roots = extract_recursive('downloads', DATA_EXTRACTED, old_hashes, file_meta,
+                                                      member_filter=should_extract_member if selective_extract else None,
+                                                      extracted=extracted)
         logging.info('Extraction completed')
 
         removed_archives = set(old_hashes) - set(new_hashes)
@@ -973,11 +1168,6 @@ PENDANT LE TÉLÉCHARGEMENT INTERACTIF:
         os.rename(TMP_CLEAN, DATA_CLEAN)
         logging.info('Processing completed. Clean data in CSV format is in %s', DATA_CLEAN)
 
-        # Supprimer le répertoire des données extraites pour économiser l'espace
-        if os.path.exists(DATA_EXTRACTED):
-            shutil.rmtree(DATA_EXTRACTED)
-            logging.info('Cleaned up extracted data directory: %s', DATA_EXTRACTED)
-
         # Mise à jour de l'état
         state['hashes'] = new_hashes
         current_time_utc = datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,58 @@
+# Empreintes SHA-256 des archives ZIP (section 'files' de .file_state.json)
+# L'empreinte est calculée pendant le téléchargement puis réutilisée à l'extraction
+# tant que la taille et la date de modification du fichier sont inchangées.
+
+import os
+import json
+import hashlib
+import threading
+
+HASH_BLOCK_SIZE = 1024 * 1024  # Taille des blocs lus pour le calcul SHA-256
+
+_state_lock = threading.Lock()
+
+def file_hash(path):
+    """Calcule le hash SHA256 d'un fichier"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_signature(path, sha256):
+    """Entrée 'files' d'un fichier: empreinte + taille + mtime (ns)"""
+    st = os.stat(path)
+    return {'sha256': sha256, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def trusted_file_hash(path, file_meta, key=None):
+    """
+    Retourne le SHA-256 d'un fichier en réutilisant l'empreinte stockée
+    si la taille et le mtime correspondent; sinon recalcule et met à jour file_meta.
+    """
+    key = key or os.path.basename(path)
+    st = os.stat(path)
+    entry = file_meta.get(key)
+    if entry and entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns:
+        return entry['sha256']
+
+    h = file_hash(path)
+    file_meta[key] = {'sha256': h, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    return h
+
+def record_file_digest(state_file, path, sha256, key=None):
+    """Enregistre l'empreinte d'un fichier dans state['files'] (thread-safe, écriture atomique)"""
+    key = key or os.path.basename(path)
+    entry = file_signature(path, sha256)
+    with _state_lock:
+        state = {'hashes': {}, 'history': {}}
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        state.setdefault('files', {})[key] = entry
+
+        os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+        tmp_file = state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, state_file)
+    return entry
@@ -3,15 +3,26 @@
 """
 Script de filtrage des données CSV par date
 Supprime les lignes avec des dates <= cutoff_date
-Utilise Polars pour la performance
+Utilise Polars pour la performance :
+- pré-lecture de la seule colonne Date (fichiers déjà conformes ignorés)
+- filtrage en streaming (scan_csv -> filter -> sink_csv) vers un fichier temporaire
+- fichiers traités en parallèle dans un pool de processus
 """
 
 import polars as pl
 import logging
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, date
 import sys
 
+DEFAULT_CUTOFF_DATE = "2025-02-28"
+DATE_FORMAT = "%Y-%m-%d"
+DEFAULT_WORKERS = min(os.cpu_count() or 1, 4)
+
 def setup_logging(log_file: Path):
     """Configuration du logging."""
     log_file.parent.mkdir(parents=True, exist_ok=True)
@@ -43,58 +54,84 @@ def filter_csv_by_date(
 ) -> tuple[int, int, bool]:
     """
     Filtre un fichier CSV en supprimant les lignes avec des dates <= cutoff.
+    Seule la colonne Date est lue d'abord : si toutes les dates sont postérieures
+    au cutoff, le fichier est laissé intact. Sinon le filtre est appliqué en
+    streaming vers un fichier temporaire qui remplace l'original (écriture atomique).
     Retourne (nb_supprimees, nb_conservees, success_flag).
     """
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
     try:
         logger.info(f"Traitement de {file_path.name}...")
-        # Lire le CSV
-        df = pl.read_csv(file_path)
-        
-        # Nettoyer un éventuel BOM sur la colonne Date
+        # En-tête seul (Polars retire déjà le BOM UTF-8; nettoyage conservé par sécurité)
+        header = pl.read_csv(file_path, n_rows=0).columns
         cols_clean = {
-            col: col.lstrip("\ufeff") for col in df.columns
+            col: col.lstrip("\ufeff") for col in header
             if col.startswith("\ufeff")
         }
-        if cols_clean:
-            df = df.rename(cols_clean)
 
-        if "Date" not in df.columns:
+        if "Date" not in header and "Date" not in cols_clean.values():
             logger.warning(f"⚠ Colonne 'Date' non trouvée dans {file_path.name}")
-            return 0, df.height, False
-
-        # Forcer ou convertir 'Date' en type Date si nécessaire
-        if df.schema["Date"] != pl.Date:
-            df = df.with_columns(
-                pl.col("Date").str.strptime(
-                    pl.Date, "%Y-%m-%d", strict=False
-                )
-            )
-
-        total_before = df.height
-        df_filtered = df.filter(pl.col("Date") > cutoff)
-        total_after = df_filtered.height
+            return 0, 0, False
+
+        # Colonnes lues en texte: les lignes conservées sont réécrites à l'identique
+        lf = pl.scan_csv(file_path, infer_schema_length=0)
+        if cols_clean:
+            lf = lf.rename(cols_clean)
+        date_expr = pl.col("Date").str.strptime(pl.Date, DATE_FORMAT, strict=False)
+        keep_expr = date_expr > cutoff
+
+        # Passe rapide: colonne Date uniquement (projection pushdown)
+        stats = lf.select(
+            pl.col("Date").len().alias("total"),
+            keep_expr.sum().alias("kept"),
+        ).collect()
+        total_before = stats["total"][0]
+        total_after = stats["kept"][0] or 0
         removed = total_before - total_after
 
-        if removed > 0:
-            # Modification en place : écraser le fichier original
-            df_filtered.write_csv(file_path)
-            logger.info(f"✅ {file_path.name} : {removed} lignes supprimées, {total_after} conservées")
-        else:
+        if removed == 0 and not cols_clean:
             logger.info(f"✅ {file_path.name} : aucune ligne à supprimer")
+            return 0, total_after, True
+
+        # Modification : écriture streaming dans un fichier temporaire puis remplacement
+        filtered = lf.filter(keep_expr)
+        try:
+            filtered.sink_csv(tmp_path)
+        except pl.exceptions.InvalidOperationError:
+            filtered.collect().write_csv(tmp_path)
+        os.replace(tmp_path, file_path)
+        logger.info(f"✅ {file_path.name} : {removed} lignes supprimées, {total_after} conservées")
 
         return removed, total_after, True
 
     except Exception as e:
         logger.error(f"❌ Erreur lors du traitement de {file_path.name} : {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
         return 0, 0, False
 
+def _init_worker(log_file: Path):
+    """Initialisation d'un processus du pool : même configuration de logging."""
+    setup_logging(log_file)
+
+def _filter_worker(file_path: Path, cutoff: date) -> tuple[int, int, bool]:
+    return filter_csv_by_date(file_path, cutoff, logging.getLogger(__name__))
+
 def main():
     """Fonction principale"""
-    logger = setup_logging(Path("filter_dates.log"))
+    parser = argparse.ArgumentParser(description="Filtrage des CSV fusionnés par date")
+    parser.add_argument("--cutoff", default=DEFAULT_CUTOFF_DATE,
+                        help=f"Supprime les lignes avec Date <= cutoff (défaut: {DEFAULT_CUTOFF_DATE})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Nombre de processus de filtrage (défaut: {DEFAULT_WORKERS}, 1 = séquentiel)")
+    args = parser.parse_args()
+
+    log_file = Path("filter_dates.log")
+    logger = setup_logging(log_file)
     logger.info("=== FILTRAGE DES DONNÉES CSV PAR DATE ===")
 
-    cutoff_date_str = "2025-02-28"
-    cutoff_date = datetime.strptime(cutoff_date_str, "%Y-%m-%d").date()
+    cutoff_date_str = args.cutoff
+    cutoff_date = datetime.strptime(cutoff_date_str, DATE_FORMAT).date()
     logger.info(f"Suppression des lignes avec Date <= {cutoff_date_str}")
 
     script_dir = Path(__file__).parent
@@ -124,8 +161,17 @@ def main():
     logger.info(f"Début du traitement de {total_files} fichiers...")
     logger.info("-" * 50)
 
-    for fp in csv_files:
-        removed, kept, success = filter_csv_by_date(fp, cutoff_date, logger)
+    if args.workers > 1 and total_files > 1:
+        # spawn: Polars n'est pas fiable dans un processus issu d'un fork
+        with ProcessPoolExecutor(max_workers=min(args.workers, total_files),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(log_file,)) as executor:
+            futures = [executor.submit(_filter_worker, fp, cutoff_date) for fp in csv_files]
+            results = [future.result() for future in as_completed(futures)]
+    else:
+        results = [filter_csv_by_date(fp, cutoff_date, logger) for fp in csv_files]
+
+    for removed, kept, success in results:
         if success:
             files_ok += 1
             total_removed += removed
@@ -1,18 +1,31 @@
 import os
-import zipfile
 import shutil
 import logging
 import polars as pl
 import csv
 import re
-import hashlib
 import json
 import sys
 from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import gc
 import psutil
 import time
+import tempfile
+import io
+import threading
+import multiprocessing
+import copy
+
+from zip_extraction import extract_recursive
+from config_memory import MERGE_MEMORY_BUDGET_GB, MERGE_MAX_CONCURRENT_TASKS
+from memory_scheduler import MemoryBudgetScheduler
+from zip_reader import ZipMember, csv_source, source_size
+from parquet_dataset import (PARTITION_COLUMNS, PARQUET_COMPRESSION, UNKNOWN_PARTITION, partition_dir,
+                             list_partitions, bimestre_of_month, load_dataset_schema, save_dataset_schema,
+                             polars_schema, widen_dtype, cast_lossless, read_partition, read_partition_file)
+from row_index import load_row_index, save_row_index, drop_row_index, build_row_index_from_csv, build_row_index_from_parquet, row_hashes, as_text, HASH_COL
 
 # Windows-specific locking
 if os.name == 'nt':
@@ -27,6 +40,9 @@ DATA_CLEAN     = 'data/data_clean_csv'
 STATE_FILE     = 'data/.file_state.json'
 LOCK_FILE      = 'data/.process.lock'
 SCHEMA_CACHE_FILE = 'data/.schema_cache.json'
+SCHEMA_LOG_SUFFIX = '.log.jsonl'               # Journal des mises à jour du cache des schémas
+SCHEMA_LOG_COMPACT_BYTES = 1024 * 1024         # Taille du journal déclenchant la compaction
+MEMORY_STATS_FILE = 'data/.merge_memory_stats.json'  # Pics mémoire observés par type de fusion
 TMP_EXTRACTED  = DATA_EXTRACTED + '_tmp'
 TMP_CLEAN      = DATA_CLEAN + '_tmp'
 
@@ -34,6 +50,25 @@ TMP_CLEAN      = DATA_CLEAN + '_tmp'
 MAX_MEMORY_USAGE_GB = 2.0  # Limite mémoire en GB
 BATCH_SIZE = 20  # Nombre de fichiers traités par batch
 MIN_WORKERS = 2  # Minimum de workers parallèles
+# Lecture des CSV: 'process' (processus séparés, hors GIL, retour en IPC Arrow) ou 'thread'
+PARSE_EXECUTOR = os.environ.get('FV_PARSE_EXECUTOR', 'process').lower()
+
+# Fusion hors mémoire (spill Parquet + déduplication par partitions de hash)
+STREAMING_MERGE = True
+MERGE_PARTITION_BYTES = 64 * 1024 * 1024  # Volume CSV visé par partition de déduplication
+MERGE_MAX_PARTITIONS = 256
+MERGE_SEQ_COL = '__merge_seq'    # Ordre d'origine des lignes (première occurrence conservée)
+MERGE_PART_COL = '__merge_part'
+# Format de sortie de process_data: 'csv' (data_merged_csv), 'parquet' (data_merged_parquet, partitionné
+# par annee/bimestre) ou 'both'
+OUTPUT_FORMAT = os.environ.get('FV_OUTPUT_FORMAT', 'csv').lower()
+APPEND_ONLY_MERGE = True  # Incrémental: ajout des seules lignes nouvelles via l'index de hash (<sortie>.rowidx.*)
+# Déduplication: 'rows' (lignes identiques sur toutes les colonnes) ou 'business' (clés métier:
+# date, zone, provenance, catégorie, dimension annexe; le bimestre le plus récent l'emporte,
+# y compris sur les lignes déjà fusionnées en incrémental, cf. merge_input_order / existing_rows_win)
+DEDUP_MODE = os.environ.get('FV_DEDUP_MODE', 'rows').lower()
+DEDUP_MEASURE_COLUMNS = ('volume',)  # Colonnes de mesure, exclues des clés métier
+DEDUP_WORKERS = min(os.cpu_count() or 1, 4)  # Partitions dédupliquées en parallèle
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
@@ -75,16 +110,13 @@ def save_state(state):
         json.dump(state, f, indent=2)
 
 # ----------------- Utils -----------------
-def file_hash(path):
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
-
 def detect_delimiter(path):
-    with open(path, 'r', newline='', encoding='utf-8', errors='ignore') as f:
-        sample = f.read(2048)
+    if isinstance(path, ZipMember):
+        # CSV lu directement dans l'archive
+        sample = path.read_sample(2048).decode('utf-8', errors='ignore')
+    else:
+        with open(path, 'r', newline='', encoding='utf-8', errors='ignore') as f:
+            sample = f.read(2048)
     try:
         sniffer = csv.Sniffer()
         delimiter = sniffer.sniff(sample).delimiter
@@ -144,33 +176,81 @@ def normalize_column_names(df):
 
 # ----------------- Système de mapping intelligent des colonnes -----------------
 class ColumnMappingManager:
-    """Gestionnaire intelligent des mappings de colonnes pour optimiser les lectures."""
+    """
+    Gestionnaire intelligent des mappings de colonnes pour optimiser les lectures.
+    self.schemas est un instantané immuable: chaque mise à jour d'un type recopie son
+    entrée puis remplace la référence (les lectures se font sans verrou). Les mises à
+    jour sont journalisées en JSON-lines (SCHEMA_LOG_FILE) et fusionnées dans le cache
+    compact par save_cache quand le journal devient volumineux.
+    """
     
     def __init__(self, cache_file=SCHEMA_CACHE_FILE):
         self.cache_file = cache_file
+        self.log_file = os.path.splitext(cache_file)[0] + SCHEMA_LOG_SUFFIX
         self.schemas = {}  # file_type -> {master_schema: [col1, col2, ...], variants: [...]}
+        self._plans = {}   # (file_type, hash(colonnes d'origine, dtypes lus)) -> plan de projection
+        self._lock = threading.RLock()  # Sérialise les écritures (lectures sans verrou)
         self.load_cache()
     
     def load_cache(self):
-        """Charge le cache des schémas depuis le disque."""
+        """Charge le cache des schémas puis rejoue le journal des mises à jour."""
+        schemas = {}
         if os.path.exists(self.cache_file):
             try:
                 with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.schemas = json.load(f)
-                logging.info(f"Cache des schémas chargé: {len(self.schemas)} types de fichiers")
+                    schemas = json.load(f)
             except Exception as e:
                 logging.warning(f"Erreur chargement cache schémas: {e}")
-                self.schemas = {}
+                schemas = {}
+        replayed = 0
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Dernière ligne tronquée (arrêt brutal)
+                    schemas[record['type']] = record['entry']
+                    replayed += 1
+        self.schemas = schemas
+        if schemas:
+            logging.info(f"Cache des schémas chargé: {len(schemas)} types de fichiers ({replayed} mises à jour journalisées)")
     
-    def save_cache(self):
-        """Sauvegarde le cache des schémas sur le disque."""
+    def save_cache(self, force=False):
+        """Compacte le journal dans le cache (JSON compact, écriture atomique) s'il est volumineux."""
+        with self._lock:
+            log_size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+            if not force and log_size < SCHEMA_LOG_COMPACT_BYTES and (log_size == 0 or os.path.exists(self.cache_file)):
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+                with open(self.cache_file + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(self.schemas, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(self.cache_file + '.tmp', self.cache_file)
+                if os.path.exists(self.log_file):
+                    os.remove(self.log_file)
+                logging.info(f"Cache des schémas sauvegardé: {len(self.schemas)} types")
+            except Exception as e:
+                logging.error(f"Erreur sauvegarde cache schémas: {e}")
+    
+    def _publish(self, file_type, entry):
+        """Publie la nouvelle entrée d'un type (nouvel instantané) et la journalise. Appelé sous verrou."""
+        schemas = dict(self.schemas)
+        schemas[file_type] = entry
+        self.schemas = schemas
         try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.schemas, f, indent=2, ensure_ascii=False)
-            logging.info(f"Cache des schémas sauvegardé: {len(self.schemas)} types")
+            os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'type': file_type, 'entry': entry}, ensure_ascii=False, separators=(',', ':')) + '\n')
         except Exception as e:
-            logging.error(f"Erreur sauvegarde cache schémas: {e}")
+            logging.warning(f"Journal des schémas non écrit ({self.log_file}): {e}")
+    
+    def _entry_copy(self, file_type):
+        """Copie modifiable de l'entrée d'un type (ou entrée vierge)."""
+        entry = self.schemas.get(file_type)
+        if entry is None:
+            return {'master_schema': [], 'variants': [], 'column_mappings': {}}
+        return copy.deepcopy(entry)
     
     def normalize_column_name(self, col_name):
         """Normalise un nom de colonne."""
@@ -199,58 +279,153 @@ class ColumnMappingManager:
             return os.path.splitext(filename)[0]
     
     def get_master_schema(self, file_type):
-        """Retourne le schéma maître pour un type de fichier."""
-        if file_type not in self.schemas:
-            self.schemas[file_type] = {
-                'master_schema': [],
-                'variants': [],
-                'column_mappings': {}
-            }
-        return self.schemas[file_type]['master_schema']
+        """Retourne le schéma maître pour un type de fichier (lecture de l'instantané)."""
+        return self.schemas.get(file_type, {}).get('master_schema', [])
     
     def update_schema(self, file_path, original_columns):
         """Met à jour le schéma maître avec de nouvelles colonnes."""
         file_type = self.extract_file_type(file_path)
         normalized_columns = [self.normalize_column_name(col) for col in original_columns]
+        normalized_key = str(normalized_columns)
+        
+        # Variant connu: lecture seule de l'instantané, sans verrou
+        known = self.schemas.get(file_type, {}).get('column_mappings', {}).get(normalized_key)
+        if known is not None:
+            return normalized_columns, known, False
         
         # Créer le mapping original -> normalisé
         column_mapping = dict(zip(original_columns, normalized_columns))
         
-        if file_type not in self.schemas:
-            self.schemas[file_type] = {
-                'master_schema': normalized_columns.copy(),
-                'variants': [normalized_columns.copy()],
-                'column_mappings': {str(normalized_columns): column_mapping}
-            }
-            logging.info(f"Nouveau schéma créé pour {file_type}: {len(normalized_columns)} colonnes")
-            return normalized_columns, column_mapping, True  # True = nouveau schéma
-        
-        master_schema = self.schemas[file_type]['master_schema']
-        
-        # Vérifier si ce schéma exact existe déjà
-        normalized_key = str(normalized_columns)
-        if normalized_key in self.schemas[file_type]['column_mappings']:
-            # Schéma connu, utiliser le mapping existant
-            return normalized_columns, self.schemas[file_type]['column_mappings'][normalized_key], False
-        
-        # Nouveau variant, mettre à jour le schéma maître
-        updated = False
-        for col in normalized_columns:
-            if col not in master_schema:
-                master_schema.append(col)
-                updated = True
-        
-        # Sauvegarder ce nouveau variant
-        self.schemas[file_type]['variants'].append(normalized_columns.copy())
-        self.schemas[file_type]['column_mappings'][normalized_key] = column_mapping
+        with self._lock:
+            if file_type not in self.schemas:
+                self._publish(file_type, {
+                    'master_schema': list(dict.fromkeys(normalized_columns)),  # Cibles en double: une seule colonne
+                    'variants': [normalized_columns.copy()],
+                    'column_mappings': {normalized_key: column_mapping}
+                })
+                logging.info(f"Nouveau schéma créé pour {file_type}: {len(set(normalized_columns))} colonnes")
+                return normalized_columns, column_mapping, True  # True = nouveau schéma
+            
+            entry = self._entry_copy(file_type)
+            
+            # Variant ajouté entre-temps par un autre thread
+            if normalized_key in entry['column_mappings']:
+                return normalized_columns, entry['column_mappings'][normalized_key], False
+            
+            # Nouveau variant, mettre à jour le schéma maître
+            master_schema = entry['master_schema']
+            updated = False
+            for col in normalized_columns:
+                if col not in master_schema:
+                    master_schema.append(col)
+                    updated = True
+            
+            # Sauvegarder ce nouveau variant
+            entry['variants'].append(normalized_columns.copy())
+            entry['column_mappings'][normalized_key] = column_mapping
+            self._publish(file_type, entry)
         
         if updated:
             logging.info(f"Schéma {file_type} mis à jour: {len(master_schema)} colonnes total")
         
         return normalized_columns, column_mapping, updated
     
+    def get_read_options(self, file_type):
+        """Options de lecture mémorisées pour un type de fichier (délimiteur, stratégie, dtypes)."""
+        return self.schemas.get(file_type, {}).get('read_options')
+    
+    def record_read_options(self, file_path, strategy_index, strategy, schema):
+        """Mémorise la lecture gagnante d'un fichier pour relire les suivants du même type en une passe."""
+        file_type = self.extract_file_type(file_path)
+        read_options = {
+            'separator': strategy['separator'],
+            'strategy': strategy_index,
+            'dtypes': {col: self.dtype_to_name(dtype) for col, dtype in schema.items()},
+        }
+        with self._lock:
+            if self.get_read_options(file_type) == read_options:
+                return
+            entry = self._entry_copy(file_type)
+            entry['read_options'] = read_options
+            self._publish(file_type, entry)
+    
+    @staticmethod
+    def dtype_to_name(dtype):
+        """Nom sérialisable d'un dtype Polars (ex: 'Int64', 'Date', 'String')."""
+        base = dtype.base_type() if hasattr(dtype, 'base_type') else dtype
+        name = getattr(base, '__name__', str(base))
+        # Colonne entièrement vide: relire en texte
+        return 'Utf8' if name == 'Null' else name
+    
+    @staticmethod
+    def polars_dtypes(read_options):
+        """Dtypes Polars explicites à partir des options mémorisées."""
+        return {col: getattr(pl, name, pl.Utf8) for col, name in read_options['dtypes'].items()}
+    
+    def projection_plan(self, file_path, original_columns, schema=None):
+        """
+        Plan de projection d'un variant d'en-tête vers le schéma maître:
+        tuple de (colonne source ou None, colonne cible, dtype). Calculé une fois par
+        variant (clé: colonnes et dtypes de la lecture) et recalculé si le schéma maître
+        s'étend ou si ses dtypes changent.
+        schema (dtypes de la lecture) sert à typer les colonnes absentes des autres variants.
+        """
+        file_type = self.extract_file_type(file_path)
+        columns = tuple(original_columns)
+        read_dtypes = tuple(self.dtype_to_name(schema[col]) for col in columns) if schema is not None else None
+        key = (file_type, hash((columns, read_dtypes)))
+        cached = self._plans.get(key)
+        current = self.schemas.get(file_type, {})
+        if (cached and cached['columns'] == columns and cached['read_dtypes'] == read_dtypes
+                and cached['master_len'] == len(current.get('master_schema', []))
+                and cached['master_dtypes'] == current.get('master_dtypes', {})):
+            return cached['plan'], cached['mapping']
+
+        normalized_columns, column_mapping, _ = self.update_schema(file_path, list(columns))
+        with self._lock:
+            entry = self._entry_copy(file_type)
+            master_dtypes = entry.setdefault('master_dtypes', {})
+            dtypes_updated = False
+            if schema is not None:
+                for col, normalized in zip(columns, normalized_columns):
+                    dtype_name = self.dtype_to_name(schema[col])
+                    # Texte: type par défaut, affinable par un fichier mieux typé
+                    if master_dtypes.get(normalized, 'Utf8') in ('Utf8', 'String') and dtype_name != master_dtypes.get(normalized):
+                        master_dtypes[normalized] = dtype_name
+                        dtypes_updated = True
+            if dtypes_updated:
+                self._publish(file_type, entry)
+
+        source_by_target = {}
+        for col, normalized in zip(columns, normalized_columns):
+            if normalized in source_by_target:
+                # Deux colonnes d'origine normalisées vers la même cible: seule la première est projetée
+                logging.warning(f"{file_type}: colonnes '{source_by_target[normalized]}' et '{col}' "
+                                f"normalisées en '{normalized}', '{col}' ignorée")
+                continue
+            source_by_target[normalized] = col
+        master_schema = entry['master_schema']
+        plan = tuple((source_by_target.get(col), col, master_dtypes.get(col, 'Utf8')) for col in master_schema)
+        # Colonnes hors schéma maître conservées en fin de projection
+        plan += tuple((src, tgt, None) for tgt, src in source_by_target.items() if tgt not in master_schema)
+
+        self._plans[key] = {'columns': columns, 'read_dtypes': read_dtypes, 'master_len': len(master_schema),
+                            'master_dtypes': dict(master_dtypes), 'plan': plan, 'mapping': column_mapping}
+        return plan, column_mapping
+
+    @staticmethod
+    def apply_projection(frame, plan):
+        """
+        Applique un plan en un seul select (renommages + nulls typés), sur un
+        DataFrame ou un LazyFrame (ex: pl.scan_csv).
+        """
+        return frame.select([
+            pl.col(src).alias(tgt) if src is not None else pl.lit(None, dtype=getattr(pl, dtype, pl.Utf8)).alias(tgt)
+            for src, tgt, dtype in plan
+        ])
+
     def align_dataframe_to_master(self, df, file_path):
-        """Aligne un DataFrame sur le schéma maître."""
+        """Aligne un DataFrame (colonnes déjà normalisées) sur le schéma maître."""
         file_type = self.extract_file_type(file_path)
         master_schema = self.get_master_schema(file_type)
         
@@ -258,27 +433,11 @@ class ColumnMappingManager:
             # Pas de schéma maître, ce DataFrame devient la référence
             return df
         
-        current_columns = df.columns
-        
-        # Ajouter les colonnes manquantes avec des valeurs nulles
-        for col in master_schema:
-            if col not in current_columns:
-                df = df.with_columns(pl.lit(None).alias(col))
-        
-        # Réorganiser les colonnes selon le schéma maître
-        # + garder les colonnes supplémentaires à la fin
-        ordered_columns = []
-        for col in master_schema:
-            if col in df.columns:
-                ordered_columns.append(col)
-        
-        # Ajouter les colonnes qui ne sont pas dans le schéma maître
-        for col in df.columns:
-            if col not in ordered_columns:
-                ordered_columns.append(col)
-        
-        df = df.select(ordered_columns)
-        return df
+        master_dtypes = self.schemas.get(file_type, {}).get('master_dtypes', {})
+        plan = tuple((col if col in df.columns else None, col, master_dtypes.get(col, 'Utf8')) for col in master_schema)
+        # Garder les colonnes supplémentaires à la fin
+        plan += tuple((col, col, None) for col in df.columns if col not in master_schema)
+        return self.apply_projection(df, plan)
 
 # Instance globale du gestionnaire
 column_manager = ColumnMappingManager()
@@ -286,89 +445,128 @@ column_manager = ColumnMappingManager()
 def read_polars_csv_safely(path, expected_cols=None, normalize_columns=True):
     """
     Lecture sécurisée des fichiers CSV avec gestion robuste des erreurs.
+    Si le type de fichier a déjà été lu, une seule passe avec le délimiteur
+    et les dtypes mémorisés (sans sniff ni inférence); sinon stratégies successives.
+    """
+    read_options = column_manager.get_read_options(column_manager.extract_file_type(path))
+    df, strategy_used, strategy, read_schema = read_csv_raw(path, read_options)
+    if df is None:
+        return None, None
+    return apply_column_mapping(path, df, strategy_used, strategy, read_schema, expected_cols, normalize_columns)
+
+def read_csv_raw(path, read_options=None):
+    """
+    Lecture brute d'un CSV (sans toucher au gestionnaire de colonnes, utilisable
+    dans un processus worker). Retourne (df, stratégie utilisée, options de la
+    stratégie, schéma brut à mémoriser) ou (None, None, None, None).
     """
-    delim = detect_delimiter(path)
-    
     # Vérifier la taille du fichier d'abord
     try:
-        file_size = os.path.getsize(path)
+        file_size = source_size(path)
         if file_size == 0:
             logging.warning(f"Fichier vide ignoré: {path}")
-            return None, None
+            return None, None, None, None
         elif file_size > 100 * 1024 * 1024:  # 100MB
             logging.info(f"Fichier volumineux détecté ({file_size/1024/1024:.1f}MB): {path}")
     except Exception as size_error:
         logging.warning(f"Impossible de vérifier la taille de {path}: {size_error}")
     
-    # Tentatives de lecture avec différentes stratégies
-    strategies = [
-        # Stratégie 1: Lecture normale
-        {'separator': delim, 'infer_schema_length': 1000, 'try_parse_dates': True},
-        # Stratégie 2: Avec ignore_errors
-        {'separator': delim, 'infer_schema_length': 1000, 'ignore_errors': True, 'try_parse_dates': True},
-        # Stratégie 3: Délimiteur alternatif
-        {'separator': ';' if delim != ';' else ',', 'infer_schema_length': 1000, 'try_parse_dates': True},
-        # Stratégie 4: Mode très permissif
-        {'separator': delim, 'infer_schema_length': 100, 'ignore_errors': True, 'try_parse_dates': False},
-        # Stratégie 5: Lecture basique sans inférence
-        {'separator': delim, 'infer_schema_length': 0, 'ignore_errors': True, 'try_parse_dates': False}
-    ]
-    
     df = None
     strategy_used = None
+    # Fichier extrait: chemin; membre ZIP: octets décompressés une seule fois pour toutes les stratégies
+    source = csv_source(path)
+    
+    # Lecture rapide: options mémorisées pour ce type de fichier. Toujours stricte
+    # (ignore_errors=False): une valeur incompatible avec le schéma mémorisé
+    # renvoie vers les stratégies au lieu d'être remplacée par null
+    if read_options:
+        try:
+            df = pl.read_csv(source, separator=read_options['separator'],
+                             schema_overrides=column_manager.polars_dtypes(read_options),
+                             infer_schema_length=0, ignore_errors=False)
+            strategy_used = 0
+            if set(df.columns) != set(read_options['dtypes']):
+                # Nouveau variant d'en-tête: relecture complète avec inférence
+                df = None
+        except Exception as e:
+            logging.debug(f"Lecture avec schéma mémorisé échouée pour {path}: {e}")
+            df = None
+    
+    if df is None:
+        delim = detect_delimiter(path)
+        strategies = [
+            # Stratégie 1: Lecture normale
+            {'separator': delim, 'infer_schema_length': 1000, 'try_parse_dates': True},
+            # Stratégie 2: Avec ignore_errors
+            {'separator': delim, 'infer_schema_length': 1000, 'ignore_errors': True, 'try_parse_dates': True},
+            # Stratégie 3: Délimiteur alternatif
+            {'separator': ';' if delim != ';' else ',', 'infer_schema_length': 1000, 'try_parse_dates': True},
+            # Stratégie 4: Mode très permissif
+            {'separator': delim, 'infer_schema_length': 100, 'ignore_errors': True, 'try_parse_dates': False},
+            # Stratégie 5: Lecture basique sans inférence
+            {'separator': delim, 'infer_schema_length': 0, 'ignore_errors': True, 'try_parse_dates': False}
+        ]
+    else:
+        strategies = []
     
     for i, strategy in enumerate(strategies, 1):
         try:
-            df = pl.read_csv(path, **strategy)
+            df = pl.read_csv(source, **strategy)
             strategy_used = i
             break
         except Exception as e:
             if i == len(strategies):
                 logging.error(f"❌ Toutes les stratégies de lecture ont échoué pour {path}: {e}")
-                return None, None
+                return None, None, None, None
             else:
                 logging.debug(f"Stratégie {i} échouée pour {path}: {e}")
                 continue
     
     if df is None:
-        return None, None
+        return None, None, None, None
     
     # Vérifications post-lecture
     if len(df) == 0:
         logging.warning(f"DataFrame vide après lecture: {path}")
-        return None, None
+        return None, None, None, None
     
     # Vérifier si on a une seule colonne avec beaucoup de texte (mal parsé)
     if len(df.columns) == 1 and ';' in df.columns[0]:
         logging.warning(f"Fichier mal parsé détecté - colonne unique contenant ';': {path}")
         # Essayer de re-parser avec un délimiteur différent
         try:
-            df = pl.read_csv(path, separator=';', infer_schema_length=100, ignore_errors=True)
+            df = pl.read_csv(source, separator=';', infer_schema_length=100, ignore_errors=True)
             logging.info(f"✅ Re-parsing réussi avec ';' pour {path}")
         except Exception as reparse_error:
             logging.warning(f"Re-parsing échoué: {reparse_error}")
     
+    # Schéma brut (avant normalisation) de la lecture gagnante, mémorisé par apply_column_mapping
+    read_schema = df.schema if strategy_used and len(df.columns) > 1 else None
+    strategy = strategies[strategy_used - 1] if strategy_used else None
+    return df, strategy_used, strategy, read_schema
+
+def apply_column_mapping(path, df, strategy_used, strategy, read_schema, expected_cols=None, normalize_columns=True):
+    """
+    Normalise et aligne un DataFrame lu par read_csv_raw via le gestionnaire de
+    colonnes, et mémorise la lecture gagnante. Toujours exécuté dans le processus principal.
+    """
     # Utiliser le gestionnaire de mapping intelligent
     column_mapping = None
     if normalize_columns:
         try:
-            original_columns = df.columns.copy()
-            
-            # Mettre à jour le schéma et obtenir le mapping
-            normalized_columns, column_mapping, schema_updated = column_manager.update_schema(path, original_columns)
-            
-            # Renommer les colonnes
-            rename_dict = dict(zip(original_columns, normalized_columns))
-            df = df.rename(rename_dict)
-            
-            # Aligner sur le schéma maître
-            df = column_manager.align_dataframe_to_master(df, path)
+            # Plan du variant (mis en cache) : renommage + alignement sur le schéma maître en un select
+            plan, column_mapping = column_manager.projection_plan(path, df.columns, df.schema)
+            df = column_manager.apply_projection(df, plan)
             
         except Exception as normalize_error:
             logging.error(f"❌ Erreur normalisation colonnes pour {path}: {normalize_error}")
             # Continuer sans normalisation
             pass
     
+    # Mémoriser la lecture gagnante pour les prochains fichiers de ce type
+    if read_schema is not None:
+        column_manager.record_read_options(path, strategy_used, strategy, read_schema)
+    
     # Vérification finale des colonnes attendues
     if expected_cols is not None and df.columns != expected_cols:
         logging.warning(f"Colonnes inattendues dans {path}: {df.columns} vs {expected_cols}")
@@ -413,6 +611,23 @@ def merge_to_csv_memory_optimized(csv_paths, out_csv_path, incremental=False):
         logging.warning(f"Aucun fichier CSV à fusionner pour {out_csv_path}.")
         return
 
+    if incremental and APPEND_ONLY_MERGE and os.path.exists(out_csv_path):
+        try:
+            if merge_to_csv_append(csv_paths, out_csv_path):
+                return
+        except Exception as e:
+            logging.warning(f"⚠️  Ajout incrémental impossible pour {out_csv_path} ({e}), fusion complète")
+
+    if STREAMING_MERGE:
+        try:
+            merge_to_csv_streaming(csv_paths, out_csv_path, incremental)
+            return
+        except Exception as e:
+            logging.warning(f"⚠️  Fusion streaming échouée pour {out_csv_path} ({e}), repli sur la fusion par batches")
+
+    # La sortie va être réécrite sans index
+    drop_row_index(out_csv_path)
+
     logging.info(f"🚀 Starting memory-optimized CSV merge for {out_csv_path}: {len(csv_paths)} CSV files")
     
     # En mode incrémental, charger l'existant comme point de départ
@@ -430,8 +645,8 @@ def merge_to_csv_memory_optimized(csv_paths, out_csv_path, incremental=False):
     total_rows_processed = 0
     all_batch_dfs = []
     
-    # Ajouter l'existant en premier si disponible
-    if existing_df is not None:
+    # Ajouter l'existant en premier si disponible (en dernier en 'business': les nouvelles lignes l'emportent)
+    if existing_df is not None and existing_rows_win():
         all_batch_dfs.append(existing_df)
         total_rows_processed += len(existing_df)
         logging.info(f"📊 Données existantes ajoutées: {len(existing_df)} lignes")
@@ -491,6 +706,10 @@ def merge_to_csv_memory_optimized(csv_paths, out_csv_path, incremental=False):
             gc.collect()
             time.sleep(2)
 
+    if existing_df is not None and not existing_rows_win():
+        all_batch_dfs.append(existing_df)
+        total_rows_processed += len(existing_df)
+
     # Fusion finale de tous les DataFrames
     if not all_batch_dfs:
         logging.warning("Aucun DataFrame à fusionner")
@@ -519,7 +738,7 @@ def merge_to_csv_memory_optimized(csv_paths, out_csv_path, incremental=False):
         
         # Déduplication
         before_dedup = len(final_df)
-        final_df = final_df.unique(maintain_order=True)
+        final_df = final_df.unique(subset=dedup_subset(final_df.columns), keep='first', maintain_order=True)
         after_dedup = len(final_df)
         logging.info(f"🔄 Déduplication: {before_dedup} → {after_dedup} lignes")
         
@@ -555,7 +774,7 @@ def merge_to_csv_memory_optimized(csv_paths, out_csv_path, incremental=False):
                 
                 # Fusion finale des CSV
                 final_csv_df = pl.concat(csv_dfs, how="diagonal_relaxed")
-                final_csv_df = final_csv_df.unique(maintain_order=True)
+                final_csv_df = final_csv_df.unique(subset=dedup_subset(final_csv_df.columns), keep='first', maintain_order=True)
                 final_csv_df.write_csv(out_csv_path, separator=';')
                 
                 logging.info(f"✅ Fallback réussi: {len(final_csv_df)} lignes sauvegardées")
@@ -582,8 +801,325 @@ def merge_to_csv_memory_optimized(csv_paths, out_csv_path, incremental=False):
             del existing_df
         gc.collect()
 
-def process_batch_memory_safe(csv_files):
-    """Traite un batch de fichiers CSV en optimisant la mémoire."""
+def dedup_key_columns(columns):
+    """Clés métier d'une sortie: toutes les colonnes hors mesures (date, zone, provenance, catégorie, dimension annexe)."""
+    keys = [c for c in columns if c not in DEDUP_MEASURE_COLUMNS]
+    return keys or list(columns)
+
+def dedup_subset(columns):
+    """Colonnes comparées par la déduplication selon DEDUP_MODE."""
+    return dedup_key_columns(columns) if DEDUP_MODE == 'business' else list(columns)
+
+def existing_rows_win():
+    """
+    Priorité des lignes déjà fusionnées en incrémental. En 'business', les nouvelles
+    entrées l'emportent (bimestre relivré ou corrigé): elles sont placées avant l'existant
+    et l'ajout seul est abandonné dès qu'une clé existe déjà.
+    """
+    return DEDUP_MODE != 'business'
+
+def replaces_existing_keys(new_hashes, known_hashes):
+    """Ajout seul impossible: en 'business', une nouvelle ligne remplacerait une clé existante."""
+    return not existing_rows_win() and bool(new_hashes.is_in(known_hashes).any())
+
+def merge_to_csv_append(csv_paths, out_csv_path):
+    """
+    Fusion incrémentale en ajout seul : les nouveaux fichiers sont filtrés contre
+    l'index de hash de la sortie et seules les lignes inédites sont ajoutées en fin
+    de CSV. L'historique n'est ni relu ni réécrit (coût proportionnel aux nouvelles
+    données). Retourne False si une fusion complète est nécessaire (nouvelles colonnes).
+    """
+    index = load_row_index(out_csv_path)
+    header = pl.read_csv(out_csv_path, separator=';', n_rows=0).columns
+    if index is None or index[1].get('key_columns', index[1]['columns']) != dedup_subset(header):
+        logging.info(f"🔎 Index de lignes absent ou obsolète, reconstruction: {out_csv_path}")
+        index = build_row_index_from_csv(out_csv_path, separator=';', key_columns=dedup_subset(header))
+        if index is None:
+            return False
+    known_hashes, meta = index
+    columns = meta['columns']
+    key_columns = meta['key_columns']
+
+    new_dfs = []
+    for batch_start in range(0, len(csv_paths), BATCH_SIZE):
+        batch_df = process_batch_memory_safe(csv_paths[batch_start:batch_start + BATCH_SIZE])
+        if batch_df is None or len(batch_df) == 0:
+            continue
+        extra_columns = [c for c in batch_df.columns if c not in columns]
+        if extra_columns:
+            logging.info(f"🆕 Nouvelles colonnes {extra_columns} pour {out_csv_path}: fusion complète nécessaire")
+            return False
+        new_dfs.append(as_text(batch_df, columns))
+        del batch_df
+
+    if not new_dfs:
+        logging.info(f"✅ Aucune donnée nouvelle pour {out_csv_path}")
+        return True
+
+    new_df = pl.concat(new_dfs, how="vertical")
+    del new_dfs
+    candidates = len(new_df)
+    new_df = new_df.with_columns(row_hashes(new_df, key_columns)) \
+                   .unique(subset=[HASH_COL], keep='first', maintain_order=True)
+    if replaces_existing_keys(new_df[HASH_COL], known_hashes):
+        logging.info(f"🔁 Clés déjà présentes dans {out_csv_path} (mode business): fusion complète nécessaire")
+        return False
+    new_df = new_df.filter(~pl.col(HASH_COL).is_in(known_hashes))
+
+    if len(new_df) > 0:
+        # Garantir un saut de ligne final avant l'ajout
+        with open(out_csv_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+        with open(out_csv_path, 'a', encoding='utf-8', newline='') as f:
+            if needs_newline:
+                f.write('\n')
+            new_df.drop(HASH_COL).write_csv(f, separator=';', include_header=False)
+        save_row_index(out_csv_path, pl.concat([known_hashes, new_df[HASH_COL]]), columns, key_columns)
+
+    logging.info(f"✅ Ajout incrémental {os.path.basename(out_csv_path)}: {len(new_df)} lignes nouvelles "
+                 f"sur {candidates} lues (index: {len(known_hashes)} lignes existantes)")
+    return True
+
+def input_bytes(csv_paths):
+    """Volume total (octets) des CSV d'entrée d'une fusion."""
+    total_bytes = 0
+    for path in csv_paths:
+        try:
+            total_bytes += source_size(path)
+        except OSError:
+            pass
+    return total_bytes
+
+def _merge_partition_count(csv_paths, out_csv_path, incremental):
+    """Nombre de partitions de déduplication selon le volume CSV à fusionner."""
+    total_bytes = input_bytes(csv_paths)
+    if incremental and os.path.exists(out_csv_path):
+        total_bytes += os.path.getsize(out_csv_path)
+    return max(1, min(MERGE_MAX_PARTITIONS, -(-total_bytes // MERGE_PARTITION_BYTES)))
+
+def dedup_partitioned(fragments, columns, work_dir, n_parts):
+    """
+    Déduplication hors mémoire : les lignes des fragments Parquet (colonnes texte +
+    MERGE_SEQ_COL) sont réparties en n_parts fichiers par hash des clés métier, puis
+    chaque partition est dédupliquée indépendamment, en parallèle (première occurrence
+    conservée, sur dedup_subset). Les fragments sont supprimés au fur et à mesure.
+    Retourne (fichiers dédupliqués, lignes avant, lignes après).
+    """
+    key_columns = dedup_key_columns(columns)
+    subset = dedup_subset(columns)
+
+    # Répartition: une ligne et ses doublons (mêmes clés) tombent dans la même partition
+    for i, fragment in enumerate(fragments):
+        df = pl.read_parquet(fragment)
+        missing = [pl.lit(None, dtype=pl.Utf8).alias(c) for c in columns if c not in df.columns]
+        if missing:
+            df = df.with_columns(missing)
+        df = df.select(columns + [MERGE_SEQ_COL])
+        df = df.with_columns((df.select(key_columns).hash_rows() % n_parts).alias(MERGE_PART_COL))
+        for part_df in df.partition_by(MERGE_PART_COL):
+            part_dir = os.path.join(work_dir, f'part_{part_df[MERGE_PART_COL][0]}')
+            os.makedirs(part_dir, exist_ok=True)
+            part_df.drop(MERGE_PART_COL).write_parquet(os.path.join(part_dir, f'{i}.parquet'), compression='lz4')
+        os.remove(fragment)
+        del df
+    gc.collect()
+
+    def dedup_partition(part_name):
+        part_dir = os.path.join(work_dir, part_name)
+        df = pl.read_parquet(os.path.join(part_dir, '*.parquet'), hive_partitioning=False).sort(MERGE_SEQ_COL)
+        before = len(df)
+        df = df.unique(subset=subset, keep='first', maintain_order=True)
+        dedup_file = os.path.join(work_dir, f'dedup_{part_name}.parquet')
+        df.write_parquet(dedup_file, compression='lz4')
+        shutil.rmtree(part_dir)
+        return dedup_file, before, len(df)
+
+    part_names = sorted(name for name in os.listdir(work_dir) if name.startswith('part_'))
+    with ThreadPoolExecutor(max_workers=DEDUP_WORKERS) as executor:
+        results = list(executor.map(dedup_partition, part_names))
+    gc.collect()
+    return ([f for f, _, _ in results], sum(b for _, b, _ in results), sum(a for _, _, a in results))
+
+def merge_to_csv_streaming(csv_paths, out_csv_path, incremental=False):
+    """
+    Fusion hors mémoire : chaque batch est déversé en Parquet (colonnes texte),
+    les lignes sont réparties par hash en partitions dédupliquées une à une,
+    puis l'ordre d'origine est restauré par un tri streaming avant l'écriture CSV.
+    La mémoire reste bornée par la taille d'un batch et d'une partition,
+    quel que soit le nombre de bimestres fusionnés.
+    """
+    logging.info(f"🚀 Fusion streaming pour {out_csv_path}: {len(csv_paths)} fichiers CSV")
+    work_dir = tempfile.mkdtemp(prefix='.merge_', dir=os.path.dirname(out_csv_path) or '.')
+    fragments = []
+    columns = []  # Union ordonnée des colonnes (comme une concaténation diagonale)
+    next_seq = 0
+
+    def spill(df):
+        nonlocal next_seq
+        df = df.select(pl.all().cast(pl.Utf8)).with_columns(
+            pl.int_range(next_seq, next_seq + len(df), dtype=pl.UInt64).alias(MERGE_SEQ_COL))
+        next_seq += len(df)
+        columns.extend(c for c in df.columns if c != MERGE_SEQ_COL and c not in columns)
+        fragment = os.path.join(work_dir, f'fragment_{len(fragments)}.parquet')
+        df.write_parquet(fragment, compression='lz4')
+        fragments.append(fragment)
+
+    def spill_existing():
+        start = next_seq
+        reader = pl.read_csv_batched(out_csv_path, separator=';', infer_schema_length=0)
+        while True:
+            batches = reader.next_batches(1)
+            if not batches:
+                break
+            spill(batches[0])
+        logging.info(f"✅ Existant déversé: {next_seq - start} lignes")
+
+    try:
+        # 1. Spill : existant (mode incrémental) puis nouveaux fichiers, batch par batch
+        #    (en 'business', nouveaux fichiers d'abord: ils l'emportent sur l'existant)
+        merge_existing = incremental and os.path.exists(out_csv_path)
+        if merge_existing and existing_rows_win():
+            spill_existing()
+
+        for batch_start in range(0, len(csv_paths), BATCH_SIZE):
+            batch_df = process_batch_memory_safe(csv_paths[batch_start:batch_start + BATCH_SIZE])
+            if batch_df is not None and len(batch_df) > 0:
+                spill(batch_df)
+            del batch_df
+            gc.collect()
+
+        if merge_existing and not existing_rows_win():
+            spill_existing()
+
+        if not fragments:
+            logging.warning(f"Aucune ligne à fusionner pour {out_csv_path}")
+            return
+
+        # 2-3. Répartition par hash des clés puis déduplication parallèle des partitions
+        n_parts = _merge_partition_count(csv_paths, out_csv_path, incremental)
+        dedup_files, rows_before, rows_after = dedup_partitioned(fragments, columns, work_dir, n_parts)
+        logging.info(f"🔄 Déduplication ({n_parts} partitions, {DEDUP_MODE}): {rows_before} → {rows_after} lignes")
+
+        # 4. Tri streaming sur l'ordre d'origine et écriture CSV atomique
+        tmp_out = out_csv_path + '.tmp'
+        pl.scan_parquet(os.path.join(work_dir, 'dedup_*.parquet')) \
+            .sort(MERGE_SEQ_COL).drop(MERGE_SEQ_COL) \
+            .sink_csv(tmp_out, separator=';')
+        os.replace(tmp_out, out_csv_path)
+        logging.info(f"✅ Fusion streaming terminée: {rows_after} lignes, {len(columns)} colonnes → {out_csv_path}")
+
+        # 5. Index des lignes pour les prochaines fusions incrémentales (ajout seul)
+        key_columns = dedup_subset(columns)
+        hashes = [pl.read_parquet(f).pipe(row_hashes, key_columns) for f in dedup_files]
+        save_row_index(out_csv_path, pl.concat(hashes) if hashes else pl.Series(dtype=pl.UInt64), columns, key_columns)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if os.path.exists(out_csv_path + '.tmp'):
+            os.remove(out_csv_path + '.tmp')
+
+def _parse_csv_worker(path, read_options):
+    """Worker (processus séparé) : lecture brute d'un CSV, DataFrame renvoyé en IPC Arrow."""
+    df, strategy_used, strategy, read_schema = read_csv_raw(path, read_options)
+    if df is None:
+        return None, None, None, None
+    buffer = io.BytesIO()
+    df.write_ipc(buffer)
+    return buffer.getvalue(), strategy_used, strategy, read_schema
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool(max_workers):
+    """Pool de processus de lecture, créé une fois et partagé entre batches et tâches."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn: Polars n'est pas fiable dans un processus issu d'un fork
+            _parse_pool = ProcessPoolExecutor(max_workers=max_workers,
+                                              mp_context=multiprocessing.get_context('spawn'))
+            logging.info(f"⚙️  Pool de lecture CSV: {max_workers} processus")
+        return _parse_pool
+
+def shutdown_parse_pool():
+    """Arrête le pool de processus de lecture (fin de traitement ou pool cassé)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=True, cancel_futures=True)
+            _parse_pool = None
+
+def _parse_csv_files_threads(csv_files, max_workers, expected_cols=None):
+    """Lecture + normalisation dans des threads (mode historique)."""
+    def read_and_align_csv_safe(path):
+        try:
+            df, column_mapping = read_polars_csv_safely(path, expected_cols, normalize_columns=True)
+            return df, None if df is not None else "Fichier non lisible ou vide"
+        except Exception as e:
+            return None, str(e)
+
+    results = [None] * len(csv_files)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_index = {executor.submit(read_and_align_csv_safe, p): i for i, p in enumerate(csv_files)}
+        for future in as_completed(future_to_index):
+            i = future_to_index[future]
+            df, error = future.result()
+            results[i] = (csv_files[i], df, error)
+    return results
+
+def parse_csv_files(csv_files, max_workers, expected_cols=None):
+    """
+    Lit et normalise des CSV en parallèle; retourne [(path, df ou None, erreur)] dans l'ordre d'entrée.
+    En mode 'process', l'analyse CSV tourne dans des processus (hors GIL) et revient en IPC Arrow;
+    les mises à jour du gestionnaire de colonnes sont ensuite appliquées dans le processus
+    principal, dans l'ordre des fichiers (résultat déterministe).
+    """
+    if PARSE_EXECUTOR != 'process' or len(csv_files) < 2:
+        return _parse_csv_files_threads(csv_files, max_workers, expected_cols)
+
+    raw_results = [None] * len(csv_files)
+    try:
+        executor = _get_parse_pool(max_workers)
+        future_to_index = {
+            executor.submit(_parse_csv_worker, p,
+                            column_manager.get_read_options(column_manager.extract_file_type(p))): i
+            for i, p in enumerate(csv_files)
+        }
+        for future in as_completed(future_to_index):
+            i = future_to_index[future]
+            try:
+                raw_results[i] = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                raw_results[i] = e
+    except BrokenProcessPool as e:
+        logging.warning(f"⚠️  Pool de processus indisponible ({e}), lecture en threads")
+        shutdown_parse_pool()
+        return _parse_csv_files_threads(csv_files, max_workers, expected_cols)
+
+    results = []
+    for p, raw in zip(csv_files, raw_results):
+        if isinstance(raw, Exception):
+            results.append((p, None, str(raw)))
+            continue
+        ipc_bytes, strategy_used, strategy, read_schema = raw
+        if ipc_bytes is None:
+            results.append((p, None, "Fichier non lisible ou vide"))
+            continue
+        try:
+            df, column_mapping = apply_column_mapping(p, pl.read_ipc(io.BytesIO(ipc_bytes)), strategy_used,
+                                                      strategy, read_schema, expected_cols)
+            results.append((p, df, None))
+        except Exception as e:
+            results.append((p, None, str(e)))
+    return results
+
+def process_batch_memory_safe(csv_files, transform=None):
+    """
+    Traite un batch de fichiers CSV en optimisant la mémoire.
+    transform(df, path) est appliqué à chaque fichier avant la concaténation.
+    """
     if not csv_files:
         return None
     
@@ -594,35 +1130,18 @@ def process_batch_memory_safe(csv_files):
     successful_reads = 0
     failed_reads = 0
     
-    def read_and_align_csv_safe(path):
-        """Version memory-safe de la lecture CSV."""
-        try:
-            result = read_polars_csv_safely(path, normalize_columns=True)
-            if result is None or result[0] is None:
-                return None, path, "Fichier non lisible ou vide"
-            df, column_mapping = result
-            return df, path, None
-        except Exception as e:
-            return None, path, str(e)
-    
-    # Lecture parallèle avec moins de workers
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_path = {executor.submit(read_and_align_csv_safe, p): p for p in csv_files}
-        
-        for future in as_completed(future_to_path):
-            p = future_to_path[future]
+    # Lecture parallèle, résultats dans l'ordre des fichiers
+    for p, df, error in parse_csv_files(csv_files, max_workers):
+        if df is not None:
             try:
-                df, file_path, error = future.result()
-                if df is not None:
-                    dfs.append(df)
-                    successful_reads += 1
-                else:
-                    failed_reads += 1
-                    if error:
-                        logging.warning(f"⚠️  Lecture échouée {p}: {error}")
+                dfs.append(transform(df, p) if transform is not None else df)
+                successful_reads += 1
+                continue
             except Exception as e:
-                failed_reads += 1
-                logging.error(f"❌ Erreur future {p}: {e}")
+                error = str(e)
+        failed_reads += 1
+        if error:
+            logging.warning(f"⚠️  Lecture échouée {p}: {error}")
     
     if not dfs:
         logging.warning(f"Aucun DataFrame chargé dans ce batch ({failed_reads} échecs)")
@@ -676,11 +1195,15 @@ def merge_to_parquet(csv_paths, out_parquet_path, incremental=False):
     logging.info(f"Starting merge for {out_parquet_path}: {len(csv_paths)} CSV files")
     dfs = []
     
+    # En mode incrémental indexé, l'existant n'est pas rechargé (voir merge_to_parquet_append)
+    append_only = incremental and APPEND_ONLY_MERGE and os.path.exists(out_parquet_path)
+
     # En mode incrémental, charger l'existant (Parquet) pour le réintégrer
-    if incremental and os.path.exists(out_parquet_path):
+    old_df = None
+    if incremental and not append_only and os.path.exists(out_parquet_path):
         try:
             old_df = pl.read_parquet(out_parquet_path)
-            dfs.append(old_df)
+            dfs.append(old_df)  # Replacé en fin de liste en 'business' (nouvelles lignes prioritaires)
             logging.info(f"Chargé existant {out_parquet_path} ({len(old_df)} lignes, {len(old_df.columns)} colonnes)")
         except Exception as e:
             logging.error(f"Impossible de charger existant {out_parquet_path}: {e}")
@@ -688,25 +1211,18 @@ def merge_to_parquet(csv_paths, out_parquet_path, incremental=False):
     # Lecture parallèle des nouveaux CSV avec mapping intelligent
     max_workers = min(os.cpu_count() or 1, 8)
     
-    def read_and_align_csv(path):
-        """Helper function pour la lecture et alignement automatique."""
-        df, column_mapping = read_polars_csv_safely(path, normalize_columns=True)
-        return df, path
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_path = {executor.submit(read_and_align_csv, p): p for p in csv_paths}
-        for future in as_completed(future_to_path):
-            p = future_to_path[future]
-            try:
-                df, file_path = future.result()
-                dfs.append(df)
-                logging.info(f"Chargé et aligné {p} ({len(df)} lignes, {len(df.columns)} colonnes)")
-            except Exception as e:
-                logging.error(f"Erreur lecture {p}: {e}")
+    for p, df, error in parse_csv_files(csv_paths, max_workers):
+        if df is not None:
+            dfs.append(df)
+            logging.info(f"Chargé et aligné {p} ({len(df)} lignes, {len(df.columns)} colonnes)")
+        else:
+            logging.error(f"Erreur lecture {p}: {error}")
 
     if not dfs:
         logging.warning(f"Aucun DataFrame Polars disponible pour fusionner vers {out_parquet_path}.")
         return
+    if old_df is not None and not existing_rows_win():
+        dfs.append(dfs.pop(0))
 
     # Grâce au système de mapping, tous les DataFrames sont déjà alignés
     # La concaténation devrait être beaucoup plus simple et rapide
@@ -723,9 +1239,22 @@ def merge_to_parquet(csv_paths, out_parquet_path, incremental=False):
             logging.error(f"Toutes les méthodes de concaténation ont échoué: {fallback_err}")
             raise fallback_err
 
+    if append_only:
+        try:
+            if merge_to_parquet_append(merged, out_parquet_path):
+                return
+        except Exception as e:
+            logging.warning(f"⚠️  Ajout incrémental impossible pour {out_parquet_path} ({e}), fusion complète")
+        try:
+            existing = pl.read_parquet(out_parquet_path)
+            frames = [existing, merged] if existing_rows_win() else [merged, existing]
+            merged = pl.concat(frames, how="diagonal_relaxed")
+        except Exception as e:
+            logging.error(f"Impossible de charger existant {out_parquet_path}: {e}")
+
     # Suppression des doublons
     before = len(merged)
-    merged = merged.unique(keep="first", maintain_order=True)
+    merged = merged.unique(subset=dedup_subset(merged.columns), keep="first", maintain_order=True)
     after = len(merged)
     logging.info(f"Fusion: {before} → {after} lignes après suppression des doublons.")
 
@@ -733,10 +1262,221 @@ def merge_to_parquet(csv_paths, out_parquet_path, incremental=False):
     try:
         merged.write_parquet(out_parquet_path, compression='zstd')
         logging.info(f"✅ Fusion enregistrée (Parquet) dans {out_parquet_path} - Final: {len(merged)} lignes, {len(merged.columns)} colonnes")
+        save_row_index(out_parquet_path, row_hashes(merged, dedup_subset(merged.columns)), merged.columns,
+                       dedup_subset(merged.columns))
         
     except Exception as e:
         logging.error(f"Erreur lors de l'écriture Parquet vers {out_parquet_path}: {e}")
 
+def merge_to_parquet_append(new_df, out_parquet_path):
+    """
+    Variante Parquet de l'ajout seul : les lignes de new_df absentes de l'index sont
+    converties au schéma existant puis ajoutées par une copie streaming (un fichier
+    Parquet ne s'étend pas en place), sans relecture en mémoire ni déduplication globale.
+    Retourne False si une fusion complète est nécessaire (nouvelles colonnes, types
+    non convertibles sans perte).
+    """
+    index = load_row_index(out_parquet_path)
+    columns = list(pl.read_parquet_schema(out_parquet_path))
+    if index is None or index[1].get('key_columns', index[1]['columns']) != dedup_subset(columns):
+        index = build_row_index_from_parquet(out_parquet_path, key_columns=dedup_subset(columns))
+    if index is None:
+        return False
+    known_hashes, meta = index
+    columns = meta['columns']
+    key_columns = meta['key_columns']
+    extra_columns = [c for c in new_df.columns if c not in columns]
+    if extra_columns:
+        logging.info(f"🆕 Nouvelles colonnes {extra_columns} pour {out_parquet_path}: fusion complète nécessaire")
+        return False
+
+    schema = pl.read_parquet_schema(out_parquet_path)
+    candidates = len(new_df)
+    try:
+        # Conversion sans perte: une valeur tronquée (12.5 -> 12) ou nulle ne doit ni être
+        # ajoutée ni hachée (elle passerait pour un doublon d'une ligne existante)
+        new_df = cast_lossless(new_df, {c: schema[c] for c in columns if c in new_df.columns})
+    except ValueError as e:
+        logging.info(f"🔁 Types incompatibles avec {out_parquet_path} ({e}): fusion complète nécessaire")
+        return False
+    new_df = new_df.select([
+        pl.col(c) if c in new_df.columns else pl.lit(None, dtype=schema[c]).alias(c)
+        for c in columns
+    ])
+    new_df = new_df.with_columns(row_hashes(new_df, key_columns)) \
+                   .unique(subset=[HASH_COL], keep='first', maintain_order=True)
+    if replaces_existing_keys(new_df[HASH_COL], known_hashes):
+        logging.info(f"🔁 Clés déjà présentes dans {out_parquet_path} (mode business): fusion complète nécessaire")
+        return False
+    new_df = new_df.filter(~pl.col(HASH_COL).is_in(known_hashes))
+
+    if len(new_df) > 0:
+        tmp_path = out_parquet_path + '.tmp'
+        pl.concat([pl.scan_parquet(out_parquet_path), new_df.drop(HASH_COL).lazy()]) \
+            .sink_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, out_parquet_path)
+        save_row_index(out_parquet_path, pl.concat([known_hashes, new_df[HASH_COL]]), columns, key_columns)
+
+    logging.info(f"✅ Ajout incrémental {os.path.basename(out_parquet_path)}: {len(new_df)} lignes nouvelles "
+                 f"sur {candidates} lues (index: {len(known_hashes)} lignes existantes)")
+    return True
+
+# ----------------- Sortie Parquet partitionnée (annee / bimestre) -----------------
+def file_partition(path):
+    """(annee, bimestre) déduits du nom de fichier, UNKNOWN_PARTITION si absents"""
+    name = os.path.basename(str(path))
+    year = extract_year(name)
+    bim = re.search(r'(?:^|_|\d{4})B([1-6])(?=_|\.|$)', name)
+    return (int(year) if year.isdigit() else UNKNOWN_PARTITION,
+            int(bim.group(1)) if bim else UNKNOWN_PARTITION)
+
+def merge_input_order(paths):
+    """
+    Ordre déterministe des fichiers d'une fusion (indépendant de os.scandir):
+    chronologique par (annee, bimestre) puis chemin. En déduplication 'business',
+    du plus récent au plus ancien: la première occurrence conservée est celle
+    du dernier bimestre livré, y compris face aux lignes déjà fusionnées en
+    incrémental (existing_rows_win).
+    """
+    ordered = sorted(paths, key=lambda path: (file_partition(path), str(path)))
+    return ordered[::-1] if DEDUP_MODE == 'business' else ordered
+
+def with_partition_columns(df, path):
+    """Ajoute annee / bimestre à partir de la colonne date (repli: nom du fichier)"""
+    file_year, file_bim = file_partition(path)
+    if 'date' not in df.columns:
+        return df.with_columns(pl.lit(file_year, dtype=pl.Int32).alias('annee'),
+                               pl.lit(file_bim, dtype=pl.Int32).alias('bimestre'))
+    if df.schema['date'] == pl.Utf8:
+        date_expr = pl.col('date').str.to_date(strict=False)
+    else:
+        date_expr = pl.col('date').cast(pl.Date, strict=False)
+    return df.with_columns(
+        date_expr.dt.year().cast(pl.Int32).fill_null(file_year).alias('annee'),
+        bimestre_of_month(date_expr.dt.month()).fill_null(file_bim).alias('bimestre'),
+    )
+
+def widen_dataset_schema(columns, schema):
+    """
+    Élargit sur place le schéma figé {colonne: nom de dtype} aux types d'une nouvelle lecture
+    (supertype sans perte). Retourne True si un type existant a changé.
+    """
+    widened = False
+    for col, dtype in schema.items():
+        if col not in columns or col in PARTITION_COLUMNS:
+            continue
+        current = polars_schema({col: columns[col]})[col]
+        target = widen_dtype(current, dtype)
+        if target != current:
+            logging.info(f"🔁 Colonne {col}: type élargi {columns[col]} -> {ColumnMappingManager.dtype_to_name(target)}")
+            columns[col] = ColumnMappingManager.dtype_to_name(target)
+            widened = True
+    return widened
+
+def conform_to_dataset_schema(df, columns):
+    """
+    Projette df sur le schéma figé du dataset (colonnes absentes à null). Les conversions
+    sont sans perte (cast_lossless): ValueError plutôt qu'une troncature silencieuse.
+    """
+    dtypes = polars_schema(columns)
+    df = cast_lossless(df, dtypes)
+    exprs = [pl.col(c) if c in df.columns else pl.lit(None, dtype=dtypes[c]).alias(c) for c in columns]
+    exprs += [pl.col(c) for c in PARTITION_COLUMNS if c in df.columns]
+    return df.select(exprs)
+
+def _replace_partition(target_dir, df):
+    """Réécrit une partition de façon atomique (dossier .tmp puis échange)"""
+    staging_dir = target_dir + '.tmp'
+    old_dir = target_dir + '.old'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    df.write_parquet(os.path.join(staging_dir, 'part-0.parquet'), compression=PARQUET_COMPRESSION, statistics=True)
+    if os.path.exists(target_dir):
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.rename(target_dir, old_dir)
+    os.rename(staging_dir, target_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def merge_to_parquet_dataset(csv_paths, dataset_dir, incremental=False):
+    """
+    Fusionne des CSV en dataset Parquet partitionné annee=YYYY/bimestre=N (zstd).
+    Le schéma (colonnes + dtypes) est figé dans _schema.json; seules les partitions
+    qui reçoivent des lignes sont réécrites (existant + nouveau, dédupliqué). Un type
+    incompatible est élargi au supertype sans perte et toutes les partitions sont réécrites.
+    """
+    if not csv_paths:
+        logging.warning(f"Aucun fichier CSV à fusionner pour {dataset_dir}.")
+        return
+
+    logging.info(f"🚀 Fusion Parquet partitionnée pour {dataset_dir}: {len(csv_paths)} fichiers CSV")
+    if not incremental and os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    columns = load_dataset_schema(dataset_dir)
+    schema_extended = False
+    touched = set()
+    work_dir = tempfile.mkdtemp(prefix='.dataset_', dir=os.path.dirname(dataset_dir) or '.')
+    try:
+        # 1. Lecture par batches et répartition des lignes par partition
+        for batch_start in range(0, len(csv_paths), BATCH_SIZE):
+            batch_df = process_batch_memory_safe(csv_paths[batch_start:batch_start + BATCH_SIZE],
+                                                 transform=with_partition_columns)
+            if batch_df is None or len(batch_df) == 0:
+                continue
+            new_columns = {c: ColumnMappingManager.dtype_to_name(t) for c, t in batch_df.schema.items()
+                           if c not in columns and c not in PARTITION_COLUMNS}
+            if widen_dataset_schema(columns, batch_df.schema):
+                schema_extended = True
+            if new_columns:
+                schema_extended = schema_extended or bool(columns)
+                columns.update(new_columns)
+            batch_df = conform_to_dataset_schema(batch_df, columns)
+            for part_df in batch_df.partition_by(list(PARTITION_COLUMNS)):
+                key = (part_df['annee'][0], part_df['bimestre'][0])
+                part_work_dir = partition_dir(work_dir, *key)
+                os.makedirs(part_work_dir, exist_ok=True)
+                part_df.drop(list(PARTITION_COLUMNS)).write_parquet(
+                    os.path.join(part_work_dir, f'{batch_start}.parquet'), compression='lz4')
+                touched.add(key)
+            del batch_df
+            gc.collect()
+
+        if not touched:
+            logging.warning(f"Aucune ligne à écrire pour {dataset_dir}")
+            return
+
+        # 2. Réécriture des seules partitions touchées
+        for key in sorted(touched):
+            target_dir = partition_dir(dataset_dir, *key)
+            # Fichiers de batch relus un à un, dans l'ordre des batches (types éventuellement élargis depuis)
+            part_work_dir = partition_dir(work_dir, *key)
+            batch_files = sorted(os.listdir(part_work_dir), key=lambda name: int(name.split('.')[0]))
+            frames = [conform_to_dataset_schema(read_partition_file(os.path.join(part_work_dir, name)), columns)
+                      for name in batch_files]
+            if os.path.exists(target_dir):
+                # Existant prioritaire, sauf en 'business' où les nouvelles lignes le remplacent
+                existing = conform_to_dataset_schema(read_partition(target_dir), columns)
+                frames.insert(0 if existing_rows_win() else len(frames), existing)
+            merged = pl.concat(frames, how="vertical").unique(subset=dedup_subset(list(columns)), keep='first',
+                                                               maintain_order=True)
+            _replace_partition(target_dir, merged)
+            logging.info(f"✅ Partition annee={key[0]}/bimestre={key[1]}: {len(merged)} lignes")
+            del frames, merged
+
+        # 3. Nouvelles colonnes: compléter les partitions non touchées pour garder un schéma unique
+        if schema_extended:
+            for annee, bimestre, part_path in list_partitions(dataset_dir):
+                if (annee, bimestre) not in touched:
+                    df = read_partition(part_path)
+                    _replace_partition(part_path, conform_to_dataset_schema(df, columns))
+            logging.info(f"🆕 Schéma étendu ou élargi: {len(columns)} colonnes dans {dataset_dir}")
+
+        save_dataset_schema(dataset_dir, columns)
+        logging.info(f"✅ Dataset {os.path.basename(dataset_dir)}: {len(touched)} partitions écrites")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
 # Ajouter la sauvegarde du cache à la fin du processus principal
 def finalize_column_mapping():
     """Finalise et sauvegarde le cache des mappings de colonnes."""
@@ -747,69 +1487,6 @@ def finalize_column_mapping():
     total_variants = sum(len(schema['variants']) for schema in column_manager.schemas.values())
     logging.info(f"Cache des schémas finalisé: {total_types} types de fichiers, {total_variants} variants total")
 
-# ----------------- Extraction incrémentale (inchangé) -----------------
-def extract_recursive(src_dir, dst_dir, old_hashes):
-    if os.path.exists(dst_dir):
-        shutil.rmtree(dst_dir)
-    os.makedirs(dst_dir, exist_ok=True)
-
-    new_hashes = {}
-    to_process = []
-    changed_roots = []
-
-    for fname in os.listdir(src_dir):
-        if not fname.lower().endswith('.zip'):
-            continue
-        path = os.path.join(src_dir, fname)
-        h = file_hash(path)
-        new_hashes[fname] = h
-        if old_hashes.get(fname) == h:
-            logging.info(f"Unchanged archive: {fname}")
-            continue
-        stem = os.path.splitext(fname)[0]
-        changed_roots.append(stem)
-        to_process.append((path, os.path.join(dst_dir, stem)))
-
-    if not to_process:
-        logging.warning(f"No new/modified ZIP in {src_dir}")
-
-    abs_dst = os.path.abspath(dst_dir)
-    while to_process:
-        zip_path, extract_folder = to_process.pop()
-        os.makedirs(extract_folder, exist_ok=True)
-        base = os.path.basename(zip_path)
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                logging.info(f"Extracting {base} → {extract_folder}")
-                for member in zf.infolist():
-                    target = os.path.join(extract_folder, member.filename)
-                    if member.is_dir():
-                        os.makedirs(target, exist_ok=True)
-                    elif member.filename.lower().endswith('.zip'):
-                        data = zf.read(member)
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with open(target, 'wb') as nf:
-                            nf.write(data)
-                        to_process.append((target, target[:-4]))
-                    else:
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with zf.open(member) as src, open(target, 'wb') as dst:
-                            shutil.copyfileobj(src, dst)
-        except zipfile.BadZipFile:
-            logging.error(f"Skipping bad zip: {base}")
-        except Exception as e:
-            logging.error(f"Error extracting {base}: {e}")
-        finally:
-            try:
-                # Only remove if the zip_path is INSIDE the extraction destination (nested zips)
-                if os.path.commonpath([os.path.abspath(zip_path), abs_dst]) == abs_dst:
-                    os.remove(zip_path)
-            except Exception: # os.path.commonpath can fail on Windows with different drives
-                pass
-
-
-    return new_hashes, changed_roots
-
 def extract_year(name):
     m = re.search(r"\d{4}", name)
     return m.group(0) if m else 'unknown'
@@ -824,6 +1501,7 @@ def process_data(src_root, dst_root, changed_dirs, full_rebuild=False):
 
     carte_root = os.path.join(dst_root, 'carte')
     merged_dir = os.path.join(dst_root, 'data_merged_csv')
+    parquet_root = os.path.join(dst_root, 'data_merged_parquet')
     os.makedirs(carte_root, exist_ok=True)
     os.makedirs(merged_dir, exist_ok=True)
 
@@ -874,7 +1552,7 @@ def process_data(src_root, dst_root, changed_dirs, full_rebuild=False):
                              for r, _, files in os.walk(path)
                              for f in files if f.lower().endswith('.csv')]
             national_csv = os.path.join(dst_root, 'TourismeNational.csv')
-            tasks.append((all_csv_paths, national_csv, not full_rebuild))
+            tasks.append((merge_input_order(all_csv_paths), national_csv, not full_rebuild))
             continue
 
         # Bimestres : collecter tous les fichiers pour fusion globale
@@ -904,52 +1582,33 @@ def process_data(src_root, dst_root, changed_dirs, full_rebuild=False):
             
             for csv_fname, csv_paths_list in file_map.items():
                 out_csv_file = os.path.join(merged_dir, csv_fname)
-                tasks.append((csv_paths_list, out_csv_file, not full_rebuild))
+                tasks.append((merge_input_order(csv_paths_list), out_csv_file, not full_rebuild))
 
     # Ajouter les tâches de fusion globale pour les bimestres
     for csv_fname, csv_paths_list in global_file_map.items():
         out_csv_file = os.path.join(merged_dir, csv_fname)
-        tasks.append((csv_paths_list, out_csv_file, not full_rebuild))
+        tasks.append((merge_input_order(csv_paths_list), out_csv_file, not full_rebuild))
         logging.info(f"Scheduled global merge: {csv_fname} from {len(csv_paths_list)} CSV files")
 
-    # Tri des tâches : les plus grandes d'abord pour optimiser la mémoire
-    tasks.sort(key=lambda x: len(x[0]), reverse=True)
-    
+    def merge_task(paths, out_path, inc):
+        """Fusion d'un type de fichier vers le(s) format(s) de sortie configuré(s)."""
+        if OUTPUT_FORMAT in ('csv', 'both'):
+            merge_to_csv_memory_optimized(paths, out_path, inc)
+        if OUTPUT_FORMAT in ('parquet', 'both'):
+            dataset_name = os.path.splitext(os.path.basename(out_path))[0]
+            merge_to_parquet_dataset(paths, os.path.join(parquet_root, dataset_name), inc)
+
     # Statistiques initiales
     total_files = sum(len(paths) for paths, _, _ in tasks)
     logging.info(f"🚀 Traitement optimisé mémoire: {len(tasks)} tâches, {total_files} fichiers CSV total")
     memory_start = get_memory_usage()
     logging.info(f"💾 Mémoire initiale: {memory_start:.1f}GB")
 
-    # Exécution séquentielle des tâches les plus lourdes pour éviter la surcharge mémoire
-    heavy_tasks = [task for task in tasks if len(task[0]) >= BATCH_SIZE * 2]  # Tâches > 40 fichiers
-    light_tasks = [task for task in tasks if len(task[0]) < BATCH_SIZE * 2]   # Tâches < 40 fichiers
-    
-    # Traiter d'abord les tâches lourdes en séquentiel
-    if heavy_tasks:
-        logging.info(f"⚡ Traitement séquentiel des {len(heavy_tasks)} tâches lourdes")
-        for i, (paths, out_path, inc) in enumerate(heavy_tasks, 1):
-            logging.info(f"📂 Tâche lourde {i}/{len(heavy_tasks)}: {len(paths)} fichiers → {os.path.basename(out_path)}")
-            try:
-                merge_to_csv_memory_optimized(paths, out_path, inc)
-            except Exception as e:
-                logging.error(f"❌ Erreur tâche lourde {out_path}: {e}", exc_info=True)
-
-    # Traiter les tâches légères en parallèle (avec moins de workers)
-    if light_tasks:
-        logging.info(f"⚡ Traitement parallèle des {len(light_tasks)} tâches légères")
-        max_workers = max(1, optimize_workers_for_memory() // 2)  # Réduire le parallélisme
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(merge_to_csv_memory_optimized, paths, out_path, inc)
-                       for paths, out_path, inc in light_tasks]
-            
-            for i, future in enumerate(as_completed(futures), 1):
-                try:
-                    future.result()
-                    logging.info(f"✅ Tâche légère {i}/{len(light_tasks)} terminée")
-                except Exception as e:
-                    logging.error(f"❌ Erreur tâche légère: {e}", exc_info=True)
+    # Ordonnancement sous budget mémoire: estimation par octets d'entrée et historique par type
+    scheduler = MemoryBudgetScheduler(MERGE_MEMORY_BUDGET_GB * 1024 ** 3, MEMORY_STATS_FILE,
+                                      MERGE_MAX_CONCURRENT_TASKS)
+    scheduler.run([(os.path.splitext(os.path.basename(out_path))[0], input_bytes(paths), (paths, out_path, inc))
+                   for paths, out_path, inc in tasks], merge_task)
     
     # Statistiques finales
     memory_end = get_memory_usage()
@@ -965,14 +1624,12 @@ if __name__ == '__main__':
         state = load_state()
         old_hashes = state.get('hashes', {})
         history    = state.get('history', {})
+        file_meta  = state.setdefault('files', {})
+        extracted  = state.setdefault('extracted', {})
 
-        # L'extraction produit toujours des CSV et autres fichiers bruts
-        new_hashes, changed_roots = extract_recursive(DATA_ZIP_DIR, TMP_EXTRACTED, old_hashes)
-        
-        # Remplacer l'ancien répertoire extrait par le nouveau temporaire
-        if os.path.exists(DATA_EXTRACTED):
-            shutil.rmtree(DATA_EXTRACTED)
-        os.rename(TMP_EXTRACTED, DATA_EXTRACTED)
+        # Extraction incrémentale: seuls les sous-dossiers des archives modifiées sont remplacés
+        new_hashes, changed_roots = extract_recursive(DATA_ZIP_DIR, DATA_EXTRACTED, old_hashes, file_meta,
+                                                      extracted=extracted)
         logging.info('Extraction completed')
 
         removed_archives = set(old_hashes) - set(new_hashes)
@@ -1018,4 +1675,5 @@ if __name__ == '__main__':
         logging.error(f"An error occurred in the main execution block: {e}", exc_info=True)
     finally:
         release_lock(lock)
+        shutdown_parse_pool()
         finalize_column_mapping()  # Sauvegarder le cache des schémas
\ No newline at end of file
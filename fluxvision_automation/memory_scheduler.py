@@ -0,0 +1,165 @@
+# Ordonnancement des tâches de fusion sous budget mémoire
+# - Pic mémoire estimé d'une tâche = coût fixe + octets d'entrée × ratio observé pour ce type de fichier
+# - Les tâches sont lancées en parallèle tant que la somme des estimations tient dans le budget RSS
+# - Les pics observés (processus principal + workers) sont enregistrés dans un JSON
+#   à côté du cache des schémas et affinent les estimations des exécutions suivantes
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_RATIO = 4.0                  # Pic mémoire / octets CSV en entrée, sans historique
+TASK_BASE_MEMORY_BYTES = 128 * 1024 * 1024  # Coût fixe d'une tâche (hors volume des données)
+MIN_OBSERVED_INPUT_BYTES = 16 * 1024 * 1024  # En dessous, le coût fixe domine: pas d'apprentissage du ratio
+RATIO_SMOOTHING = 0.5                       # Poids de la dernière observation (moyenne exponentielle)
+SAMPLE_INTERVAL_S = 0.25                    # Période d'échantillonnage du RSS
+
+def total_rss():
+    """RSS du processus courant et de ses processus enfants (pool de lecture), en octets"""
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+class MemoryStats:
+    """Historique des ratios pic mémoire / octets d'entrée, par type de fichier fusionné"""
+
+    def __init__(self, stats_file):
+        self.stats_file = stats_file
+        self.ratios = {}
+        self._lock = threading.Lock()
+        if os.path.exists(stats_file):
+            try:
+                with open(stats_file, 'r', encoding='utf-8') as f:
+                    self.ratios = json.load(f)
+            except Exception as e:
+                logger.warning(f"Historique mémoire illisible {stats_file}: {e}")
+
+    def estimate(self, key, input_bytes):
+        entry = self.ratios.get(key)
+        ratio = entry['ratio'] if entry else DEFAULT_MEMORY_RATIO
+        return TASK_BASE_MEMORY_BYTES + int(input_bytes * ratio)
+
+    def observe(self, key, input_bytes, peak_bytes):
+        if input_bytes < MIN_OBSERVED_INPUT_BYTES:
+            return
+        observed = max(0, peak_bytes - TASK_BASE_MEMORY_BYTES) / input_bytes
+        with self._lock:
+            entry = self.ratios.get(key)
+            ratio = observed if entry is None else (1 - RATIO_SMOOTHING) * entry['ratio'] + RATIO_SMOOTHING * observed
+            self.ratios[key] = {'ratio': round(ratio, 3), 'last_input_bytes': input_bytes,
+                                'last_peak_bytes': peak_bytes, 'runs': (entry or {}).get('runs', 0) + 1}
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.stats_file) or '.', exist_ok=True)
+            with open(self.stats_file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.ratios, f, indent=2, ensure_ascii=False)
+            os.replace(self.stats_file + '.tmp', self.stats_file)
+
+class _PeakMonitor(threading.Thread):
+    """Échantillonne le RSS total et conserve le pic atteint pendant chaque tâche active"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self._active = {}  # id tâche -> [rss de départ, pic]
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def begin(self, task_id):
+        rss = total_rss()
+        with self._lock:
+            self._active[task_id] = [rss, rss]
+
+    def end(self, task_id):
+        rss = total_rss()
+        with self._lock:
+            start, peak = self._active.pop(task_id)
+        # Les tâches concurrentes sont comptées dans l'accroissement: estimation prudente
+        return max(peak, rss) - start
+
+    def run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL_S):
+            rss = total_rss()
+            with self._lock:
+                for values in self._active.values():
+                    values[1] = max(values[1], rss)
+
+    def stop(self):
+        self._stop_event.set()
+
+class MemoryBudgetScheduler:
+    """
+    Exécute des tâches (clé, octets d'entrée, args) en parallèle sous un budget mémoire.
+    Les plus grosses estimations passent d'abord; une tâche qui dépasse à elle seule
+    le budget s'exécute seule.
+    """
+
+    def __init__(self, budget_bytes, stats_file, max_workers):
+        self.budget_bytes = budget_bytes
+        self.max_workers = max(1, max_workers)
+        self.stats = MemoryStats(stats_file)
+
+    def run(self, tasks, func):
+        pending = sorted(((self.stats.estimate(key, nbytes), key, nbytes, args) for key, nbytes, args in tasks),
+                         key=lambda t: t[0], reverse=True)
+        logger.info(f"🧮 Ordonnancement mémoire: {len(pending)} tâches, budget {self.budget_bytes / 1024**3:.1f}GB, "
+                    f"estimation totale {sum(t[0] for t in pending) / 1024**3:.1f}GB")
+        monitor = _PeakMonitor()
+        monitor.start()
+        running = {}  # future -> (estimation, clé, octets, début)
+        completed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while pending or running:
+                    # Remplir le budget: plus grosse tâche qui tient, ou une tâche seule si rien ne tourne
+                    reserved = sum(r[0] for r in running.values())
+                    while pending and len(running) < self.max_workers:
+                        fit = next((t for t in pending if reserved + t[0] <= self.budget_bytes), None)
+                        if fit is None and not running:
+                            fit = pending[0]
+                        if fit is None:
+                            break
+                        pending.remove(fit)
+                        estimate, key, nbytes, args = fit
+                        future = executor.submit(self._run_task, monitor, func, key, nbytes, args)
+                        running[future] = (estimate, key, nbytes, time.time())
+                        reserved += estimate
+                        logger.info(f"▶️  {key}: {nbytes / 1024**2:.0f}MB en entrée, ~{estimate / 1024**3:.2f}GB estimés "
+                                    f"({len(running)} en cours, {reserved / 1024**3:.2f}GB réservés)")
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        estimate, key, nbytes, started = running.pop(future)
+                        completed += 1
+                        try:
+                            peak = future.result()
+                            logger.info(f"✅ Tâche {completed}/{completed + len(running) + len(pending)} {key} "
+                                        f"terminée en {time.time() - started:.1f}s (pic ~{peak / 1024**3:.2f}GB, "
+                                        f"estimé {estimate / 1024**3:.2f}GB)")
+                        except Exception as e:
+                            logger.error(f"❌ Erreur tâche {key}: {e}", exc_info=True)
+        finally:
+            monitor.stop()
+            self.stats.save()
+
+    def _run_task(self, monitor, func, key, nbytes, args):
+        task_id = object()
+        monitor.begin(task_id)
+        try:
+            func(*args)
+        finally:
+            peak = monitor.end(task_id)
+        self.stats.observe(key, nbytes, peak)
+        return peak
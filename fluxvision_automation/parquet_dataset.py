@@ -0,0 +1,116 @@
+# Datasets Parquet partitionnés (style Hive) des fichiers fusionnés
+# Disposition: <racine>/<Type>/annee=YYYY/bimestre=N/part-0.parquet (compression zstd)
+# - _schema.json à la racine de chaque dataset: colonnes et dtypes figés (schéma stable)
+# - scan_dataset: lecture paresseuse avec élagage des partitions (annee / bimestre)
+# - Types élargis sans perte (widen_dtype, cast_lossless) quand une lecture ne correspond pas au schéma
+# Les lignes sans date exploitable sont rangées sous annee=0 / bimestre=0.
+
+import os
+import json
+
+import polars as pl
+
+DATASET_SCHEMA_FILE = '_schema.json'
+PARTITION_COLUMNS = ('annee', 'bimestre')
+PARQUET_COMPRESSION = 'zstd'
+UNKNOWN_PARTITION = 0
+
+def partition_dir(dataset_dir, annee, bimestre):
+    """Dossier d'une partition annee=YYYY/bimestre=N"""
+    return os.path.join(dataset_dir, f'annee={annee}', f'bimestre={bimestre}')
+
+def list_partitions(dataset_dir):
+    """Partitions existantes d'un dataset: [(annee, bimestre, dossier)]"""
+    partitions = []
+    if not os.path.isdir(dataset_dir):
+        return partitions
+    for year_entry in os.scandir(dataset_dir):
+        if not (year_entry.is_dir() and year_entry.name.startswith('annee=')):
+            continue
+        for bim_entry in os.scandir(year_entry.path):
+            if bim_entry.is_dir() and bim_entry.name.startswith('bimestre='):
+                partitions.append((int(year_entry.name.split('=', 1)[1]),
+                                   int(bim_entry.name.split('=', 1)[1]), bim_entry.path))
+    return sorted(partitions)
+
+def read_partition_file(path):
+    """
+    Lit un fichier de partition sans colonnes annee / bimestre: ouvert par descripteur,
+    car Polars déduit les colonnes Hive d'un chemin annee=.../bimestre=... même avec
+    hive_partitioning=False (elles seraient sinon réécrites dans le fichier).
+    """
+    with open(path, 'rb') as f:
+        return pl.read_parquet(f)
+
+def read_partition(part_path):
+    """Contenu d'une partition (tous ses fichiers Parquet, sans colonnes de partition)"""
+    files = sorted(name for name in os.listdir(part_path) if name.endswith('.parquet'))
+    return pl.concat([read_partition_file(os.path.join(part_path, name)) for name in files], how='vertical')
+
+def bimestre_of_month(month_expr):
+    """Numéro de bimestre (1..6) à partir d'une expression mois (1..12)"""
+    return ((month_expr - 1) // 2 + 1).cast(pl.Int32)
+
+def load_dataset_schema(dataset_dir):
+    """Schéma figé du dataset {colonne: nom de dtype}, {} si nouveau"""
+    schema_file = os.path.join(dataset_dir, DATASET_SCHEMA_FILE)
+    if not os.path.exists(schema_file):
+        return {}
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get('columns', {})
+
+def save_dataset_schema(dataset_dir, columns):
+    """Enregistre le schéma figé (écriture atomique)"""
+    os.makedirs(dataset_dir, exist_ok=True)
+    schema_file = os.path.join(dataset_dir, DATASET_SCHEMA_FILE)
+    with open(schema_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'columns': columns, 'partitioning': list(PARTITION_COLUMNS),
+                   'compression': PARQUET_COMPRESSION}, f, indent=2, ensure_ascii=False)
+    os.replace(schema_file + '.tmp', schema_file)
+
+def polars_schema(columns):
+    """Dtypes Polars à partir des noms enregistrés dans _schema.json"""
+    return {col: getattr(pl, name, pl.Utf8) for col, name in columns.items()}
+
+def widen_dtype(current, incoming):
+    """
+    Type commun sans perte entre le type figé d'une colonne et celui d'une nouvelle lecture:
+    supertype si les deux sont numériques (Int64 + Float64 -> Float64), texte sinon.
+    """
+    if incoming == current or incoming == pl.Null:
+        return current
+    if current == pl.Null:
+        return incoming
+    if current.is_numeric() and incoming.is_numeric():
+        return pl.concat([pl.DataFrame(schema={'v': current}), pl.DataFrame(schema={'v': incoming})],
+                         how='vertical_relaxed').schema['v']
+    return pl.Utf8
+
+def cast_lossless(df, dtypes):
+    """
+    Convertit les colonnes de df présentes dans dtypes {colonne: dtype Polars}.
+    ValueError si une valeur serait perdue (null ou modifiée par l'aller-retour),
+    ex: 12.5 vers Int64: un cast Polars, même strict, tronquerait silencieusement.
+    """
+    casts = []
+    for col, dtype in dtypes.items():
+        if col not in df.columns or df.schema[col] == dtype:
+            continue
+        source = df[col]
+        converted = source.cast(dtype, strict=False)
+        if source.dtype != pl.Null and not converted.cast(source.dtype, strict=False).eq_missing(source).all():
+            raise ValueError(f"Colonne {col}: conversion {source.dtype} -> {dtype} avec perte de valeurs")
+        casts.append(converted)
+    return df.with_columns(casts) if casts else df
+
+def scan_dataset(dataset_dir, annees=None, bimestres=None):
+    """
+    LazyFrame sur un dataset partitionné. Les filtres annee / bimestre portent sur
+    les colonnes de partition: seuls les fichiers des partitions retenues sont lus.
+    """
+    lf = pl.scan_parquet(os.path.join(dataset_dir, '*', '*', '*.parquet'), hive_partitioning=True)
+    if annees is not None:
+        lf = lf.filter(pl.col('annee').is_in(list(annees)))
+    if bimestres is not None:
+        lf = lf.filter(pl.col('bimestre').is_in(list(bimestres)))
+    return lf
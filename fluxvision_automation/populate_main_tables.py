@@ -2,16 +2,19 @@
 """
 Script pour alimenter les tables principales de FluxVision
 avec les données du dossier data_clean/data_merged_csv
+(ou des datasets Parquet partitionnés de data_clean/data_merged_parquet s'ils existent)
 """
 
 import os
 import sys
 import logging
 import argparse
-import polars as pl
 import mysql.connector
 from datetime import datetime
 from pathlib import Path
+import polars as pl
+from staging_cache import load_staged
+from parquet_dataset import PARTITION_COLUMNS, scan_dataset
 
 # Configuration du logging
 logging.basicConfig(
@@ -95,23 +98,45 @@ def clear_today_records(cursor, table_mappings):
         except Exception as e:
             logging.warning(f"Erreur suppression {table_name}: {e}")
 
-def populate_dim_dates(cursor, csv_files, data_dir):
+def load_merged(csv_file, data_dir, parquet_dir=None, annees=None, columns=None):
+    """
+    Fichier fusionné d'un type: dataset Parquet partitionné si disponible (seules les
+    partitions des années demandées sont lues), sinon CSV via le staging.
+    Retourne None si aucune des deux sources n'existe.
+    """
+    dataset_dir = parquet_dir / Path(csv_file).stem if parquet_dir is not None else None
+    if dataset_dir is not None and dataset_dir.is_dir():
+        lf = scan_dataset(str(dataset_dir), annees=annees)
+        if columns is not None:
+            lf = lf.select([c for c in lf.columns if c in columns])
+        df = lf.collect()
+        df = df.drop([c for c in PARTITION_COLUMNS if c in df.columns and (columns is None or c not in columns)])
+        if df.schema.get('Date') == pl.Date:
+            # Même représentation que la lecture CSV (texte YYYY-MM-DD)
+            df = df.with_columns(pl.col('Date').dt.strftime('%Y-%m-%d'))
+        return df
+
+    file_path = data_dir / csv_file
+    if not file_path.exists():
+        return None
+    return load_staged(file_path, columns=columns)
+
+def populate_dim_dates(cursor, csv_files, data_dir, parquet_dir=None, annees=None):
     """Alimente dim_dates avec les nouvelles dates des fichiers CSV"""
     logging.info("=== ALIMENTATION DIM_DATES AVEC NOUVELLES DATES ===")
     
     all_dates = set()
     
     for csv_file in csv_files:
-        file_path = data_dir / csv_file
-        if file_path.exists():
-            try:
-                df = pl.read_csv(file_path)
-                if 'Date' in df.columns:
-                    dates = df['Date'].unique().to_list()
-                    all_dates.update(dates)
-                    logging.info(f"Dates collectées de {csv_file}: {len(dates)} dates uniques")
-            except Exception as e:
-                logging.warning(f"Erreur lecture {csv_file}: {e}")
+        try:
+            # Seule la colonne Date est lue (staging ou dataset Parquet)
+            df = load_merged(csv_file, data_dir, parquet_dir, annees, columns={'Date'})
+            if df is not None and 'Date' in df.columns:
+                dates = df['Date'].unique().to_list()
+                all_dates.update(dates)
+                logging.info(f"Dates collectées de {csv_file}: {len(dates)} dates uniques")
+        except Exception as e:
+            logging.warning(f"Erreur lecture {csv_file}: {e}")
     
     logging.info(f"Total dates uniques collectées: {len(all_dates)}")
     
@@ -155,16 +180,13 @@ def populate_dim_dates(cursor, csv_files, data_dir):
     else:
         logging.info("Aucune nouvelle date à insérer")
 
-def process_csv_file(cursor, mappings, csv_file, data_dir, table_name, batch_size=5000):
+def process_csv_file(cursor, mappings, csv_file, data_dir, table_name, batch_size=5000, parquet_dir=None, annees=None):
     """Traite un fichier CSV et l'insère dans la table correspondante"""
-    file_path = data_dir / csv_file
-    
-    if not file_path.exists():
-        logging.warning(f"Fichier {csv_file} non trouvé")
-        return 0
-    
     try:
-        df = pl.read_csv(file_path)
+        df = load_merged(csv_file, data_dir, parquet_dir, annees)
+        if df is None:
+            logging.warning(f"Fichier {csv_file} non trouvé")
+            return 0
         total_rows = len(df)
         logging.info(f"Fichier {csv_file} chargé: {total_rows} lignes, {len(df.columns)} colonnes")
         
@@ -268,6 +290,9 @@ def main():
     parser.add_argument('--database', default='fluxvision', help='Nom de la base de données')
     parser.add_argument('--batch-size', type=int, default=5000, help='Taille des batches')
     parser.add_argument('--data-dir', default='data/data_clean/data_merged_csv', help='Répertoire des fichiers CSV')
+    parser.add_argument('--parquet-dir', default='data/data_clean/data_merged_parquet',
+                        help='Répertoire des datasets Parquet partitionnés (prioritaires sur les CSV)')
+    parser.add_argument('--annees', type=int, nargs='+', help='Années à charger (datasets Parquet uniquement)')
     parser.add_argument('--clear-today', action='store_true', help='Supprimer les enregistrements d\'aujourd\'hui avant insertion')
     
     args = parser.parse_args()
@@ -284,6 +309,7 @@ def main():
         
         start_time = datetime.now()
         data_dir = Path(args.data_dir)
+        parquet_dir = Path(args.parquet_dir)
         
         # Fichiers CSV à traiter
         csv_files = [
@@ -319,7 +345,7 @@ def main():
             connection.commit()
         
         # Alimenter dim_dates avec nouvelles dates
-        populate_dim_dates(cursor, csv_files, data_dir)
+        populate_dim_dates(cursor, csv_files, data_dir, parquet_dir, args.annees)
         connection.commit()
         
         # Récupérer les mappings des dimensions
@@ -334,7 +360,8 @@ def main():
                 table_name = table_mappings[csv_file]
                 logging.info(f"Alimentation {table_name} depuis {csv_file}...")
                 
-                inserted = process_csv_file(cursor, mappings, csv_file, data_dir, table_name, args.batch_size)
+                inserted = process_csv_file(cursor, mappings, csv_file, data_dir, table_name, args.batch_size,
+                                            parquet_dir, args.annees)
                 total_inserted += inserted
                 connection.commit()
         
@@ -12,6 +12,8 @@ from pathlib import Path
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from zip_extraction import extract_recursive
+
 # Configuration
 DATA_ZIP_DIR   = 'downloads'
 DATA_EXTRACTED = 'data/data_extracted'
@@ -95,13 +97,6 @@ def save_state(state):
         json.dump(state, f, indent=2)
 
 # ----------------- Utils -----------------
-def file_hash(path):
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
-
 def detect_delimiter(path):
     with open(path, 'r', newline='', encoding='utf-8', errors='ignore') as f:
         sample = f.read(2048)
@@ -182,69 +177,6 @@ def merge_to_csv(csv_paths, out_csv_path, incremental=False):
     except Exception as e:
         logging.error(f"Erreur lors de l'écriture CSV vers {out_csv_path}: {e}")
 
-# ----------------- Extraction incrémentale -----------------
-def extract_recursive(src_dir, dst_dir, old_hashes):
-    if os.path.exists(dst_dir):
-        shutil.rmtree(dst_dir)
-    os.makedirs(dst_dir, exist_ok=True)
-
-    new_hashes = {}
-    to_process = []
-    changed_roots = []
-
-    # Recherche récursive des fichiers ZIP
-    for root, _, files in os.walk(src_dir):
-        for fname in files:
-        if not fname.lower().endswith('.zip'):
-            continue
-            path = os.path.join(root, fname)
-        h = file_hash(path)
-        new_hashes[fname] = h
-        if old_hashes.get(fname) == h:
-            logging.info(f"Unchanged archive: {fname}")
-            continue
-        stem = os.path.splitext(fname)[0]
-        changed_roots.append(stem)
-        to_process.append((path, os.path.join(dst_dir, stem)))
-
-    if not to_process:
-        logging.warning(f"No new/modified ZIP in {src_dir} or its subdirectories")
-
-    abs_dst = os.path.abspath(dst_dir)
-    while to_process:
-        zip_path, extract_folder = to_process.pop()
-        os.makedirs(extract_folder, exist_ok=True)
-        base = os.path.basename(zip_path)
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                logging.info(f"Extracting {base} → {extract_folder}")
-                for member in zf.infolist():
-                    target = os.path.join(extract_folder, member.filename)
-                    if member.is_dir():
-                        os.makedirs(target, exist_ok=True)
-                    elif member.filename.lower().endswith('.zip'):
-                        data = zf.read(member)
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with open(target, 'wb') as nf:
-                            nf.write(data)
-                        to_process.append((target, target[:-4]))
-                    else:
-                        os.makedirs(os.path.dirname(target), exist_ok=True)
-                        with zf.open(member) as src, open(target, 'wb') as dst:
-                            shutil.copyfileobj(src, dst)
-        except zipfile.BadZipFile:
-            logging.error(f"Skipping bad zip: {base}")
-        except Exception as e:
-            logging.error(f"Error extracting {base}: {e}")
-        finally:
-            try:
-                if os.path.commonpath([os.path.abspath(zip_path), abs_dst]) == abs_dst:
-                    os.remove(zip_path)
-            except Exception:
-                pass
-
-    return new_hashes, changed_roots
-
 def extract_year(name):
     m = re.search(r"\d{4}", name)
     return m.group(0) if m else 'unknown'
@@ -367,17 +299,17 @@ if __name__ == '__main__':
         state = load_state()
         old_hashes = state.get('hashes', {})
         history = state.get('history', {})
+        file_meta = state.setdefault('files', {})
+        extracted = state.setdefault('extracted', {})
 
         # Vérifier si le dossier downloads existe
         if not os.path.exists(DATA_ZIP_DIR):
             os.makedirs(DATA_ZIP_DIR)
             logging.info(f"Dossier {DATA_ZIP_DIR} créé")
 
-        new_hashes, changed_roots = extract_recursive(DATA_ZIP_DIR, TMP_EXTRACTED, old_hashes)
-        
-        if os.path.exists(DATA_EXTRACTED):
-            shutil.rmtree(DATA_EXTRACTED)
-        os.rename(TMP_EXTRACTED, DATA_EXTRACTED)
+        # Extraction incrémentale: seuls les sous-dossiers des archives modifiées sont remplacés
+        new_hashes, changed_roots = extract_recursive(DATA_ZIP_DIR, DATA_EXTRACTED, old_hashes, file_meta, walk=True,
+                                                      extracted=extracted)
         logging.info('Extraction completed')
 
         removed_archives = set(old_hashes) - set(new_hashes)
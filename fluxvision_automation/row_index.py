@@ -0,0 +1,104 @@
+# Index persistant des lignes d'une sortie fusionnée (fusion incrémentale en ajout seul)
+# - <sortie>.rowidx.parquet : hash 64 bits trié de chaque ligne (colonne UInt64 unique)
+# - <sortie>.rowidx.json    : colonnes, colonnes de clé hachées, version Polars, taille/mtime de la sortie indexée
+# Les hash sont calculés sur les colonnes de clé (toutes par défaut) converties en texte;
+# l'index est invalidé si la sortie a été réécrite ou si la version de Polars change
+# (hash_rows n'est pas stable d'une version à l'autre).
+
+import os
+import json
+from datetime import datetime, timezone
+
+import polars as pl
+
+ROW_INDEX_SUFFIX = '.rowidx'
+HASH_COL = 'row_hash'
+INDEX_READ_BATCH_ROWS = 200_000  # Lignes lues par lot lors de la reconstruction depuis un CSV
+
+def index_paths(out_path):
+    """Chemins (index Parquet, métadonnées JSON) associés à une sortie fusionnée"""
+    base = out_path + ROW_INDEX_SUFFIX
+    return base + '.parquet', base + '.json'
+
+def as_text(df, columns):
+    """Projette df sur columns (colonnes absentes à null) avec toutes les valeurs en texte"""
+    return df.select([
+        pl.col(c).cast(pl.Utf8) if c in df.columns else pl.lit(None, dtype=pl.Utf8).alias(c)
+        for c in columns
+    ])
+
+def row_hashes(df, columns):
+    """Hash 64 bits de chaque ligne, sur la représentation texte de columns"""
+    return as_text(df, columns).hash_rows().alias(HASH_COL)
+
+def load_row_index(out_path):
+    """
+    Charge l'index d'une sortie: (hash triés, métadonnées), ou None si absent
+    ou obsolète (sortie réécrite depuis, autre version de Polars).
+    """
+    idx_file, meta_file = index_paths(out_path)
+    if not (os.path.exists(idx_file) and os.path.exists(meta_file) and os.path.exists(out_path)):
+        return None
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        st = os.stat(out_path)
+        if (meta.get('polars_version') != pl.__version__
+                or meta.get('output_size') != st.st_size
+                or meta.get('output_mtime_ns') != st.st_mtime_ns):
+            return None
+        hashes = pl.read_parquet(idx_file)[HASH_COL]
+    except Exception:
+        return None
+    return hashes, meta
+
+def save_row_index(out_path, hashes, columns, key_columns=None):
+    """Enregistre l'index (hash triés, dédupliqués) de la sortie telle qu'elle est sur disque"""
+    idx_file, meta_file = index_paths(out_path)
+    hashes = hashes.unique().sort()
+    pl.DataFrame({HASH_COL: hashes}).write_parquet(idx_file + '.tmp', compression='zstd')
+    os.replace(idx_file + '.tmp', idx_file)
+
+    st = os.stat(out_path)
+    meta = {
+        'columns': list(columns),
+        'key_columns': list(key_columns or columns),
+        'rows': len(hashes),
+        'polars_version': pl.__version__,
+        'output_size': st.st_size,
+        'output_mtime_ns': st.st_mtime_ns,
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    }
+    with open(meta_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_file + '.tmp', meta_file)
+    return hashes, meta
+
+def drop_row_index(out_path):
+    """Supprime l'index d'une sortie (réécriture complète hors fusion indexée)"""
+    for path in index_paths(out_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+def build_row_index_from_csv(out_csv_path, separator=';', key_columns=None):
+    """Reconstruit l'index d'un CSV fusionné existant en le lisant par lots (une seule fois)"""
+    reader = pl.read_csv_batched(out_csv_path, separator=separator, infer_schema_length=0,
+                                 batch_size=INDEX_READ_BATCH_ROWS)
+    columns = None
+    parts = []
+    while True:
+        batches = reader.next_batches(1)
+        if not batches:
+            break
+        columns = columns or batches[0].columns
+        parts.append(row_hashes(batches[0], key_columns or columns))
+    if columns is None:
+        return None
+    return save_row_index(out_csv_path, pl.concat(parts), columns, key_columns)
+
+def build_row_index_from_parquet(out_parquet_path, key_columns=None):
+    """Reconstruit l'index d'un Parquet fusionné existant (une seule fois)"""
+    df = pl.read_parquet(out_parquet_path)
+    if len(df.columns) == 0:
+        return None
+    return save_row_index(out_parquet_path, row_hashes(df, key_columns or df.columns), df.columns, key_columns)
@@ -0,0 +1,238 @@
+# Cache de staging colonnaire partagé par les chargeurs (MySQL, API, création de base)
+# - Chaque CSV source est parsé une seule fois puis stocké en Parquet (zstd) sous
+#   <STAGING_DIR>/<sha256 du CSV>-<signature des options de lecture>.parquet
+# - Les colonnes texte reçoivent une version normalisée <col>_norm (trim, espaces
+#   compactés, majuscules, vide -> null), calculée une fois au staging
+# - La clé dépend du contenu et non du chemin: un CSV déplacé, renommé ou relu
+#   depuis un ZIP réutilise le même staging
+# - _sources.json mémorise le SHA-256 des CSV extraits (taille + mtime inchangés => pas de re-hash)
+# - Écritures via fichiers temporaires uniques (mkstemp): plusieurs processus peuvent stager en parallèle
+# - Purge (prune_staging, une fois par processus): stagings dont l'empreinte n'est plus référencée par
+#   _sources.json et non relus depuis STAGING_RETENTION_DAYS, temporaires orphelins
+# Relancer un chargement (après une correction côté base) relit le Parquet sans reparser.
+# FV_STAGING=0 désactive le cache (lecture CSV directe).
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+import polars as pl
+
+from file_state import trusted_file_hash
+from zip_reader import ZipMember
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = os.environ.get('FV_STAGING_DIR', str(Path(__file__).resolve().parent / 'data' / 'staging'))
+STAGING_ENABLED = os.environ.get('FV_STAGING', '1') != '0'
+STAGING_COMPRESSION = 'zstd'
+STAGING_FORMAT_VERSION = 1          # À incrémenter si le contenu stocké change (normalisation...)
+SOURCES_INDEX_FILE = '_sources.json'
+NORM_SUFFIX = '_norm'
+NORMALIZE_EXCLUDED = {'Date'}       # Colonnes texte sans version normalisée
+UNKEYED_READ_OPTIONS = {'low_memory', 'rechunk'}  # Options sans effet sur le contenu lu
+STAGING_RETENTION_DAYS = float(os.environ.get('FV_STAGING_RETENTION_DAYS', '7'))  # < 0: pas de purge
+STALE_TMP_SECONDS = 3600            # Temporaire plus ancien: écriture interrompue
+
+_sources_lock = threading.Lock()
+_pruned = False
+
+def normalize_expr(col):
+    """Normalisation vectorisée d'une colonne texte (équivalent de normalize_str_light sans accents)"""
+    norm = (
+        pl.col(col)
+        .cast(pl.Utf8, strict=False)
+        .str.strip_chars()
+        .str.replace_all(r"\s+", " ")
+        .str.to_uppercase()
+    )
+    return pl.when(norm == "").then(None).otherwise(norm)
+
+def norm_column(col):
+    """Nom de la colonne normalisée associée à col"""
+    return col + NORM_SUFFIX
+
+def add_normalized_columns(frame):
+    """Ajoute <col>_norm pour chaque colonne texte (hors NORMALIZE_EXCLUDED), DataFrame ou LazyFrame"""
+    schema = frame.schema
+    exprs = [
+        normalize_expr(col).alias(norm_column(col))
+        for col, dtype in schema.items()
+        if dtype == pl.Utf8 and col not in NORMALIZE_EXCLUDED
+        and not col.endswith(NORM_SUFFIX) and norm_column(col) not in schema
+    ]
+    return frame.with_columns(exprs) if exprs else frame
+
+def _options_signature(read_options):
+    keyed = {k: v for k, v in read_options.items() if k not in UNKEYED_READ_OPTIONS}
+    payload = json.dumps({'v': STAGING_FORMAT_VERSION, 'options': keyed}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+def _load_sources_index():
+    index_file = os.path.join(STAGING_DIR, SOURCES_INDEX_FILE)
+    if os.path.exists(index_file):
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+def _staging_tmp(suffix):
+    """Fichier temporaire propre à l'écrivain dans STAGING_DIR (renommé ensuite par os.replace)"""
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.', suffix=suffix + '.tmp', dir=STAGING_DIR)
+    os.close(fd)
+    return tmp_path
+
+def _replace_from_tmp(write, path):
+    """write(chemin temporaire) puis renommage atomique vers path; temporaire supprimé en cas d'échec"""
+    tmp_path = _staging_tmp(os.path.splitext(path)[1])
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _save_sources_index(index):
+    index_file = os.path.join(STAGING_DIR, SOURCES_INDEX_FILE)
+
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+    _replace_from_tmp(write, index_file)
+
+def prune_staging(retention_days=STAGING_RETENTION_DAYS):
+    """
+    Purge du staging: entrées de _sources.json dont le CSV a disparu, stagings
+    (toutes variantes d'options, ex: n_rows du mode test) dont l'empreinte n'est plus
+    référencée et non relus depuis retention_days, temporaires orphelins.
+    Les stagings de membres ZIP ne sont pas indexés: seule leur ancienneté compte.
+    Retourne le nombre de fichiers supprimés.
+    """
+    if retention_days < 0 or not os.path.isdir(STAGING_DIR):
+        return 0
+    with _sources_lock:
+        index = _load_sources_index()
+        live = {path: entry for path, entry in index.items() if os.path.exists(path)}
+        if len(live) != len(index):
+            _save_sources_index(live)
+    referenced = {entry.get('sha256') for entry in live.values()}
+
+    now = time.time()
+    removed = 0
+    for entry in os.scandir(STAGING_DIR):
+        if not entry.is_file() or entry.name == SOURCES_INDEX_FILE:
+            continue
+        try:
+            age = now - entry.stat().st_mtime
+            if entry.name.endswith('.tmp'):
+                stale = age > STALE_TMP_SECONDS
+            else:
+                stale = (entry.name.endswith('.parquet') and entry.name.split('-', 1)[0] not in referenced
+                         and age > retention_days * 86400)
+            if stale:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"Staging: {removed} fichier(s) obsolète(s) supprimé(s)")
+    return removed
+
+def source_digest(source):
+    """
+    SHA-256 d'une source CSV: (empreinte, octets déjà lus ou None).
+    Pour un membre ZIP, les octets sont renvoyés pour éviter une seconde décompression.
+    """
+    if isinstance(source, ZipMember):
+        data = source.read_bytes()
+        return hashlib.sha256(data).hexdigest(), data
+    path = str(Path(source).resolve())
+    with _sources_lock:
+        index = _load_sources_index()
+        before = dict(index.get(path) or {})
+        digest = trusted_file_hash(path, index, key=path)
+        if index.get(path) != before:
+            _save_sources_index(index)
+    return digest, None
+
+def staged_path(digest, read_options):
+    """Fichier Parquet de staging d'une source (empreinte + options de lecture)"""
+    return os.path.join(STAGING_DIR, f"{digest}-{_options_signature(read_options)}.parquet")
+
+def _projection(columns, available):
+    """Colonnes demandées présentes dans le staging, avec leurs versions normalisées"""
+    wanted = [c for c in available if c in columns]
+    wanted += [norm_column(c) for c in wanted if norm_column(c) in available]
+    return wanted
+
+def ensure_staged(source, **read_options):
+    """
+    Garantit l'existence du staging d'une source: (chemin, None) s'il existait déjà,
+    (chemin, DataFrame parsé) s'il vient d'être créé, (None, DataFrame) si l'écriture a échoué.
+    """
+    global _pruned
+    if not _pruned:
+        _pruned = True
+        prune_staging()
+
+    digest, data = source_digest(source)
+    path = staged_path(digest, read_options)
+    if os.path.exists(path):
+        try:
+            os.utime(path)  # Dernière relecture: protège de la purge
+        except OSError:
+            pass
+        return path, None
+
+    if data is None:
+        # CSV sur disque: parse + normalisation en streaming, sans tout charger en mémoire
+        try:
+            lf = pl.scan_csv(source, **{k: v for k, v in read_options.items() if k != 'rechunk'})
+            _replace_from_tmp(lambda tmp_path: add_normalized_columns(lf).sink_parquet(
+                tmp_path, compression=STAGING_COMPRESSION), path)
+            logger.info(f"Staging créé: {Path(source).name} -> {os.path.basename(path)}")
+            return path, None
+        except Exception as e:
+            logger.debug(f"Staging streaming impossible pour {source} ({e}), lecture complète")
+
+    df = add_normalized_columns(pl.read_csv(data if data is not None else source, **read_options))
+    try:
+        _replace_from_tmp(lambda tmp_path: df.write_parquet(tmp_path, compression=STAGING_COMPRESSION), path)
+        logger.info(f"Staging créé: {Path(str(source)).name} -> {os.path.basename(path)} ({df.height:,} lignes)")
+    except Exception as e:
+        logger.warning(f"Staging impossible pour {source}: {e}")
+        return None, df
+    return path, df
+
+def load_staged(source, columns=None, **read_options):
+    """
+    DataFrame d'un CSV via le staging: parse + normalisation au premier appel,
+    lecture Parquet ensuite. columns limite la lecture aux colonnes utiles
+    (et à leurs versions _norm). read_options sont ceux de pl.read_csv.
+    """
+    if not STAGING_ENABLED:
+        data = source.read_bytes() if isinstance(source, ZipMember) else source
+        df = add_normalized_columns(pl.read_csv(data, **read_options))
+        return df.select(_projection(columns, df.columns)) if columns is not None else df
+
+    path, df = ensure_staged(source, **read_options)
+    if df is not None:
+        return df.select(_projection(columns, df.columns)) if columns is not None else df
+    if columns is None:
+        return pl.read_parquet(path)
+    return pl.read_parquet(path, columns=_projection(columns, list(pl.read_parquet_schema(path))))
+
+def scan_staged(source, **read_options):
+    """LazyFrame sur le staging d'un CSV (créé si besoin)"""
+    if not STAGING_ENABLED:
+        return load_staged(source, **read_options).lazy()
+    path, df = ensure_staged(source, **read_options)
+    return df.lazy() if df is not None else pl.scan_parquet(path)
@@ -0,0 +1,265 @@
+# Moteur d'extraction ZIP partagé (downloader, main-anita, process_zip, extract_only)
+# - Archives imbriquées lues en mémoire (jamais réécrites sur disque)
+# - Archives de premier niveau extraites en parallèle dans un pool de processus
+# - Protection contre les chemins dangereux (../, chemins absolus)
+# - Extraction sélective optionnelle (member_filter, ex: config_filtering.should_extract_member)
+# - Incrémentale par archive: seuls les sous-dossiers des archives modifiées sont remplacés
+
+import os
+import shutil
+import zipfile
+import logging
+import tempfile
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from file_state import file_hash, trusted_file_hash
+
+EXTRACT_WORKERS = min(os.cpu_count() or 1, 4)  # Archives extraites simultanément
+NESTED_SPOOL_MAX = 256 * 1024 * 1024          # Au-delà, une archive imbriquée déborde sur disque
+COPY_BUFFER_SIZE = 1024 * 1024                # Tampon de copie des membres
+
+logger = logging.getLogger(__name__)
+
+def _safe_target(extract_folder_abs, member_name):
+    """Chemin cible d'un membre, ou None s'il sortirait du dossier d'extraction"""
+    normalized_name = os.path.normpath(member_name).lstrip('/\\')
+    target_abs = os.path.abspath(os.path.join(extract_folder_abs, normalized_name))
+    if target_abs == extract_folder_abs or target_abs.startswith(extract_folder_abs + os.sep):
+        return target_abs
+    return None
+
+def _open_nested(zf, member):
+    """
+    Ouvre une archive imbriquée sans l'écrire sur disque: le membre est copié
+    en mémoire (SpooledTemporaryFile) car ZipFile a besoin d'accès aléatoire,
+    ce que le flux décompressé de zf.open() ne fournit qu'en relisant depuis le début.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=NESTED_SPOOL_MAX)
+    with zf.open(member) as src:
+        shutil.copyfileobj(src, spool, COPY_BUFFER_SIZE)
+    spool.seek(0)
+    return spool
+
+def _extract_zipfile(zf, extract_folder, stats, member_filter=None, dry_run=False):
+    """Extrait une archive ouverte (récursif sur les ZIP imbriqués)"""
+    extract_folder_abs = os.path.abspath(extract_folder)
+    if not dry_run:
+        os.makedirs(extract_folder_abs, exist_ok=True)
+
+    for member in zf.infolist():
+        target_abs = _safe_target(extract_folder_abs, member.filename)
+        if target_abs is None:
+            stats['warnings'].append(f"Chemin dangereux ignoré dans l'archive: {member.filename}")
+            continue
+
+        if member.is_dir():
+            if not dry_run:
+                os.makedirs(target_abs, exist_ok=True)
+        elif member_filter is not None and not member_filter(member.filename):
+            # Membre inutile pour les chargeurs: jamais écrit sur disque
+            ext = os.path.splitext(member.filename)[1].lower() or '(sans extension)'
+            stats['skipped'] += 1
+            stats['skipped_bytes'] += member.file_size
+            stats['skipped_by_ext'][ext] = stats['skipped_by_ext'].get(ext, 0) + member.file_size
+        elif member.filename.lower().endswith('.zip'):
+            # Archive imbriquée: extraite dans <membre sans .zip>/
+            try:
+                with _open_nested(zf, member) as nested_fp, zipfile.ZipFile(nested_fp) as nested_zf:
+                    _extract_zipfile(nested_zf, target_abs[:-4], stats, member_filter, dry_run)
+            except zipfile.BadZipFile:
+                stats['errors'].append(f"Archive imbriquée corrompue ignorée: {member.filename}")
+        else:
+            if not dry_run:
+                os.makedirs(os.path.dirname(target_abs), exist_ok=True)
+                with zf.open(member) as src, open(target_abs, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            stats['files'] += 1
+            stats['bytes'] += member.file_size
+
+def extract_archive(zip_path, extract_folder, member_filter=None, dry_run=False):
+    """Extrait une archive de premier niveau (exécuté dans un processus du pool)"""
+    stats = {'archive': os.path.basename(zip_path), 'folder': extract_folder, 'ok': True, 'dry_run': dry_run,
+             'files': 0, 'bytes': 0, 'skipped': 0, 'skipped_bytes': 0, 'skipped_by_ext': {},
+             'warnings': [], 'errors': []}
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zf:
+            _extract_zipfile(zf, extract_folder, stats, member_filter, dry_run)
+    except zipfile.BadZipFile:
+        stats['ok'] = False
+        stats['errors'].append(f"Archive corrompue ignorée: {stats['archive']}")
+    except Exception as e:
+        stats['ok'] = False
+        stats['errors'].append(f"Erreur lors de l'extraction de {stats['archive']}: {e}")
+    return stats
+
+def list_archives(src_dir, walk=False):
+    """Liste les archives ZIP de src_dir -> [(clé relative, chemin)]"""
+    archives = []
+    if walk:
+        for root, _, files in os.walk(src_dir):
+            for fname in files:
+                if fname.lower().endswith('.zip'):
+                    path = os.path.join(root, fname)
+                    archives.append((os.path.relpath(path, src_dir), path))
+    else:
+        for fname in os.listdir(src_dir):
+            if fname.lower().endswith('.zip'):
+                archives.append((fname, os.path.join(src_dir, fname)))
+    return sorted(archives)
+
+def _log_stats(stats):
+    for message in stats['warnings']:
+        logger.warning(message)
+    for message in stats['errors']:
+        logger.error(message)
+    label = "Analysé" if stats.get('dry_run') else "Extrait"
+    message = f"{label}: {stats['archive']} ({stats['files']} fichiers, {stats['bytes'] / (1024 * 1024):.1f} MB)"
+    if stats['skipped']:
+        message += f" - {stats['skipped']} membre(s) ignoré(s), {stats['skipped_bytes'] / (1024 * 1024):.1f} MB"
+    logger.info(message)
+
+def _run_extractions(tasks, max_workers, member_filter=None, dry_run=False):
+    """Exécute extract_archive sur chaque (zip, dossier), en parallèle si possible"""
+    workers = max(1, min(max_workers or EXTRACT_WORKERS, len(tasks)))
+    logger.info(f"Archives à extraire: {len(tasks)} ({workers} worker(s))")
+
+    results = []
+    if workers == 1:
+        for zip_path, extract_folder in tasks:
+            results.append(extract_archive(zip_path, extract_folder, member_filter, dry_run))
+            _log_stats(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(extract_archive, zip_path, extract_folder, member_filter, dry_run)
+                       for zip_path, extract_folder in tasks]
+            for future in as_completed(futures):
+                results.append(future.result())
+                _log_stats(results[-1])
+    return results
+
+def extraction_report(src_dir, member_filter, walk=False, max_workers=None):
+    """
+    Dry-run de l'extraction sélective: parcourt toutes les archives sans rien écrire
+    et journalise les volumes conservés / ignorés. Retourne le total par catégorie.
+    """
+    tasks = [(path, os.path.splitext(os.path.basename(rel_path))[0])
+             for rel_path, path in list_archives(src_dir, walk)]
+    report = {'archives': len(tasks), 'files': 0, 'bytes': 0, 'skipped': 0, 'skipped_bytes': 0, 'skipped_by_ext': {}}
+    if not tasks:
+        logger.warning(f"Aucune archive ZIP dans {src_dir}")
+        return report
+
+    for stats in _run_extractions(tasks, max_workers, member_filter, dry_run=True):
+        for key in ('files', 'bytes', 'skipped', 'skipped_bytes'):
+            report[key] += stats[key]
+        for ext, size in stats['skipped_by_ext'].items():
+            report['skipped_by_ext'][ext] = report['skipped_by_ext'].get(ext, 0) + size
+
+    total_bytes = report['bytes'] + report['skipped_bytes']
+    ratio = (report['skipped_bytes'] / total_bytes * 100) if total_bytes else 0.0
+    logger.info("=" * 50)
+    logger.info(f"DRY-RUN extraction sélective: {report['archives']} archive(s)")
+    logger.info(f"  Conservés: {report['files']} fichiers, {report['bytes'] / (1024 * 1024):.1f} MB")
+    logger.info(f"  Ignorés:   {report['skipped']} fichiers, {report['skipped_bytes'] / (1024 * 1024):.1f} MB ({ratio:.1f}%)")
+    for ext, size in sorted(report['skipped_by_ext'].items(), key=lambda item: -item[1]):
+        logger.info(f"    {ext}: {size / (1024 * 1024):.1f} MB")
+    return report
+
+def _tmp_folder(dst_dir, stem, index=0):
+    # index: distingue les archives de même stem (sous-dossiers différents de src_dir)
+    return os.path.join(dst_dir, f".{stem}.{index}.tmp")
+
+def _old_folder(dst_dir, stem):
+    return os.path.join(dst_dir, f".{stem}.old")
+
+def _cleanup_interrupted(dst_dir):
+    """Supprime les dossiers .<stem>.tmp / .<stem>.old laissés par une exécution interrompue"""
+    for name in os.listdir(dst_dir):
+        if name.startswith('.') and name.endswith(('.tmp', '.old')):
+            shutil.rmtree(os.path.join(dst_dir, name), ignore_errors=True)
+
+def _swap_subtree(dst_dir, stem, tmp_folder):
+    """Remplace dst_dir/<stem> par le dossier extrait tmp_folder (renommages uniquement)"""
+    final_folder = os.path.join(dst_dir, stem)
+    old_folder = _old_folder(dst_dir, stem)
+    if os.path.exists(final_folder):
+        os.rename(final_folder, old_folder)
+    os.rename(tmp_folder, final_folder)
+    shutil.rmtree(old_folder, ignore_errors=True)
+
+def extract_recursive(src_dir, dst_dir, old_hashes, file_meta=None, walk=False, max_workers=None,
+                      member_filter=None, extracted=None):
+    """
+    Extraction incrémentale des archives ZIP de src_dir vers dst_dir/<stem>.
+    Les sous-dossiers des archives inchangées sont conservés, ceux des archives
+    modifiées sont remplacés atomiquement et ceux des archives supprimées retirés.
+    walk: parcourir aussi les sous-dossiers de src_dir
+    file_meta: empreintes connues (section 'files' de l'état) pour éviter de relire les archives
+    max_workers: archives extraites en parallèle (défaut: EXTRACT_WORKERS)
+    member_filter: fonction(nom du membre) -> bool; les membres refusés ne sont pas écrits
+    extracted: section 'extracted' de l'état {clé: {'stem', 'sha256', 'filter', 'extracted_at'}}, mise à jour sur place
+    Retourne (new_hashes, changed_roots).
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    _cleanup_interrupted(dst_dir)
+    extracted = {} if extracted is None else extracted
+    filter_name = getattr(member_filter, '__name__', None)
+
+    new_hashes = {}
+    to_process = {}
+    changed_roots = []
+
+    for rel_path, path in list_archives(src_dir, walk):
+        h = trusted_file_hash(path, file_meta, rel_path) if file_meta is not None else file_hash(path)
+        new_hashes[rel_path] = h
+        stem = os.path.splitext(os.path.basename(rel_path))[0]
+        subtree_present = os.path.isdir(os.path.join(dst_dir, stem))
+
+        entry = extracted.get(rel_path)
+        if entry is None and old_hashes.get(rel_path) == h and subtree_present:
+            # État antérieur à l'extraction incrémentale: adopter le sous-dossier existant
+            entry = extracted[rel_path] = {'stem': stem, 'sha256': h, 'filter': filter_name}
+        if entry and entry.get('sha256') == h and entry.get('filter') == filter_name and subtree_present:
+            logger.info(f"Archive inchangée: {rel_path}")
+            continue
+
+        if entry and entry.get('sha256') == h and not subtree_present:
+            logger.info(f"Sous-dossier manquant, nouvelle extraction: {rel_path}")
+        changed_roots.append(stem)
+        to_process[rel_path] = (path, stem, h, _tmp_folder(dst_dir, stem, len(to_process)))
+
+    # Archives supprimées: retirer leur sous-dossier (sauf si le stem est repris par une autre archive)
+    current_stems = {os.path.splitext(os.path.basename(rel_path))[0] for rel_path in new_hashes}
+    for rel_path in set(extracted) - set(new_hashes):
+        stem = extracted.pop(rel_path).get('stem')
+        if stem and stem not in current_stems:
+            shutil.rmtree(os.path.join(dst_dir, stem), ignore_errors=True)
+            logger.info(f"Archive supprimée, sous-dossier retiré: {stem}")
+
+    if not to_process:
+        logger.warning(f"Aucune archive ZIP nouvelle ou modifiée dans {src_dir}")
+        return new_hashes, changed_roots
+
+    rel_by_folder = {tmp_folder: rel_path for rel_path, (_, _, _, tmp_folder) in to_process.items()}
+    tasks = [(path, tmp_folder) for path, _, _, tmp_folder in to_process.values()]
+    extracted_at = datetime.now(timezone.utc).isoformat()
+    for stats in _run_extractions(tasks, max_workers, member_filter):
+        rel_path = rel_by_folder[stats['folder']]
+        _, stem, h, tmp_folder = to_process[rel_path]
+        if not stats['ok']:
+            # Ancien sous-dossier conservé, nouvelle tentative au prochain passage:
+            # empreinte précédente rétablie et entrée marquée en échec (pas d'adoption du sous-dossier périmé)
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+            if rel_path in old_hashes:
+                new_hashes[rel_path] = old_hashes[rel_path]
+            else:
+                new_hashes.pop(rel_path, None)
+            extracted[rel_path] = {'stem': stem, 'sha256': None, 'filter': filter_name, 'failed_at': extracted_at}
+            if stem in changed_roots:
+                changed_roots.remove(stem)
+            continue
+        _swap_subtree(dst_dir, stem, tmp_folder)
+        extracted[rel_path] = {'stem': stem, 'sha256': h, 'filter': filter_name, 'extracted_at': extracted_at}
+
+    return new_hashes, changed_roots
@@ -0,0 +1,127 @@
+# Lecture directe des CSV contenus dans les archives ZIP (sans passer par data_extracted)
+# - ZipMember: chemin virtuel "archive.zip!/dossier/fichier.csv" (name, stem, resolve(), read_bytes())
+# - iter_zip_csv: découverte des CSV, y compris dans les archives imbriquées
+# - csv_source: source à passer à pl.read_csv (bytes pour un membre ZIP, chemin sinon)
+
+import io
+import os
+import zipfile
+import threading
+from collections import OrderedDict
+
+ZIP_SEPARATOR = '!/'
+NESTED_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Archives imbriquées gardées en mémoire (LRU)
+
+_nested_cache = OrderedDict()
+_nested_cache_bytes = 0
+_nested_lock = threading.Lock()
+
+def _nested_bytes(archive, chain):
+    """Contenu d'une archive imbriquée (chaîne de membres .zip), avec cache LRU borné"""
+    global _nested_cache_bytes
+    key = (archive, chain)
+    with _nested_lock:
+        if key in _nested_cache:
+            _nested_cache.move_to_end(key)
+            return _nested_cache[key]
+
+    with _open_chain(archive, chain[:-1]) as parent:
+        data = parent.read(chain[-1])
+
+    with _nested_lock:
+        if len(data) <= NESTED_CACHE_MAX_BYTES:
+            _nested_cache[key] = data
+            _nested_cache_bytes += len(data)
+            while _nested_cache_bytes > NESTED_CACHE_MAX_BYTES:
+                _, evicted = _nested_cache.popitem(last=False)
+                _nested_cache_bytes -= len(evicted)
+    return data
+
+def _open_chain(archive, chain):
+    """Ouvre l'archive (imbriquée) désignée par archive + chaîne de membres .zip"""
+    if not chain:
+        return zipfile.ZipFile(archive, 'r')
+    return zipfile.ZipFile(io.BytesIO(_nested_bytes(archive, tuple(chain))), 'r')
+
+class ZipMember:
+    """Chemin virtuel vers un membre CSV d'une archive ZIP, utilisable à la place d'un Path par les chargeurs"""
+
+    def __init__(self, archive, members, size=0):
+        self.archive = os.path.abspath(archive)
+        self.members = tuple(members)  # (archive imbriquée..., membre CSV)
+        self.size = size                # Taille décompressée du membre
+
+    @property
+    def name(self):
+        return self.members[-1].rstrip('/').rsplit('/', 1)[-1]
+
+    @property
+    def stem(self):
+        return os.path.splitext(self.name)[0]
+
+    @property
+    def suffix(self):
+        return os.path.splitext(self.name)[1]
+
+    def resolve(self):
+        return self
+
+    def exists(self):
+        return os.path.exists(self.archive)
+
+    def read_bytes(self):
+        with _open_chain(self.archive, self.members[:-1]) as zf:
+            return zf.read(self.members[-1])
+
+    def read_sample(self, n=2048):
+        with _open_chain(self.archive, self.members[:-1]) as zf, zf.open(self.members[-1]) as f:
+            return f.read(n)
+
+    def __fspath__(self):
+        return str(self)
+
+    def __str__(self):
+        return ZIP_SEPARATOR.join((self.archive,) + self.members)
+
+    def __repr__(self):
+        return f"ZipMember({str(self)!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, ZipMember) and str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+def _iter_archive(archive, chain, member_filter):
+    with _open_chain(archive, chain) as zf:
+        infos = zf.infolist()
+    for info in infos:
+        if info.is_dir():
+            continue
+        lower = info.filename.lower()
+        if lower.endswith('.zip'):
+            try:
+                yield from _iter_archive(archive, chain + (info.filename,), member_filter)
+            except zipfile.BadZipFile:
+                continue
+        elif lower.endswith('.csv') and (member_filter is None or member_filter(info.filename)):
+            yield ZipMember(archive, chain + (info.filename,), info.file_size)
+
+def iter_zip_csv(src_dir, member_filter=None):
+    """Parcourt les archives ZIP de src_dir (récursif) et produit un ZipMember par CSV"""
+    for root, _, files in os.walk(src_dir):
+        for fname in sorted(files):
+            if not fname.lower().endswith('.zip'):
+                continue
+            try:
+                yield from _iter_archive(os.path.join(root, fname), (), member_filter)
+            except zipfile.BadZipFile:
+                continue
+
+def csv_source(path):
+    """Source à passer à pl.read_csv: octets du membre pour un ZipMember, le chemin sinon"""
+    return path.read_bytes() if isinstance(path, ZipMember) else path
+
+def source_size(path):
+    """Taille (décompressée) d'un CSV, extrait ou membre ZIP"""
+    return path.size if isinstance(path, ZipMember) else os.path.getsize(path)
@@ -24,6 +24,11 @@ from collections import defaultdict
 import re
 from typing import Optional, Tuple, List, Dict
 
+# Modules partagés de fluxvision_automation (cache de staging)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "fluxvision_automation"))
+from staging_cache import load_staged
+from config_filtering import get_hist_file_type, get_lieu_file_type
+
 # =========================
 # Utils & logging
 # =========================
@@ -52,6 +57,8 @@ logger = logging.getLogger(__name__)
 # Constants — *Département only*
 # =========================
 
+DEPT_FILE_TYPES = {"SejourDuree_Departement", "Nuitee_Departement", "Diurne_Departement"}
+
 ALLOWED_LIEU_PREFIXES_DEPT = {
     "LieuActivite_Soir_Departement",
     "LieuActivite_Veille_Departement",
@@ -605,30 +612,13 @@ class FactTablePopulatorDept:
     # -------------------------
     @staticmethod
     def determine_file_type(filename: str) -> Optional[str]:
-        base_name = filename.replace('.csv', '')
-        if re.search(r'semaine', base_name, re.IGNORECASE):
-            return None
-
-        if re.match(r'^SejourDuree_Departement_(20\d{2}B\d+).*$', base_name, re.IGNORECASE):
-            return 'SejourDuree_Departement'
-        if re.match(r'^Nuitee_Departement_20\d{2}B\d+', base_name, re.IGNORECASE):
-            return 'Nuitee_Departement'
-        if re.match(r'^Diurne_Departement_20\d{2}B\d+', base_name, re.IGNORECASE):
-            return 'Diurne_Departement'
-
-        # Tout le reste (Pays, Global, Régions, etc.) est ignoré.
-        return None
+        # Regex partagées (config_filtering); tout le reste (Pays, Global, Régions, etc.) est ignoré
+        file_type = get_hist_file_type(filename)
+        return file_type if file_type in DEPT_FILE_TYPES else None
 
     @staticmethod
     def determine_lieu_file_type_strict(filename: str) -> Optional[str]:
-        if re.search(r'semaine', filename, re.IGNORECASE):
-            return None
-        base = filename[:-4] if filename.lower().endswith('.csv') else filename
-        parts = re.split(r'_(?=20\d{2}B)', base)
-        if len(parts) < 2:
-            return None
-        prefix = parts[0]
-        return prefix if prefix in ALLOWED_LIEU_PREFIXES_DEPT else None
+        return get_lieu_file_type(filename, ALLOWED_LIEU_PREFIXES_DEPT)
 
     # -------------------------
     # Insert helpers (overwrite only)
@@ -863,7 +853,7 @@ class FactTablePopulatorDept:
         }
 
         try:
-            df = pl.read_csv(csv_file, separator=';', infer_schema_length=300)
+            df = load_staged(csv_file, columns=use_cols, separator=';', infer_schema_length=300)
             if 'Volume' in df.columns:
                 df = df.with_columns(pl.col('Volume').cast(pl.Int32, strict=False))
             avail = [c for c in df.columns if c in use_cols]
@@ -915,7 +905,7 @@ class FactTablePopulatorDept:
             'CodeInseeNuiteeSoir','CodeInseeDiurneSoir','CodeInseeNuiteeVeille','CodeInseeDiurneVeille','CodeInsee','CodeINSEE'
         }
         try:
-            df = pl.read_csv(csv_file, separator=';', infer_schema_length=300)
+            df = load_staged(csv_file, columns=use_cols, separator=';', infer_schema_length=300)
             if 'Volume' in df.columns:
                 df = df.with_columns(pl.col('Volume').cast(pl.Int32, strict=False))
             cols = [c for c in df.columns if c in use_cols]
@@ -7,10 +7,8 @@ S'arrête à l'étape data_extracted sans traitement supplémentaire
 """
 
 import os
-import zipfile
 import shutil
 import logging
-import hashlib
 import json
 import sys
 import argparse
@@ -21,6 +19,11 @@ from datetime import datetime, timezone
 BASE_DIR = Path(__file__).resolve().parent
 FV_AUT_DIR = BASE_DIR / 'fluxvision_automation'
 
+# Modules partagés de fluxvision_automation (moteur d'extraction)
+sys.path.insert(0, str(BASE_DIR.parents[1] / 'fluxvision_automation'))
+from zip_extraction import extract_recursive, extraction_report, EXTRACT_WORKERS
+from config_filtering import should_extract_member
+
 # Configuration par défaut (répertoires relatifs à fluxvision_automation)
 DEFAULT_SRC_DIR = 'data/data_zip'
 DEFAULT_DST_DIR = 'data/data_extracted'
@@ -130,107 +133,13 @@ def save_state(state):
     with open(STATE_FILE, 'w', encoding='utf-8') as f:
         json.dump(state, f, indent=2)
 
-def file_hash(path):
-    """Calcule le hash SHA256 d'un fichier"""
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
-
-def extract_recursive(src_dir, dst_dir, old_hashes):
-    """
-    Extrait récursivement tous les fichiers ZIP
-    S'arrête à l'extraction, pas de traitement supplémentaire
-    """
-    if os.path.exists(dst_dir):
-        shutil.rmtree(dst_dir)
-    os.makedirs(dst_dir, exist_ok=True)
-
-    new_hashes = {}
-    to_process = []
-    changed_roots = []
-
-    # Recherche récursive des fichiers ZIP
-    logger.info(f"Recherche des archives ZIP dans {src_dir}")
-    for root, _, files in os.walk(src_dir):
-        for fname in files:
-            if not fname.lower().endswith('.zip'):
-                continue
-            path = os.path.join(root, fname)
-            h = file_hash(path)
-            rel_path = os.path.relpath(path, src_dir)
-            new_hashes[rel_path] = h
-            if old_hashes.get(rel_path) == h:
-                logger.info(f"Archive inchangée: {fname}")
-                continue
-            stem = os.path.splitext(fname)[0]
-            changed_roots.append(stem)
-            to_process.append((path, os.path.join(dst_dir, stem)))
-
-    if not to_process:
-        logger.info(f"Aucune nouvelle archive ZIP trouvée dans {src_dir}")
-        return new_hashes, changed_roots
-
-    logger.info(f"Archives à traiter: {len(to_process)}")
-    
-    # Extraction des archives
-    abs_dst = os.path.abspath(dst_dir)
-    while to_process:
-        zip_path, extract_folder = to_process.pop()
-        os.makedirs(extract_folder, exist_ok=True)
-        base = os.path.basename(zip_path)
-        
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                logger.info(f"Extraction de {base} -> {extract_folder}")
-                
-                extract_folder_abs = os.path.abspath(extract_folder)
-                for member in zf.infolist():
-                    # Normaliser le chemin pour prévenir les traversals (../) et chemins absolus
-                    normalized_name = os.path.normpath(member.filename).lstrip('/\\')
-                    target = os.path.join(extract_folder, normalized_name)
-                    target_abs = os.path.abspath(target)
-
-                    # Sécurité: ignorer toute entrée qui sortirait du dossier d'extraction
-                    if not (target_abs == extract_folder_abs or target_abs.startswith(extract_folder_abs + os.sep)):
-                        logger.warning(f"Chemin dangereux ignoré dans l'archive: {member.filename}")
-                        continue
-
-                    if member.is_dir():
-                        os.makedirs(target_abs, exist_ok=True)
-                    elif member.filename.lower().endswith('.zip'):
-                        # Archive imbriquée - l'ajouter à la liste de traitement
-                        data = zf.read(member)
-                        os.makedirs(os.path.dirname(target_abs), exist_ok=True)
-                        with open(target_abs, 'wb') as nf:
-                            nf.write(data)
-                        to_process.append((target_abs, target_abs[:-4]))
-                    else:
-                        # Fichier normal - l'extraire
-                        os.makedirs(os.path.dirname(target_abs), exist_ok=True)
-                        with zf.open(member) as src, open(target_abs, 'wb') as dst:
-                            shutil.copyfileobj(src, dst)
-                            
-        except zipfile.BadZipFile:
-            logger.error(f"Archive corrompue ignorée: {base}")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'extraction de {base}: {e}")
-        finally:
-            # Supprimer l'archive après extraction (si elle est dans le dossier de destination)
-            try:
-                if os.path.commonpath([os.path.abspath(zip_path), abs_dst]) == abs_dst:
-                    os.remove(zip_path)
-            except Exception:
-                pass
-
-    logger.info("Extraction terminée")
-    return new_hashes, changed_roots
-
 def parse_args():
     parser = argparse.ArgumentParser(description='Extracteur ZIP sécurisé (FluxVision)')
     parser.add_argument('--src', '--source', dest='src', default=None, help="Dossier source des archives ZIP (relatif à 'fluxvision_automation' ou absolu dans ce répertoire)")
     parser.add_argument('--dst', '--dest', dest='dst', default=None, help="Dossier de destination de l'extraction (relatif à 'fluxvision_automation' ou absolu dans ce répertoire)")
+    parser.add_argument('--workers', type=int, default=EXTRACT_WORKERS, help=f"Nombre d'archives extraites en parallèle (défaut: {EXTRACT_WORKERS})")
+    parser.add_argument('--selective', action='store_true', help="N'extraire que les membres utiles aux chargeurs (règles de config_filtering)")
+    parser.add_argument('--dry-run', action='store_true', help="Afficher les volumes conservés/ignorés par l'extraction sélective sans rien écrire")
     return parser.parse_args()
 
 def find_moved_data_zip() -> str:
@@ -307,6 +216,11 @@ def main():
     print(f"Source: {src_dir}")
     print(f"Destination: {dst_dir}")
 
+    # Dry-run: rapport des octets ignorés, aucune écriture ni mise à jour de l'état
+    if args.dry_run:
+        extraction_report(src_dir, should_extract_member, walk=True, max_workers=args.workers)
+        return
+
     # Nettoyer les dossiers temporaires au démarrage
     cleanup_temp_dirs(dst_dir)
     
@@ -316,6 +230,8 @@ def main():
         state = load_state()
         old_hashes = state.get('hashes', {})
         history = state.get('history', {})
+        file_meta = state.setdefault('files', {})
+        extracted = state.setdefault('extracted', {})
 
         # Vérifier si le dossier source existe
         if not os.path.exists(src_dir):
@@ -324,7 +240,9 @@ def main():
             print(f"📁 Dossier {src_dir} créé - Placez-y vos archives ZIP")
 
         # Extraction récursive
-        new_hashes, changed_roots = extract_recursive(src_dir, dst_dir, old_hashes)
+        new_hashes, changed_roots = extract_recursive(src_dir, dst_dir, old_hashes, file_meta, walk=True, max_workers=args.workers,
+                                                      member_filter=should_extract_member if args.selective else None,
+                                                      extracted=extracted)
         
         # Mise à jour de l'état
         state['hashes'] = new_hashes
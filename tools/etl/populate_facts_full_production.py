@@ -13,6 +13,11 @@ from collections import defaultdict
 import re
 from typing import Optional, Tuple, List, Dict
 
+# Modules partagés de fluxvision_automation (cache de staging)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "fluxvision_automation"))
+from staging_cache import load_staged
+from config_filtering import get_hist_file_type, get_lieu_file_type
+
 # =========================
 # Utils & logging
 # =========================
@@ -43,13 +48,6 @@ logger = logging.getLogger(__name__)
 # Constants (Lieu*)
 # =========================
 
-ALLOWED_LIEU_PREFIXES = {
-    "LieuActivite_Soir","LieuActivite_Soir_Departement","LieuActivite_Soir_Pays",
-    "LieuActivite_Veille","LieuActivite_Veille_Departement","LieuActivite_Veille_Pays",
-    "LieuNuitee_Soir","LieuNuitee_Soir_Departement","LieuNuitee_Soir_Pays",
-    "LieuNuitee_Veille","LieuNuitee_Veille_Departement","LieuNuitee_Veille_Pays",
-}
-
 EPCI_COLS = (
     'EPCIZoneNuiteeSoir','EPCIZoneDiurneSoir','EPCIZoneNuiteeVeille','EPCIZoneDiurneVeille','EPCI','NomEPCI'
 )
@@ -696,50 +694,12 @@ class FactTablePopulator:
     # -------------------------
     @staticmethod
     def determine_file_type(filename: str) -> Optional[str]:
-        base_name = filename.replace('.csv', '')
-        if re.search(r'semaine', base_name, re.IGNORECASE):
-            return None
-
-        if re.match(r'^SejourDuree_(20\d{2}B\d+).*$', base_name, re.IGNORECASE):
-            return 'SejourDuree'
-        if re.match(r'^SejourDuree_Departement_(20\d{2}B\d+).*$', base_name, re.IGNORECASE):
-            return 'SejourDuree_Departement'
-        if re.match(r'^SejourDuree_Pays_(20\d{2}B\d+).*$', base_name, re.IGNORECASE):
-            return 'SejourDuree_Pays'
-
-        if re.match(r'^Nuitee_20\d{2}B\d+_[^_]+$', base_name):
-            return 'Nuitee'
-        if re.match(r'^Diurne_20\d{2}B\d+_[^_]+$', base_name):
-            return 'Diurne'
-
-        if re.match(r'^Nuitee_Pays_20\d{2}B\d+', base_name):
-            return 'Nuitee_Pays'
-        if re.match(r'^Diurne_Pays_20\d{2}B\d+', base_name):
-            return 'Diurne_Pays'
-
-        if re.match(r'^Nuitee_Departement_20\d{2}B\d+', base_name, re.IGNORECASE):
-            return 'Nuitee_Departement'
-        if re.match(r'^Diurne_Departement_20\d{2}B\d+', base_name, re.IGNORECASE):
-            return 'Diurne_Departement'
-
-        # Ignorer explicitement les fichiers Régions (non souhaités)
-        if re.match(r'^Nuitee_Regions_20\d{2}B\d+', base_name):
-            return None
-        if re.match(r'^Diurne_Regions_20\d{2}B\d+', base_name):
-            return None
-
-        return None
+        # Regex partagées avec l'extraction sélective (config_filtering)
+        return get_hist_file_type(filename)
 
     @staticmethod
     def determine_lieu_file_type_strict(filename: str) -> Optional[str]:
-        if re.search(r'semaine', filename, re.IGNORECASE):
-            return None
-        base = filename[:-4] if filename.lower().endswith('.csv') else filename
-        parts = re.split(r'_(?=20\d{2}B)', base)
-        if len(parts) < 2:
-            return None
-        prefix = parts[0]
-        return prefix if prefix in ALLOWED_LIEU_PREFIXES else None
+        return get_lieu_file_type(filename)
 
     # -------------------------
     # Insert helpers (overwrite only)
@@ -1027,7 +987,7 @@ class FactTablePopulator:
     # CSV processors
     # -------------------------
     def _read_csv_useful(self, csv_file: Path, use_cols: set) -> Optional[pl.DataFrame]:
-        df = pl.read_csv(csv_file, separator=';', infer_schema_length=300)
+        df = load_staged(csv_file, columns=use_cols, separator=';', infer_schema_length=300)
         cols = [c for c in df.columns if c in use_cols]
         if not cols:
             return None
@@ -44,6 +44,12 @@ import requests
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+# Modules partagés de fluxvision_automation (lecture directe des ZIP)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "fluxvision_automation"))
+from zip_reader import iter_zip_csv
+from config_filtering import get_hist_file_type, get_lieu_file_type
+from staging_cache import load_staged, norm_column
+
 
 # =========================
 # Logging
@@ -107,13 +113,6 @@ def normalize_jour_semaine(s: object) -> str:
 # Constants (fichiers Lieu*)
 # =========================
 
-ALLOWED_LIEU_PREFIXES = {
-    "LieuActivite_Soir", "LieuActivite_Soir_Departement", "LieuActivite_Soir_Pays",
-    "LieuActivite_Veille", "LieuActivite_Veille_Departement", "LieuActivite_Veille_Pays",
-    "LieuNuitee_Soir", "LieuNuitee_Soir_Departement", "LieuNuitee_Soir_Pays",
-    "LieuNuitee_Veille", "LieuNuitee_Veille_Departement", "LieuNuitee_Veille_Pays",
-}
-
 EPCI_COLS = (
     "EPCIZoneNuiteeSoir", "EPCIZoneDiurneSoir", "EPCIZoneNuiteeVeille",
     "EPCIZoneDiurneVeille", "EPCI", "NomEPCI"
@@ -160,6 +159,10 @@ class CantalApi:
         self.s.headers["Authorization"] = f"Bearer {token}"
 
     def _post(self, path: str, payload: dict, *, use_admin: bool = False) -> dict:
+        return self._post_body(path, json.dumps(payload).encode("utf-8"), use_admin=use_admin)
+
+    def _post_body(self, path: str, body: bytes, *, use_admin: bool = False) -> dict:
+        """POST d'un corps JSON déjà encodé (retries 429, erreurs HTTP -> RuntimeError)."""
         url = f"{self.base}{path}"
         if use_admin and self.admin_token:
             self._set_auth_header(self.admin_token)
@@ -169,7 +172,7 @@ class CantalApi:
         attempts = 0
         while True:
             attempts += 1
-            r = self.s.post(url, data=json.dumps(payload).encode("utf-8"), timeout=self.timeout)
+            r = self.s.post(url, data=body, timeout=self.timeout)
             if r.status_code == 429:
                 ra = r.headers.get("Retry-After")
                 wait_s = float(ra) if ra and re.match(r"^\d+(\.\d+)?$", ra) else min(30.0, 1.5 * attempts)
@@ -326,21 +329,21 @@ class CantalApi:
             raise ValueError(f"Subtype inconnu: {subtype}")
         return t
 
-    def facts_upsert(self, subtype: str, rows: list[dict], *, batch_size: int = 2000) -> int:
-        """Upsert des facts via /api/database/facts_upsert.php (table=…, rows=…, options.test_mode)."""
-        if not rows:
+    def facts_upsert_frame(self, subtype: str, facts: pl.DataFrame, *, batch_size: int = 2000) -> int:
+        """
+        Upsert des facts via /api/database/facts_upsert.php (table=…, rows=…, options.test_mode).
+        Le JSON des lignes est écrit par Polars tranche par tranche (pas de dict Python par ligne).
+        """
+        if facts.height == 0:
             return 0
         table = self._map_table_from_subtype(subtype)
+        options = json.dumps({"test_mode": self.test_mode})
         total_processed = 0
-        for i in range(0, len(rows), batch_size):
-            chunk = rows[i:i + batch_size]
-            payload = {
-                "table": table,
-                "rows": chunk,
-                "options": {"test_mode": self.test_mode}
-            }
+        for i in range(0, facts.height, batch_size):
+            rows_json = facts.slice(i, batch_size).write_json(row_oriented=True)
+            body = f'{{"table": {json.dumps(table)}, "rows": {rows_json}, "options": {options}}}'
             # NOTE: endpoint PHP = facts_upsert.php (et non /facts/upsert)
-            resp = self._post("/api/database/facts_upsert.php", payload)
+            resp = self._post_body("/api/database/facts_upsert.php", body.encode("utf-8"))
             counts = resp.get("counts") or {}
             total_processed += int(counts.get("processed", 0))
         return total_processed
@@ -358,9 +361,12 @@ class ApiOnlyETL:
                  data_path: Path,
                  test_mode: bool = False,
                  batch_size: int = 2000,
-                 strip_accents: bool = False):
+                 strip_accents: bool = False,
+                 source_zip_dir: Optional[Path] = None):
         self.api = CantalApi(base_url=base_url, token=token, admin_token=admin_token, test_mode=test_mode, timeout=90)
         self.data_path = Path(data_path)
+        # Mode lecture directe: CSV lus dans les ZIP de source_zip_dir, data_extracted inutile
+        self.source_zip_dir = Path(source_zip_dir) if source_zip_dir else None
         self.test_mode = bool(test_mode)
         self.batch_size = int(batch_size)
         self.strip_accents = bool(strip_accents)
@@ -377,67 +383,39 @@ class ApiOnlyETL:
         self.map_epci: Dict[str, int] = {}
         self.map_commune_by_insee: Dict[str, int] = {}
         self.map_duree: Dict[str, int] = {}
+        # Mappings en DataFrame (libellé, id) pour les jointures, construits à la demande
+        self._mapping_frames: Dict[str, pl.DataFrame] = {}
 
     # --------- Détection fichiers ----------
     @staticmethod
     def determine_file_type(filename: str) -> Optional[str]:
-        base_name = filename.replace(".csv", "")
-        if re.search(r"semaine", base_name, re.IGNORECASE):
-            return None
-
-        if re.match(r"^SejourDuree_(20\d{2}B\d+).*$", base_name, re.IGNORECASE):
-            return "SejourDuree"
-        if re.match(r"^SejourDuree_Departement_(20\d{2}B\d+).*$", base_name, re.IGNORECASE):
-            return "SejourDuree_Departement"
-        if re.match(r"^SejourDuree_Pays_(20\d{2}B\d+).*$", base_name, re.IGNORECASE):
-            return "SejourDuree_Pays"
-
-        if re.match(r"^Nuitee_20\d{2}B\d+_[^_]+$", base_name):
-            return "Nuitee"
-        if re.match(r"^Diurne_20\d{2}B\d+_[^_]+$", base_name):
-            return "Diurne"
-
-        if re.match(r"^Nuitee_Pays_20\d{2}B\d+", base_name):
-            return "Nuitee_Pays"
-        if re.match(r"^Diurne_Pays_20\d{2}B\d+", base_name):
-            return "Diurne_Pays"
-
-        if re.match(r"^Nuitee_Departement_20\d{2}B\d+", base_name, re.IGNORECASE):
-            return "Nuitee_Departement"
-        if re.match(r"^Diurne_Departement_20\d{2}B\d+", base_name, re.IGNORECASE):
-            return "Diurne_Departement"
-
-        # Ignorer fichiers régions
-        if re.match(r"^Nuitee_Regions_20\d{2}B\d+", base_name):
-            return None
-        if re.match(r"^Diurne_Regions_20\d{2}B\d+", base_name):
-            return None
-
-        return None
+        # Regex partagées avec l'extraction sélective (config_filtering)
+        return get_hist_file_type(filename)
 
     @staticmethod
     def determine_lieu_file_type_strict(filename: str) -> Optional[str]:
-        if re.search(r"semaine", filename, re.IGNORECASE):
-            return None
-        base = filename[:-4] if filename.lower().endswith(".csv") else filename
-        parts = re.split(r"_(?=20\d{2}B)", base)
-        if len(parts) < 2:
-            return None
-        prefix = parts[0]
-        return prefix if prefix in ALLOWED_LIEU_PREFIXES else None
+        return get_lieu_file_type(filename)
 
     # --------- Lecture CSV minimaliste ----------
     @staticmethod
     def _read_csv_useful(csv_file: Path, use_cols: set) -> Optional[pl.DataFrame]:
-        df = pl.read_csv(csv_file, separator=";", infer_schema_length=300)
-        cols = [c for c in df.columns if c in use_cols]
-        if not cols:
+        # Staging Parquet partagé: colonnes utiles (+ versions _norm) sans reparser le CSV
+        df = load_staged(csv_file, columns=use_cols, separator=";", infer_schema_length=300)
+        if df.width == 0:
             return None
-        df = df.select(cols)
         if "Volume" in df.columns:
             df = df.with_columns(pl.col("Volume").cast(pl.Int32, strict=False))
         return df
 
+    def _normalized_series(self, df: pl.DataFrame, col: str) -> pl.Series:
+        """Libellés normalisés d'une colonne: version _norm du staging si utilisable (sans retrait des accents)."""
+        if not self.strip_accents and norm_column(col) in df.columns:
+            return df[norm_column(col)].cast(pl.String)
+        return self._normalize_series(df[col])
+
+    def _normalized_values(self, df: pl.DataFrame, col: str) -> list:
+        return self._normalized_series(df, col).to_list()
+
     # --------- Pré-scan pour construire les dims ----------
     def prescan_collect_dims(self, files_hist: Dict[str, List[Path]], files_lieu: Dict[str, List[Path]]) -> dict:
         dims = {
@@ -480,21 +458,21 @@ class ApiOnlyETL:
                         continue
 
                     if "ZoneObservation" in df.columns:
-                        dims["zones"].update([normalize_str_light(x, self.strip_accents) for x in df["ZoneObservation"].to_list()])
+                        dims["zones"].update(self._normalized_values(df, "ZoneObservation"))
                     if "Provenance" in df.columns:
-                        dims["provs"].update([normalize_str_light(x, self.strip_accents) for x in df["Provenance"].to_list()])
+                        dims["provs"].update(self._normalized_values(df, "Provenance"))
                     if "CategorieVisiteur" in df.columns:
-                        dims["cats"].update([normalize_str_light(x, self.strip_accents) for x in df["CategorieVisiteur"].to_list()])
+                        dims["cats"].update(self._normalized_values(df, "CategorieVisiteur"))
                     if "NomDepartement" in df.columns:
-                        dims["deps"].update([normalize_str_light(x, self.strip_accents) for x in df["NomDepartement"].to_list()])
+                        dims["deps"].update(self._normalized_values(df, "NomDepartement"))
                     if "Pays" in df.columns:
-                        dims["pays"].update([normalize_str_light(x, self.strip_accents) for x in df["Pays"].to_list()])
+                        dims["pays"].update(self._normalized_values(df, "Pays"))
 
                     # Métadonnées de département (regions)
                     if "NomDepartement" in df.columns and ("NomRegion" in df.columns or "NomNouvelleRegion" in df.columns):
-                        deps = [normalize_str_light(x, self.strip_accents) for x in df["NomDepartement"].to_list()]
-                        regs = [normalize_str_light(x, self.strip_accents) for x in (df["NomRegion"].to_list() if "NomRegion" in df.columns else [None]*len(deps))]
-                        nregs = [normalize_str_light(x, self.strip_accents) for x in (df["NomNouvelleRegion"].to_list() if "NomNouvelleRegion" in df.columns else [None]*len(deps))]
+                        deps = self._normalized_values(df, "NomDepartement")
+                        regs = self._normalized_values(df, "NomRegion") if "NomRegion" in df.columns else [None]*len(deps)
+                        nregs = self._normalized_values(df, "NomNouvelleRegion") if "NomNouvelleRegion" in df.columns else [None]*len(deps)
                         for d, r, nr in zip(deps, regs, nregs):
                             if not d:
                                 continue
@@ -505,7 +483,7 @@ class ApiOnlyETL:
                                 meta["nom_nouvelle_region"] = nr
 
                     if "DureeSejour" in df.columns:
-                        lib = [normalize_str_light(x, self.strip_accents) for x in df["DureeSejour"].to_list()]
+                        lib = self._normalized_values(df, "DureeSejour")
                         nb  = df["DureeSejourNum"].to_list() if "DureeSejourNum" in df.columns else [None] * len(lib)
                         for L, N in zip(lib, nb):
                             if not L:
@@ -530,22 +508,22 @@ class ApiOnlyETL:
                         continue
 
                     if "ZoneObservation" in df.columns:
-                        dims["zones"].update([normalize_str_light(x, self.strip_accents) for x in df["ZoneObservation"].to_list()])
+                        dims["zones"].update(self._normalized_values(df, "ZoneObservation"))
                     if "Provenance" in df.columns:
-                        dims["provs"].update([normalize_str_light(x, self.strip_accents) for x in df["Provenance"].to_list()])
+                        dims["provs"].update(self._normalized_values(df, "Provenance"))
                     if "CategorieVisiteur" in df.columns:
-                        dims["cats"].update([normalize_str_light(x, self.strip_accents) for x in df["CategorieVisiteur"].to_list()])
+                        dims["cats"].update(self._normalized_values(df, "CategorieVisiteur"))
 
                     # deps (plusieurs colonnes de fallback)
                     for col in DEPT_FALLBACK_COLS:
                         if col in df.columns:
-                            dims["deps"].update([normalize_str_light(x, self.strip_accents) for x in df[col].to_list()])
+                            dims["deps"].update(self._normalized_values(df, col))
 
                     # métadonnées de région si présentes dans ces fichiers (rare)
                     if "NomDepartement" in df.columns and ("NomRegion" in df.columns or "NomNouvelleRegion" in df.columns):
-                        deps = [normalize_str_light(x, self.strip_accents) for x in df["NomDepartement"].to_list()]
-                        regs = [normalize_str_light(x, self.strip_accents) for x in (df["NomRegion"].to_list() if "NomRegion" in df.columns else [None]*len(deps))]
-                        nregs = [normalize_str_light(x, self.strip_accents) for x in (df["NomNouvelleRegion"].to_list() if "NomNouvelleRegion" in df.columns else [None]*len(deps))]
+                        deps = self._normalized_values(df, "NomDepartement")
+                        regs = self._normalized_values(df, "NomRegion") if "NomRegion" in df.columns else [None]*len(deps)
+                        nregs = self._normalized_values(df, "NomNouvelleRegion") if "NomNouvelleRegion" in df.columns else [None]*len(deps)
                         for d, r, nr in zip(deps, regs, nregs):
                             if not d:
                                 continue
@@ -557,12 +535,12 @@ class ApiOnlyETL:
 
                     # pays
                     if "Pays" in df.columns:
-                        dims["pays"].update([normalize_str_light(x, self.strip_accents) for x in df["Pays"].to_list()])
+                        dims["pays"].update(self._normalized_values(df, "Pays"))
 
                     # epci
                     for col in EPCI_COLS:
                         if col in df.columns:
-                            dims["epcis"].update([normalize_str_light(x, self.strip_accents) for x in df[col].to_list()])
+                            dims["epcis"].update(self._normalized_values(df, col))
 
                     # communes (via code INSEE + 1er département dispo)
                     code_series = None
@@ -641,6 +619,7 @@ class ApiOnlyETL:
             self.map_duree = self.api.dim_upsert_durees(rows)
         if dims["dates"]:
             self.api.dim_upsert_dates(dims["dates"])
+        self._mapping_frames = {}
 
         logger.info(
             "Mappings chargés: zones=%d, provs=%d, cats=%d, deps=%d, pays=%d, epci=%d, communes=%d, durees=%d",
@@ -648,159 +627,120 @@ class ApiOnlyETL:
             len(self.map_epci), len(self.map_commune_by_insee), len(self.map_duree)
         )
 
-    # --------- Helpers mapping ----------
-    def _id_from(self, mapping: Dict[str, int], label: object, *, allow_zero=False) -> Optional[int]:
-        k = normalize_str_light(label, self.strip_accents)
-        if not k:
-            return 0 if allow_zero else None
-        v = mapping.get(k)
-        return (v if v is not None else (0 if allow_zero else None))
-
-    def _pick_departement_name(self, row: dict) -> Optional[str]:
-        for col in DEPT_FALLBACK_COLS:
-            v = row.get(col)
-            if v and str(v).strip():
-                return v
-        return None
-
-    def _pick_epci_name(self, row: dict) -> Optional[str]:
-        for col in EPCI_COLS:
-            v = row.get(col)
-            if v and str(v).strip():
-                return v
-        return None
-
-    def _pick_insee(self, row: dict) -> Optional[str]:
-        for col in INSEE_COLS:
-            v = row.get(col)
-            if v and str(v).strip():
-                return v
-        return None
-
-    # --------- Construction des lignes de facts ----------
-    def make_fact_tuple_hist(self, row: dict, subtype: str) -> Optional[dict]:
-        date_str = parse_date_string(row.get("Date"))
-        if not date_str:
-            return None
-
-        id_zone = self._id_from(self.map_zone, row.get("ZoneObservation"))
-        id_prov = self._id_from(self.map_prov, row.get("Provenance"))
-        id_cat  = self._id_from(self.map_cat,  row.get("CategorieVisiteur"))
-        if not all([id_zone, id_prov, id_cat]):
-            return None
-
-        vol = row.get("Volume", 0)
-        try:
-            vol = int(vol) if vol is not None else 0
-        except Exception:
-            vol = 0
-        if vol <= 0:
-            return None
-
-        if subtype == "SejourDuree":
-            lib = row.get("DureeSejour")
-            id_duree = self._id_from(self.map_duree, lib)
-            if not id_duree:
-                return None
-            return {"date": date_str, "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat, "id_duree": id_duree, "volume": vol}
-
-        if subtype == "SejourDuree_Departement":
-            dep_name = row.get("NomDepartement")
-            id_dep = self._id_from(self.map_dep, dep_name)
-            if not id_dep:
-                return None
-            lib = row.get("DureeSejour")
-            id_duree = self._id_from(self.map_duree, lib)
-            if not id_duree:
-                return None
-            return {"date": date_str, "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat, "id_departement": id_dep, "id_duree": id_duree, "volume": vol}
-
-        if subtype == "SejourDuree_Pays":
-            id_pays = self._id_from(self.map_pays, row.get("Pays"))
-            if not id_pays:
-                return None
-            lib = row.get("DureeSejour")
-            id_duree = self._id_from(self.map_duree, lib)
-            if not id_duree:
-                return None
-            return {"date": date_str, "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat, "id_pays": id_pays, "id_duree": id_duree, "volume": vol}
-
-        if subtype in ("Nuitee_Departement", "Diurne_Departement"):
-            dep_name = row.get("NomDepartement")
-            id_dep = self._id_from(self.map_dep, dep_name)
-            if not id_dep:
-                return None
-            return {"date": date_str, "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat, "id_departement": id_dep, "volume": vol}
-
-        if subtype in ("Nuitee_Pays", "Diurne_Pays"):
-            id_pays = self._id_from(self.map_pays, row.get("Pays"))
-            if not id_pays:
-                return None
-            return {"date": date_str, "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat, "id_pays": id_pays, "volume": vol}
-
-        # simples: Nuitee / Diurne
-        return {"date": date_str, "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat, "volume": vol}
-
-    def make_fact_tuple_lieu(self, row: dict, subtype: str) -> Optional[dict]:
-        date_str = parse_date_string(row.get("Date"))
-        if not date_str:
-            return None
+    # --------- Helpers mapping (vectorisés) ----------
+    @staticmethod
+    def _map_distinct(s: pl.Series, func) -> pl.Series:
+        """Applique func une fois par valeur distincte non nulle (et non par ligne); null conservé."""
+        s = s.cast(pl.String)
+        uniq = s.unique().drop_nulls().to_list()
+        return s.replace(uniq, [func(v) for v in uniq], default=None, return_dtype=pl.String)
 
-        id_zone = self._id_from(self.map_zone, row.get("ZoneObservation"))
-        id_prov = self._id_from(self.map_prov, row.get("Provenance"))
-        id_cat  = self._id_from(self.map_cat,  row.get("CategorieVisiteur"))
-        if not all([id_zone, id_prov, id_cat]):
-            return None
+    def _normalize_series(self, s: pl.Series) -> pl.Series:
+        return self._map_distinct(s, lambda v: normalize_str_light(v, self.strip_accents))
 
-        vol = row.get("Volume", 0)
-        try:
-            vol = int(vol) if vol is not None else 0
-        except Exception:
-            vol = 0
-        if vol <= 0:
-            return None
+    @staticmethod
+    def _first_filled(df: pl.DataFrame, cols: Iterable[str]) -> pl.Series:
+        """Première valeur non vide parmi cols, ligne par ligne (null si aucune)."""
+        exprs = [
+            pl.when(pl.col(c).cast(pl.String).str.strip_chars() != "").then(pl.col(c).cast(pl.String))
+            for c in cols if c in df.columns
+        ]
+        if not exprs:
+            return pl.Series("v", [None] * df.height, dtype=pl.String)
+        return df.select(pl.coalesce(exprs).alias("v")).to_series()
+
+    def _ids(self, norm_labels: pl.Series, mapping_name: str) -> pl.Series:
+        """Id de chaque libellé normalisé (jointure gauche sur le mapping, ordre conservé), null si inconnu."""
+        frame = self._mapping_frames.get(mapping_name)
+        if frame is None:
+            mapping = getattr(self, mapping_name)
+            frame = pl.DataFrame(
+                {"k": list(mapping), "v": [int(v) for v in mapping.values()]},
+                schema={"k": pl.String, "v": pl.Int64},
+            )
+            self._mapping_frames[mapping_name] = frame
+        return pl.DataFrame({"k": norm_labels.cast(pl.String)}).join(frame, on="k", how="left")["v"]
+
+    def _label_ids(self, df: pl.DataFrame, col: str, mapping_name: str) -> pl.Series:
+        if col not in df.columns:
+            return pl.Series("v", [None] * df.height, dtype=pl.Int64)
+        return self._ids(self._normalized_series(df, col), mapping_name)
 
-        js = normalize_jour_semaine(row.get("JourDeLaSemaine") or row.get("jour_semaine"))
+    @staticmethod
+    def _date_strings(df: pl.DataFrame) -> pl.Series:
+        """Date 'YYYY-MM-DD' si plausible, sinon null (équivalent vectorisé de parse_date_string)."""
+        if "Date" not in df.columns:
+            return pl.Series("v", [None] * df.height, dtype=pl.String)
+        return df.select(
+            pl.when(pl.col("Date").cast(pl.String).str.strip_chars().str.contains(r"^\d{4}-\d{2}-\d{2}$"))
+            .then(pl.col("Date").cast(pl.String).str.strip_chars())
+        ).to_series()
 
-        epci_name = self._pick_epci_name(row)
-        id_epci = self._id_from(self.map_epci, epci_name, allow_zero=True) or 0
+    @staticmethod
+    def _volumes(df: pl.DataFrame) -> pl.Series:
+        if "Volume" not in df.columns:
+            return pl.Series("v", [0] * df.height, dtype=pl.Int64)
+        return df["Volume"].cast(pl.Int64, strict=False).fill_null(0)
 
-        code_insee = self._pick_insee(row)
-        id_commune = 0
-        if code_insee:
-            code_key = normalize_str_light(code_insee, self.strip_accents)
-            if code_key and code_key in self.map_commune_by_insee:
-                id_commune = int(self.map_commune_by_insee[code_key])
+    @staticmethod
+    def _keep_valid_facts(facts: pl.DataFrame, required_ids: List[str]) -> pl.DataFrame:
+        """Lignes avec date, ids obligatoires non nuls (ni 0) et volume > 0."""
+        cond = pl.col("date").is_not_null() & (pl.col("volume") > 0)
+        for c in required_ids:
+            cond = cond & pl.col(c).is_not_null() & (pl.col(c) != 0)
+        return facts.filter(cond)
+
+    # --------- Construction des lignes de facts (colonne par colonne) ----------
+    def build_fact_frame_hist(self, df: pl.DataFrame, subtype: str) -> pl.DataFrame:
+        cols = {
+            "date": self._date_strings(df),
+            "id_zone": self._label_ids(df, "ZoneObservation", "map_zone"),
+            "id_provenance": self._label_ids(df, "Provenance", "map_prov"),
+            "id_categorie": self._label_ids(df, "CategorieVisiteur", "map_cat"),
+        }
+        required = ["id_zone", "id_provenance", "id_categorie"]
+
+        if subtype in ("SejourDuree_Departement", "Nuitee_Departement", "Diurne_Departement"):
+            cols["id_departement"] = self._label_ids(df, "NomDepartement", "map_dep")
+            required.append("id_departement")
+        elif subtype in ("SejourDuree_Pays", "Nuitee_Pays", "Diurne_Pays"):
+            cols["id_pays"] = self._label_ids(df, "Pays", "map_pays")
+            required.append("id_pays")
+        if subtype in ("SejourDuree", "SejourDuree_Departement", "SejourDuree_Pays"):
+            cols["id_duree"] = self._label_ids(df, "DureeSejour", "map_duree")
+            required.append("id_duree")
+
+        cols["volume"] = self._volumes(df)
+        return self._keep_valid_facts(pl.DataFrame(cols), required)
+
+    def build_fact_frame_lieu(self, df: pl.DataFrame, subtype: str) -> pl.DataFrame:
+        jour = pl.Series("v", [None] * df.height, dtype=pl.String)
+        if "JourDeLaSemaine" in df.columns or "jour_semaine" in df.columns:
+            jour = df.select(pl.coalesce([
+                pl.when(pl.col(c).cast(pl.String) != "").then(pl.col(c).cast(pl.String))
+                for c in ("JourDeLaSemaine", "jour_semaine") if c in df.columns
+            ])).to_series()
+
+        cols = {
+            "date": self._date_strings(df),
+            "jour_semaine": self._map_distinct(jour, normalize_jour_semaine).fill_null(""),
+            "id_zone": self._label_ids(df, "ZoneObservation", "map_zone"),
+            "id_provenance": self._label_ids(df, "Provenance", "map_prov"),
+            "id_categorie": self._label_ids(df, "CategorieVisiteur", "map_cat"),
+        }
+        required = ["id_zone", "id_provenance", "id_categorie"]
 
         if subtype.endswith("_Departement"):
-            dep_name = self._pick_departement_name(row)
-            id_dep = self._id_from(self.map_dep, dep_name)
-            if not id_dep:
-                return None
-            return {
-                "date": date_str, "jour_semaine": js,
-                "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat,
-                "id_departement": id_dep, "id_epci": id_epci, "id_commune": id_commune,
-                "volume": vol
-            }
-
-        if subtype.endswith("_Pays"):
-            id_p = self._id_from(self.map_pays, row.get("Pays"))
-            if not id_p:
-                return None
-            return {
-                "date": date_str, "jour_semaine": js,
-                "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat,
-                "id_pays": id_p, "id_epci": id_epci, "id_commune": id_commune,
-                "volume": vol
-            }
-
-        # sans dep/pays
-        return {
-            "date": date_str, "jour_semaine": js,
-            "id_zone": id_zone, "id_provenance": id_prov, "id_categorie": id_cat,
-            "id_epci": id_epci, "id_commune": id_commune, "volume": vol
-        }
+            cols["id_departement"] = self._ids(self._normalize_series(self._first_filled(df, DEPT_FALLBACK_COLS)), "map_dep")
+            required.append("id_departement")
+        elif subtype.endswith("_Pays"):
+            cols["id_pays"] = self._label_ids(df, "Pays", "map_pays")
+            required.append("id_pays")
+
+        cols["id_epci"] = self._ids(self._normalize_series(self._first_filled(df, EPCI_COLS)), "map_epci").fill_null(0)
+        cols["id_commune"] = self._ids(self._normalize_series(self._first_filled(df, INSEE_COLS)), "map_commune_by_insee").fill_null(0)
+        cols["volume"] = self._volumes(df)
+        return self._keep_valid_facts(pl.DataFrame(cols), required)
 
     # --------- Traitement d'un fichier ----------
     def process_hist_file(self, csv_file: Path, subtype: str) -> int:
@@ -816,16 +756,8 @@ class ApiOnlyETL:
             df = self._read_csv_useful(csv_file, use_cols)
             if df is None or df.height == 0:
                 return 0
-            rows, total = [], 0
-            for r in df.iter_rows(named=True):
-                d = self.make_fact_tuple_hist(r, subtype)
-                if d:
-                    rows.append(d)
-                if len(rows) >= self.batch_size:
-                    total += self.api.facts_upsert(subtype, rows, batch_size=self.batch_size)
-                    rows.clear()
-            if rows:
-                total += self.api.facts_upsert(subtype, rows, batch_size=self.batch_size)
+            facts = self.build_fact_frame_hist(df, subtype)
+            total = self.api.facts_upsert_frame(subtype, facts, batch_size=self.batch_size)
             self.stats[f"files_processed_{subtype}"] += 1
             self.stats[f"rows_inserted_{subtype}"] += total
             logger.info("  -> %s lignes upsertées", f"{total:,}")
@@ -850,16 +782,8 @@ class ApiOnlyETL:
             df = self._read_csv_useful(csv_file, use_cols)
             if df is None or df.height == 0:
                 return 0
-            rows, total = [], 0
-            for r in df.iter_rows(named=True):
-                d = self.make_fact_tuple_lieu(r, subtype)
-                if d:
-                    rows.append(d)
-                if len(rows) >= self.batch_size:
-                    total += self.api.facts_upsert(subtype, rows, batch_size=self.batch_size)
-                    rows.clear()
-            if rows:
-                total += self.api.facts_upsert(subtype, rows, batch_size=self.batch_size)
+            facts = self.build_fact_frame_lieu(df, subtype)
+            total = self.api.facts_upsert_frame(subtype, facts, batch_size=self.batch_size)
             self.stats[f"files_processed_{subtype}"] += 1
             self.stats[f"rows_inserted_{subtype}"] += total
             logger.info("  -> %s lignes upsertées", f"{total:,}")
@@ -875,14 +799,16 @@ class ApiOnlyETL:
         # 0) ensure schéma si possible (créera *_test si test_mode True)
         self.api.ensure_schema_if_available(test_mode=self.test_mode)
 
-        if not self.data_path.exists():
-            logger.error("Dossier introuvable: %s", self.data_path)
+        source_root = self.source_zip_dir or self.data_path
+        if not source_root.exists():
+            logger.error("Dossier introuvable: %s", source_root)
             return False
 
-        # 1) répertoire → fichiers par sous-type
+        # 1) répertoire (ou archives ZIP en lecture directe) → fichiers par sous-type
         files_hist = defaultdict(list)
         files_lieu = defaultdict(list)
-        for csv_file in self.data_path.rglob("*.csv"):
+        csv_files = iter_zip_csv(self.source_zip_dir) if self.source_zip_dir else self.data_path.rglob("*.csv")
+        for csv_file in csv_files:
             if re.search(r"semaine", csv_file.name, re.IGNORECASE):
                 continue
             ft = self.determine_file_type(csv_file.name)
@@ -955,6 +881,7 @@ def main():
     parser.add_argument("--token", dest="etl_token", help="Jeton API (Bearer) pour l'ETL")
     parser.add_argument("--admin-token", dest="admin_token", help="Jeton admin pour schema_ensure (optionnel)")
     parser.add_argument("--data-path", dest="data_path", help="Dossier des CSV")
+    parser.add_argument("--source-zip", dest="source_zip", help="Lire les CSV directement dans les ZIP de ce dossier (sans data_extracted)")
     parser.add_argument("--batch-size", dest="batch_size", type=int, help="Taille des lots (facts)")
     parser.add_argument("--strip-accents", dest="strip_accents", type=int, choices=[0, 1], help="Normalisation sans accents (0/1)")
     args, unknown = parser.parse_known_args()
@@ -993,6 +920,7 @@ def main():
     admin_tok = args.admin_token or os.getenv("ETL_ADMIN_API_TOKEN")  # optionnel
 
     data_path = Path(args.data_path or os.getenv("ETL_DATA_PATH") or "fluxvision_automation/data/data_extracted")
+    source_zip = args.source_zip or os.getenv("ETL_SOURCE_ZIP")
     batch_size = int(args.batch_size or os.getenv("ETL_BATCH_SIZE") or 2000)
     strip_acc = bool(int(args.strip_accents if args.strip_accents is not None else (os.getenv("ETL_STRIP_ACCENTS") or 0)))
 
@@ -1003,7 +931,8 @@ def main():
         data_path=data_path,
         test_mode=test_mode,
         batch_size=batch_size,
-        strip_accents=strip_acc
+        strip_accents=strip_acc,
+        source_zip_dir=source_zip
     )
 
     ok = False
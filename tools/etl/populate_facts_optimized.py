@@ -14,17 +14,28 @@ import re
 import sys
 import json
 import time
+import queue
+import tempfile
+import threading
+import multiprocessing
 import psutil
 import logging
 import polars as pl
 import mysql.connector
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict, Any
-from collections import defaultdict
+from typing import Optional, Tuple, List, Dict, Any, Set
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from mysql.connector.pooling import MySQLConnectionPool
 from mysql.connector import Error
 
+# Modules partagés de fluxvision_automation (lecture directe des ZIP)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "fluxvision_automation"))
+from zip_reader import iter_zip_csv
+from config_filtering import get_hist_file_type, get_lieu_file_type
+from staging_cache import load_staged, scan_staged, norm_column, NORM_SUFFIX
+
 # =========================
 # Logging
 # =========================
@@ -48,12 +59,33 @@ CONNECTION_POOL_SIZE = 10    # MySQL pool
 OPTIMIZED_BATCH_SIZE = 5000  # Taille d’insertions par chunks
 CHECKPOINT_FILE = "etl_checkpoint.json"
 
-ALLOWED_LIEU_PREFIXES = {
-    "LieuActivite_Soir","LieuActivite_Soir_Departement","LieuActivite_Soir_Pays",
-    "LieuActivite_Veille","LieuActivite_Veille_Departement","LieuActivite_Veille_Pays",
-    "LieuNuitee_Soir","LieuNuitee_Soir_Departement","LieuNuitee_Soir_Pays",
-    "LieuNuitee_Veille","LieuNuitee_Veille_Departement","LieuNuitee_Veille_Pays",
-}
+# Chargement en masse: TSV temporaire -> LOAD DATA LOCAL INFILE dans une table de staging
+# temporaire (par connexion), puis un seul INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+# Nécessite local_infile=ON côté serveur; repli automatique sur INSERT multi-lignes sinon.
+BULK_LOAD = os.getenv("FV_BULK_LOAD", "1") != "0"
+BULK_LOAD_MIN_ROWS = 20000  # En dessous, un INSERT multi-lignes reste plus simple et aussi rapide
+VALUES_CHUNK_ROWS = 10000   # Lignes par INSERT ... VALUES (...),(...) (reste sous max_allowed_packet)
+# Erreurs MySQL signifiant "LOAD DATA LOCAL indisponible" (seules à désactiver le chargement en masse):
+# 1148 commande non autorisée, 2068 fichier local refusé par le client, 3948 local_infile désactivé
+LOCAL_INFILE_ERRNOS = {1148, 2068, 3948}
+
+# Chargement parallèle: lecture + transformations Polars dans des processus (spawn),
+# upserts de tables de faits différentes en parallèle sur le pool (une seule écriture à la fois par table).
+# Les écritures de dimensions (dim_dates, régions, libellés hors pré-passe) restent dans le processus principal.
+TRANSFORM_WORKERS = int(os.getenv("FV_TRANSFORM_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARALLEL_LOAD = os.getenv("FV_PARALLEL_LOAD", "1") != "0" and TRANSFORM_WORKERS > 1
+
+# Chargement séquentiel en pipeline: le fichier suivant est lu/transformé pendant l'upsert du précédent.
+# Au plus PIPELINE_QUEUE_SIZE fichiers transformés attendent l'insertion (contre-pression sur la lecture).
+PIPELINE_QUEUE_SIZE = int(os.getenv("FV_PIPELINE_QUEUE", "2"))
+
+# Consolidation inter-fichiers: tous les fichiers en attente d'un même type sont agrégés ensemble,
+# une clé présente dans plusieurs bimestres garde la valeur du bimestre le plus récent,
+# puis chaque clé est upsertée une seule fois (au lieu d'une réécriture par fichier).
+CROSS_FILE_AGG = os.getenv("FV_CROSS_FILE_AGG", "0") == "1"
+NON_KEY_FACT_COLS = ("volume", "jour_semaine")  # Colonnes hors clé unique des tables de faits
+SQL_TEXT_COLUMNS = ("jour_semaine",)  # Seules colonnes texte des tables de faits
+NULLABLE_FACT_COLS = ("jour_semaine",)  # Toutes les autres colonnes de faits sont NOT NULL
 
 EPCI_COLS = (
     "EPCIZoneNuiteeSoir","EPCIZoneDiurneSoir","EPCIZoneNuiteeVeille","EPCIZoneDiurneVeille","EPCI","NomEPCI"
@@ -67,6 +99,45 @@ COMMUNE_COLS = (
 DEPT_FALLBACK_COLS = (
     "NomDepartement","DeptZoneDiurneSoir","DeptZoneNuiteeSoir","DeptZoneDiurneVeille","DeptZoneNuiteeVeille","Departement"
 )
+# Tables de dimension par libellé: clé -> (table, colonne id, colonne libellé)
+DIM_TABLES = {
+    "zones":        ("dim_zones_observation", "id_zone", "nom_zone"),
+    "provenances":  ("dim_provenances", "id_provenance", "nom_provenance"),
+    "categories":   ("dim_categories_visiteur", "id_categorie", "nom_categorie"),
+    "pays":         ("dim_pays", "id_pays", "nom_pays"),
+    "departements": ("dim_departements", "id_departement", "nom_departement"),
+    "epci":         ("dim_epci", "id_epci", "nom_epci"),
+    "durees":       ("dim_durees_sejour", "id_duree", "libelle"),
+}
+DIM_LOOKUP_CHUNK = 1000  # Libellés par SELECT ... WHERE IN (rechargement ciblé après insertion)
+
+# Colonnes utiles par famille de fichiers
+HIST_USE_COLS = {
+    "Date","ZoneObservation","Zone","Provenance","CategorieVisiteur","Volume",
+    "DureeSejour","DureeSejourNum","NomDepartement","Pays",
+    "VacancesA","VacancesB","VacancesC","Ferie","JourDeLaSemaine",
+    "vacances_a","vacances_b","vacances_c","ferie","jour_semaine",
+    "NomRegion","NomNouvelleRegion"
+}
+LIEU_USE_COLS = {
+    "Date","VacancesA","VacancesB","VacancesC","Ferie","JourDeLaSemaine",
+    "vacances_a","vacances_b","vacances_c","ferie","jour_semaine",
+    "Provenance","ZoneObservation","Zone","CategorieVisiteur","Volume",
+    "NomDepartement","Departement","Pays",
+    "DeptZoneDiurneSoir","DeptZoneNuiteeSoir","DeptZoneDiurneVeille","DeptZoneNuiteeVeille",
+    "EPCIZoneNuiteeSoir","EPCIZoneDiurneSoir","EPCIZoneNuiteeVeille","EPCIZoneDiurneVeille","EPCI","NomEPCI",
+    "CodeInseeNuiteeSoir","CodeInseeDiurneSoir","CodeInseeNuiteeVeille","CodeInseeDiurneVeille","CodeInsee","CodeINSEE",
+    "ZoneNuiteeSoir","ZoneDiurneSoir","ZoneNuiteeVeille","ZoneDiurneVeille","Zone","Commune","NomCommune",
+    "NomRegion","NomNouvelleRegion"
+}
+# Colonnes dont l'id est obligatoire: une ligne sans l'un d'eux est écartée
+REQUIRED_DIM_COLS = ("ZoneObservation", "Provenance", "CategorieVisiteur")
+
+# Libellés de dimensions encodés en dictionnaire (pl.Categorical) dès la lecture
+CATEGORICAL_COLS = {
+    "ZoneObservation","Provenance","CategorieVisiteur","Pays","DureeSejour","NomRegion","NomNouvelleRegion",
+    *EPCI_COLS, *INSEE_COLS, *COMMUNE_COLS, *DEPT_FALLBACK_COLS,
+}
 
 # =========================
 # Utils
@@ -91,6 +162,129 @@ def _normalize_expr(col: str) -> pl.Expr:
         .str.to_uppercase()
     )
 
+def _dictionary(s: pl.Series) -> Tuple[pl.Series, pl.Series]:
+    """(codes UInt32 par ligne, libellés distincts) d'une colonne encodée en dictionnaire."""
+    if s.dtype != pl.Categorical:
+        s = s.cast(pl.String, strict=False).cast(pl.Categorical)
+    # Représentation locale: le code physique est la position dans get_categories()
+    s = s.cat.to_local()
+    return s.to_physical(), s.cat.get_categories()
+
+def _normalize_dictionary(labels: pl.Series) -> pl.Series:
+    """Normalise les libellés distincts d'un dictionnaire (et non chaque ligne)."""
+    return pl.DataFrame({"label": labels}).select(_normalize_expr("label")).to_series()
+
+class DimensionMap:
+    """
+    Correspondance libellé normalisé -> id d'une dimension: dict pour les tests
+    d'appartenance, DataFrame Polars persistant (complété à chaque insertion) pour les jointures.
+    """
+
+    def __init__(self, mapping: Optional[Dict[str, int]] = None):
+        self.ids: Dict[str, int] = dict(mapping or {})
+        self._frame: Optional[pl.DataFrame] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self.ids
+
+    def get(self, label: Optional[str], default: Optional[int] = None) -> Optional[int]:
+        return self.ids.get(label, default)
+
+    def missing(self, labels) -> List[str]:
+        """Libellés non vides absents de la dimension."""
+        return sorted({v for v in labels if v and v not in self.ids})
+
+    def add(self, mapping: Dict[str, int]):
+        """Ajoute de nouveaux libellés (le frame est complété, pas reconstruit)."""
+        new = {k: v for k, v in mapping.items() if k and k not in self.ids}
+        if not new:
+            return
+        self.ids.update(new)
+        if self._frame is not None:
+            self._frame = pl.concat([self._frame, self._to_frame(new)])
+
+    @staticmethod
+    def _to_frame(mapping: Dict[str, int]) -> pl.DataFrame:
+        return pl.DataFrame({"label": list(mapping), "id": list(mapping.values())},
+                            schema={"label": pl.String, "id": pl.Int64})
+
+    @property
+    def frame(self) -> pl.DataFrame:
+        if self._frame is None:
+            self._frame = self._to_frame(self.ids)
+        return self._frame
+
+    def lookup(self, norm_labels: pl.Series) -> pl.Series:
+        """Id de chaque libellé (jointure gauche, ordre conservé), null si inconnu."""
+        return pl.DataFrame({"label": norm_labels.cast(pl.String)}).join(self.frame, on="label", how="left")["id"]
+
+class MissingDimensionLabels(Exception):
+    """Libellés absents du mapping alors que les insertions de dimensions sont interdites (processus de travail)."""
+
+def _sql_literal_expr(name: str, dtype: pl.DataType) -> pl.Expr:
+    """
+    Littéral SQL de chaque valeur d'une colonne: NULL, entier, 'AAAA-MM-JJ' ou 'texte'.
+    Limité aux dtypes des tables de faits (Date, entiers, SQL_TEXT_COLUMNS): tout autre
+    dtype (booléen, flottant...) lève une ValueError plutôt que produire un littéral invalide.
+    """
+    col = pl.col(name)
+    if dtype == pl.Date:
+        text = pl.concat_str([pl.lit("'"), col.dt.strftime("%Y-%m-%d"), pl.lit("'")])
+    elif dtype.is_integer():
+        text = col.cast(pl.String)
+    elif dtype == pl.String and name in SQL_TEXT_COLUMNS:
+        # Apostrophe doublée: valide avec ou sans NO_BACKSLASH_ESCAPES (antislash refusé en amont)
+        text = pl.concat_str([pl.lit("'"), col.str.replace_all("'", "''", literal=True), pl.lit("'")])
+    else:
+        raise ValueError(f"Colonne {name}: dtype {dtype} non encodable en littéral SQL")
+    return text.fill_null("NULL")
+
+def _sql_values_chunks(frame: pl.DataFrame, chunk_rows: int):
+    """(nb lignes, texte "(..),(..)") par tranche: encodage colonne par colonne, une seule chaîne Python par tranche."""
+    tuples = frame.select(
+        pl.concat_str([
+            pl.lit("("),
+            pl.concat_str([_sql_literal_expr(c, t) for c, t in frame.schema.items()], separator=","),
+            pl.lit(")"),
+        ]).alias("t")
+    )["t"]
+    for offset in range(0, len(tuples), chunk_rows):
+        part = tuples.slice(offset, chunk_rows)
+        yield len(part), part.str.concat(",").item()
+
+def _checked_fact_frame(table: str, frame: pl.DataFrame) -> pl.DataFrame:
+    """
+    Frame prêt à l'upsert, identique pour LOAD DATA et INSERT ... VALUES:
+    - lignes avec un NULL dans une colonne NOT NULL (date non parsée, id non résolu) écartées
+      et signalées (LOAD DATA les convertirait sinon en 0 / 0000-00-00)
+    - antislash refusé dans le texte (échappement différent selon sql_mode et ESCAPED BY)
+    """
+    for name, dtype in frame.schema.items():
+        if dtype == pl.String and frame[name].str.contains("\\", literal=True).any():
+            raise ValueError(f"Colonne {name}: antislash non supporté dans un littéral SQL")
+    required = [c for c in frame.columns if c not in NULLABLE_FACT_COLS]
+    valid = frame.drop_nulls(subset=required)
+    if valid.height != frame.height:
+        nulls = {c: n for c, n in zip(required, frame.select(required).null_count().row(0)) if n}
+        logger.warning("%s: %d ligne(s) écartée(s), valeurs nulles dans des colonnes NOT NULL %s",
+                       table, frame.height - valid.height, nulls)
+    return valid
+
+def _bimestre_rank(filename: str) -> int:
+    """Rang chronologique du bimestre d'un fichier (..._2024B6_... < ..._2025B1_...), 0 si absent."""
+    m = re.search(r"(20\d{2})B(\d+)", filename)
+    return int(m.group(1)) * 100 + int(m.group(2)) if m else 0
+
+def _bimestre_key(path: Path) -> Tuple[int, str]:
+    """Clé de tri chronologique d'un fichier (bimestre puis nom, ordre stable entre exécutions)."""
+    return _bimestre_rank(path.name), path.name
+
+def _by_bimestre(files) -> List[Path]:
+    return sorted(files, key=_bimestre_key)
+
 def _coalesce_existing(df: pl.DataFrame, cols: List[str]) -> pl.Expr:
     existing = [pl.col(c).cast(pl.String, strict=False) for c in cols if c in df.columns]
     if not existing:
@@ -119,6 +313,7 @@ class FactTablePopulator:
         test_mode: bool = False,
         batch_size: int = OPTIMIZED_BATCH_SIZE,
         resume_from_checkpoint: bool = True,
+        source_zip_dir: Optional[Path] = None,
     ):
         self.host = host
         self.port = port
@@ -126,6 +321,8 @@ class FactTablePopulator:
         self.password = password
         self.database = database
         self.data_path = Path(data_path)
+        # Mode lecture directe: CSV lus dans les ZIP de source_zip_dir, data_extracted inutile
+        self.source_zip_dir = Path(source_zip_dir) if source_zip_dir else None
 
         self.test_mode = test_mode
         self.batch_size = int(batch_size)
@@ -142,12 +339,10 @@ class FactTablePopulator:
         self.stats = defaultdict(int, self.checkpoint.get("stats", {}))
 
         # Dimension caches (nom normalisé -> id)
-        self.dim_cache: Dict[str, Dict[str, int]] = {
-            "zones": {}, "provenances": {}, "categories": {},
-            "pays": {}, "departements": {}
-        }
-        self.dim_communes_by_insee: Dict[str, int] = {}
-        self.dim_epci_by_name: Dict[str, int] = {}
+        self.dim_cache: Dict[str, DimensionMap] = {key: DimensionMap() for key in DIM_TABLES}
+        self.dim_communes_by_insee = DimensionMap()
+        # Processus de travail du chargement parallèle: mapping en lecture seule, aucune écriture en base
+        self.offline_dims = False
 
         # Mappings fichiers -> tables
         self.file_to_table_mapping = {
@@ -176,7 +371,9 @@ class FactTablePopulator:
             # "LieuNuitee_Veille_Pays": f"fact_lieu_nuitee_veille_pays{self.table_suffix}",
         }
 
-        self._insert_stmt_cache: Dict[str, Tuple[str, int]] = {}
+        self.bulk_load_enabled = BULK_LOAD
+        # Durées cumulées par étape du pipeline (secondes)
+        self.stage_timings: Dict[str, float] = defaultdict(float)
 
         logger.info("Mode test=%s, batch=%s, resume=%s", self.test_mode, self.batch_size, self.resume_from_checkpoint)
         logger.info("Machine: i5-1240P (%d cœurs), pool connexions: %d", CPU_COUNT, CONNECTION_POOL_SIZE)
@@ -237,6 +434,7 @@ class FactTablePopulator:
                 charset="utf8mb4",
                 collation="utf8mb4_unicode_ci",
                 autocommit=False,
+                allow_local_infile=BULK_LOAD,
             )
             self.connection = self.connection_pool.get_connection()
             self.cursor = self.connection.cursor()
@@ -511,27 +709,33 @@ class FactTablePopulator:
         self.cursor.execute(f"SELECT {id_col},{name_col} FROM {table}")
         return {normalize_str_light(name): idv for idv, name in self.cursor.fetchall() if name}
 
+    def _fetch_ids(self, table: str, id_col: str, name_col: str, names: List[str]) -> Dict[str, int]:
+        """Ids des seuls libellés donnés (SELECT ciblé par lots, sans relire toute la table)."""
+        out: Dict[str, int] = {}
+        for i in range(0, len(names), DIM_LOOKUP_CHUNK):
+            part = names[i:i + DIM_LOOKUP_CHUNK]
+            self.cursor.execute(
+                f"SELECT {id_col},{name_col} FROM {table} WHERE {name_col} IN ({','.join(['%s'] * len(part))})",
+                part,
+            )
+            out.update({normalize_str_light(name): idv for idv, name in self.cursor.fetchall() if name})
+        return out
+
     def load_dimension_cache(self):
         logger.info("Chargement cache dimensions...")
-        self.dim_cache["zones"]        = self._fetch_cache_generic("dim_zones_observation", "id_zone", "nom_zone")
-        self.dim_cache["provenances"]  = self._fetch_cache_generic("dim_provenances", "id_provenance", "nom_provenance")
-        self.dim_cache["categories"]   = self._fetch_cache_generic("dim_categories_visiteur", "id_categorie", "nom_categorie")
-        self.dim_cache["pays"]         = self._fetch_cache_generic("dim_pays", "id_pays", "nom_pays")
-        self.dim_cache["departements"] = self._fetch_cache_generic("dim_departements", "id_departement", "nom_departement")
+        for key, (table, id_col, name_col) in DIM_TABLES.items():
+            try:
+                self.dim_cache[key] = DimensionMap(self._fetch_cache_generic(table, id_col, name_col))
+            except Exception:
+                if key not in ("epci", "durees"):
+                    raise
+                self.dim_cache[key] = DimensionMap()
 
         # communes
         try:
-            self.cursor.execute("SELECT id_commune, code_insee FROM dim_communes")
-            self.dim_communes_by_insee = {normalize_str_light(c): i for i, c in self.cursor.fetchall() if c}
-        except Exception:
-            self.dim_communes_by_insee = {}
-
-        # epci
-        try:
-            self.cursor.execute("SELECT id_epci, nom_epci FROM dim_epci")
-            self.dim_epci_by_name = {normalize_str_light(n): i for i, n in self.cursor.fetchall() if n}
+            self.dim_communes_by_insee = DimensionMap(self._fetch_cache_generic("dim_communes", "id_commune", "code_insee"))
         except Exception:
-            self.dim_epci_by_name = {}
+            self.dim_communes_by_insee = DimensionMap()
 
         logger.info(
             "Dims chargées: zones=%d, prov=%d, cat=%d, pays=%d, dep=%d, communes=%d, epci=%d",
@@ -541,7 +745,7 @@ class FactTablePopulator:
             len(self.dim_cache["pays"]),
             len(self.dim_cache["departements"]),
             len(self.dim_communes_by_insee),
-            len(self.dim_epci_by_name),
+            len(self.dim_cache["epci"]),
         )
 
     # ---- Batch UPSERT dims ----
@@ -582,40 +786,75 @@ class FactTablePopulator:
 
     # ---- Helpers mapping dims via joins ----
 
+    def _ensure_dim_labels(self, dim_key: str, labels) -> None:
+        """Insère les libellés absents d'une dimension et complète son mapping (SELECT ciblé)."""
+        dim = self.dim_cache[dim_key]
+        to_create = dim.missing(labels)
+        if not to_create:
+            return
+        if self.offline_dims:
+            raise MissingDimensionLabels(f"{dim_key}: {len(to_create)} libellé(s)")
+        table, id_col, name_col = DIM_TABLES[dim_key]
+        if dim_key == "durees":
+            self.cursor.executemany(
+                """
+                INSERT INTO dim_durees_sejour(libelle, nb_nuits, ordre)
+                VALUES (%s, NULL, NULL)
+                ON DUPLICATE KEY UPDATE id_duree=LAST_INSERT_ID(id_duree)
+                """,
+                [(u,) for u in to_create]
+            )
+            self.connection.commit()
+        else:
+            self._batch_insert_names(table, name_col, to_create)
+        dim.add(self._fetch_ids(table, id_col, name_col, to_create))
+
+    def _ensure_communes(self, triples) -> None:
+        """triples: (code_insee normalisé, nom_commune, nom_departement brut); insère les codes absents."""
+        commune_data = []
+        for code_insee, nom_commune, nom_departement in triples:
+            if not code_insee or code_insee in self.dim_communes_by_insee:
+                continue
+            # id_departement depuis le cache des départements si le nom est disponible
+            id_departement = self.dim_cache["departements"].get(normalize_str_light(nom_departement)) if nom_departement else None
+            commune_data.append((code_insee, nom_commune or "", id_departement))
+        if not commune_data:
+            return
+        if self.offline_dims:
+            raise MissingDimensionLabels(f"communes: {len(commune_data)} code(s) INSEE")
+
+        self._batch_upsert_communes(commune_data)
+
+        # Update existing communes that don't have id_departement but now have department info
+        update_data = [(id_dep, code_insee) for code_insee, _, id_dep in commune_data if id_dep is not None]
+        if update_data:
+            self.cursor.executemany(
+                "UPDATE dim_communes SET id_departement = %s WHERE code_insee = %s AND id_departement IS NULL",
+                update_data
+            )
+            self.connection.commit()
+
+        codes = sorted({code for code, _, _ in commune_data})
+        self.dim_communes_by_insee.add(self._fetch_ids("dim_communes", "id_commune", "code_insee", codes))
+
     def _df_map_dim(self, df: pl.DataFrame, src_col: str, dim_key: str, out_id_col: str) -> pl.DataFrame:
-        """Normalise, insère les manquants en dim, recharge le cache et join pour id."""
-        df = df.with_columns(pl.when(pl.col(src_col).is_null()).then(None).otherwise(_normalize_expr(src_col)).alias(f"{src_col}_norm"))
-
-        uniq_vals = (
-            df.select(pl.col(f"{src_col}_norm"))
-              .drop_nulls()
-              .unique()
-              .to_series()
-              .to_list()
-        )
-        cache = self.dim_cache[dim_key]
-        to_create = [v for v in uniq_vals if v not in cache]
-        if to_create:
-            table_name, name_col, id_col = {
-                "zones": ("dim_zones_observation", "nom_zone", "id_zone"),
-                "provenances": ("dim_provenances", "nom_provenance", "id_provenance"),
-                "categories": ("dim_categories_visiteur", "nom_categorie", "id_categorie"),
-                "pays": ("dim_pays", "nom_pays", "id_pays"),
-                "departements": ("dim_departements", "nom_departement", "id_departement"),
-            }[dim_key]
-            self._batch_insert_names(table_name, name_col, to_create)
-            self.dim_cache[dim_key] = self._fetch_cache_generic(table_name, id_col, name_col)
-
-        map_df = pl.DataFrame({
-            f"{src_col}_norm": list(self.dim_cache[dim_key].keys()),
-            out_id_col: list(self.dim_cache[dim_key].values()),
-        })
-        return df.join(map_df, on=f"{src_col}_norm", how="left")
+        """Normalise le dictionnaire de la colonne puis jointure sur le mapping persistant de la dimension."""
+        # Colonne normalisée du staging si présente, sinon normalisation des seuls libellés distincts
+        if norm_column(src_col) in df.columns:
+            codes, norm_labels = _dictionary(df[norm_column(src_col)])
+        else:
+            codes, labels = _dictionary(df[src_col])
+            norm_labels = _normalize_dictionary(labels)
+
+        # Normalement déjà couverts par prepare_dimensions: insertion ciblée sinon
+        self._ensure_dim_labels(dim_key, norm_labels.to_list())
+        ids = self.dim_cache[dim_key].lookup(norm_labels)
+        return df.with_columns(ids.gather(codes).alias(out_id_col))
 
     def _df_map_commune_by_insee(self, df: pl.DataFrame, insee_col_out: str = "code_insee_norm") -> pl.DataFrame:
-        df = df.with_columns(
-            pl.when(pl.col(insee_col_out).is_null()).then(None).otherwise(_normalize_expr(insee_col_out)).alias(insee_col_out)
-        )
+        insee_codes, insee_labels = _dictionary(df[insee_col_out])
+        insee_norm = _normalize_dictionary(insee_labels)
+        df = df.with_columns(insee_norm.gather(insee_codes).alias(insee_col_out))
 
         # Get commune names using the same coalesce logic as INSEE codes
         commune_expr = _coalesce_existing(df, list(COMMUNE_COLS))
@@ -627,144 +866,183 @@ class FactTablePopulator:
 
         # Create unique mapping of (code_insee, nom_commune, nom_departement) triples
         mapping_df = df.select([insee_col_out, "nom_commune_raw", "nom_departement_raw"]).drop_nulls().unique()
+        self._ensure_communes(mapping_df.iter_rows())
 
-        commune_data = []
-        for row in mapping_df.iter_rows():
-            code_insee = row[0]
-            nom_commune = row[1] if row[1] else ""  # Empty string if None
-            nom_departement = row[2] if len(row) > 2 and row[2] else None
-
-            # Get id_departement from department cache if department name is available
-            id_departement = None
-            if nom_departement:
-                dep_norm = normalize_str_light(nom_departement)
-                id_departement = self.dim_cache["departements"].get(dep_norm)
-
-            if code_insee and code_insee not in self.dim_communes_by_insee:
-                commune_data.append((code_insee, nom_commune, id_departement))
-
-        # Insert new communes with their names and department ids
-        if commune_data:
-            self._batch_upsert_communes(commune_data)
-
-            # Update existing communes that don't have id_departement but now have department info
-            update_data = [(id_dep, code_insee) for code_insee, _, id_dep in commune_data if id_dep is not None]
-            if update_data:
-                self.cursor.executemany(
-                    "UPDATE dim_communes SET id_departement = %s WHERE code_insee = %s AND id_departement IS NULL",
-                    update_data
-                )
-                self.connection.commit()
-
-            # reload cache
-            self.cursor.execute("SELECT id_commune, code_insee FROM dim_communes")
-            self.dim_communes_by_insee = {normalize_str_light(c): i for i, c in self.cursor.fetchall() if c}
-
-        # Only create mapping if cache is not empty
-        if self.dim_communes_by_insee:
-            map_df = pl.DataFrame({
-                insee_col_out: list(self.dim_communes_by_insee.keys()),
-                "id_commune": list(self.dim_communes_by_insee.values())
-            })
-            # Ensure consistent data types
-            map_df = map_df.with_columns(pl.col(insee_col_out).cast(pl.Utf8))
-            df = df.with_columns(pl.col(insee_col_out).cast(pl.Utf8))
-            return df.join(map_df, on=insee_col_out, how="left")
-        else:
-            # If no communes in cache, return df with null id_commune
-            return df.with_columns(pl.lit(None).alias("id_commune"))
+        ids = self.dim_communes_by_insee.lookup(insee_norm)
+        return df.with_columns(ids.gather(insee_codes).alias("id_commune"))
 
     def _df_map_epci_by_name(self, df: pl.DataFrame, epci_norm_col: str = "nom_epci_norm") -> pl.DataFrame:
-        df = df.with_columns(
-            pl.when(pl.col(epci_norm_col).is_null()).then(None).otherwise(_normalize_expr(epci_norm_col)).alias(epci_norm_col)
+        return self._df_map_dim(df, epci_norm_col, "epci", "id_epci")
+
+    def _df_map_duree(self, df: pl.DataFrame) -> pl.DataFrame:
+        """Lookup id_duree par code du dictionnaire (libellés upsertés si absents)."""
+        return self._df_map_dim(df, "DureeSejour", "durees", "id_duree")
+
+    # --------------- Dimension pre-pass (all pending files) ---------------
+
+    @staticmethod
+    def _plan_dimension_labels(lf: pl.LazyFrame, file_type: str, is_lieu: bool, plans: Dict[str, list]) -> None:
+        """Ajoute à plans les requêtes paresseuses des libellés distincts d'un fichier, par dimension."""
+        use_cols = LIEU_USE_COLS if is_lieu else HIST_USE_COLS
+        cols = [c for c in lf.schema if c in use_cols]
+        lf = lf.select(cols)
+
+        def text(c: str) -> pl.Expr:
+            return pl.col(c).cast(pl.String, strict=False)
+
+        def coalesce(candidates) -> Optional[pl.Expr]:
+            present = [text(c) for c in candidates if c in cols]
+            return pl.coalesce(present) if present else None
+
+        def add(dim_key: str, frame: pl.LazyFrame, expr: pl.Expr):
+            plans[dim_key].append(frame.select(expr.alias("label")).unique())
+
+        for dim_key, col in (("zones", "ZoneObservation"), ("provenances", "Provenance"), ("categories", "CategorieVisiteur")):
+            if col in cols:
+                add(dim_key, lf, text(col))
+        if not all(c in cols for c in REQUIRED_DIM_COLS):
+            return  # toutes les lignes seront écartées
+
+        # Mêmes lignes que le traitement fichier: ids zone / provenance / catégorie présents
+        valid = lf.filter(pl.all_horizontal([_normalize_expr(c) != "" for c in REQUIRED_DIM_COLS]))
+        dep = coalesce(DEPT_FALLBACK_COLS)
+        if file_type.endswith("_Departement") and dep is not None:
+            add("departements", valid, dep)
+        if file_type.endswith("_Pays") and "Pays" in cols:
+            add("pays", valid, text("Pays"))
+        if file_type.startswith("SejourDuree") and "DureeSejour" in cols:
+            add("durees", valid, text("DureeSejour"))
+        if is_lieu:
+            epci = coalesce(EPCI_COLS)
+            if epci is not None:
+                add("epci", valid, epci)
+            insee, commune = coalesce(INSEE_COLS), coalesce(COMMUNE_COLS)
+            if insee is not None and commune is not None and dep is not None:
+                # Comme _df_map_commune_by_insee: triplets complets uniquement
+                plans["communes"].append(
+                    valid.select(insee.alias("code"), commune.alias("nom"), dep.alias("dep")).drop_nulls().unique()
+                )
+
+    def prepare_dimensions(self, hist_files: Dict[str, List[Path]], lieu_files: Dict[str, List[Path]]):
+        """
+        Pré-passe: libellés distincts de tous les fichiers en attente (lecture paresseuse
+        du staging), upsert de chaque dimension en une fois. Le traitement par fichier
+        se limite ensuite à des jointures sur les mappings persistants.
+        """
+        plans: Dict[str, list] = defaultdict(list)
+        for is_lieu, files_by_type in ((False, hist_files), (True, lieu_files)):
+            for ft, files in files_by_type.items():
+                for p in files:
+                    try:
+                        lf = scan_staged(p, separator=";", infer_schema_length=300)
+                        self._plan_dimension_labels(lf, ft, is_lieu, plans)
+                    except Exception as e:
+                        logger.warning("Pré-passe dimensions %s: %s", p.name, e)
+        if not plans:
+            return
+
+        t0 = time.time()
+        keys = list(plans)
+        labels = dict(zip(keys, pl.collect_all([pl.concat(plans[k]).unique() for k in keys])))
+        # Départements avant communes (id_departement des nouvelles communes)
+        for dim_key in ("zones", "provenances", "categories", "departements", "pays", "durees", "epci"):
+            if dim_key in labels:
+                self._ensure_dim_labels(dim_key, _normalize_dictionary(labels[dim_key]["label"]).to_list())
+        if "communes" in labels:
+            triples = labels["communes"].with_columns(_normalize_expr("code").alias("code")).unique()
+            self._ensure_communes(triples.iter_rows())
+
+        logger.info(
+            "Pré-passe dimensions (%.1fs): %s",
+            time.time() - t0, ", ".join(f"{k}={len(v)}" for k, v in labels.items()),
         )
-        uniq = df.select(pl.col(epci_norm_col)).drop_nulls().unique().to_series().to_list()
-        to_create = [n for n in uniq if n not in self.dim_epci_by_name]
-        if to_create:
-            self._batch_insert_names("dim_epci", "nom_epci", to_create)
-            self.cursor.execute("SELECT id_epci, nom_epci FROM dim_epci")
-            self.dim_epci_by_name = {normalize_str_light(n): i for i, n in self.cursor.fetchall() if n}
-        map_df = pl.DataFrame({
-            epci_norm_col: list(self.dim_epci_by_name.keys()),
-            "id_epci": list(self.dim_epci_by_name.values())
-        })
-        return df.join(map_df, on=epci_norm_col, how="left")
 
     # --------------- Insert helpers ---------------
 
-    def _prepare_insert_statement(self, table: str) -> Tuple[str, int]:
-        if table in self._insert_stmt_cache:
-            return self._insert_stmt_cache[table]
-        if table.endswith("_pays") and "sejours_duree" in table:
-            cols = "(date,id_zone,id_provenance,id_categorie,id_pays,id_duree,volume)"; arity = 7
-        elif table.endswith("_departements") and "sejours_duree" in table:
-            cols = "(date,id_zone,id_provenance,id_categorie,id_departement,id_duree,volume)"; arity = 7
-        elif "sejours_duree" in table:
-            cols = "(date,id_zone,id_provenance,id_categorie,id_duree,volume)"; arity = 6
-        elif table.endswith("_pays"):
-            cols = "(date,id_zone,id_provenance,id_categorie,id_pays,volume)"; arity = 6
-        elif table.endswith("_departements"):
-            cols = "(date,id_zone,id_provenance,id_categorie,id_departement,volume)"; arity = 6
-        else:
-            cols = "(date,id_zone,id_provenance,id_categorie,volume)"; arity = 5
-        q = f"INSERT INTO {table} {cols} VALUES ({','.join(['%s']*arity)}) ON DUPLICATE KEY UPDATE volume=VALUES(volume)"
-        self._insert_stmt_cache[table] = (q, arity)
-        return q, arity
-
-    def _prepare_insert_statement_lieu(self, table: str) -> Tuple[str, int]:
-        if table in self._insert_stmt_cache:
-            return self._insert_stmt_cache[table]
-        if table.endswith("_departement"):
-            cols = "(date,jour_semaine,id_zone,id_provenance,id_categorie,id_departement,id_epci,id_commune,volume)"; arity=9
-        elif table.endswith("_pays"):
-            cols = "(date,jour_semaine,id_zone,id_provenance,id_categorie,id_pays,id_epci,id_commune,volume)"; arity=9
-        else:
-            cols = "(date,jour_semaine,id_zone,id_provenance,id_categorie,id_epci,id_commune,volume)"; arity=8
-        q = f"INSERT INTO {table} {cols} VALUES ({','.join(['%s']*arity)}) ON DUPLICATE KEY UPDATE volume=VALUES(volume)"
-        self._insert_stmt_cache[table] = (q, arity)
-        return q, arity
-
-    def insert_batch_tuples(self, table: str, rows: List[Tuple]) -> int:
-        if not rows:
-            return 0
+    def _insert_frame_values(self, table: str, frame: pl.DataFrame) -> int:
+        """Upsert par INSERT multi-lignes dont le texte SQL est produit par Polars (aucun tuple Python par ligne)."""
+        cols = ",".join(frame.columns)
         conn = self.connection_pool.get_connection() if self.connection_pool else self.connection
         cur = conn.cursor()
-        q, _ = self._prepare_insert_statement(table)
         total = 0
-        chunk = 10000
-        for i in range(0, len(rows), chunk):
-            part = rows[i:i+chunk]
-            cur.executemany(q, part)
-            conn.commit()
-            total += len(part)
-        cur.close()
-        if conn != self.connection:
-            conn.close()
+        try:
+            for n, values in _sql_values_chunks(frame, VALUES_CHUNK_ROWS):
+                cur.execute(f"INSERT INTO {table} ({cols}) VALUES {values} ON DUPLICATE KEY UPDATE volume=VALUES(volume)")
+                conn.commit()
+                total += n
+        finally:
+            cur.close()
+            if conn != self.connection:
+                conn.close()
         return total
 
-    def insert_batch_tuples_lieu(self, table: str, rows: List[Tuple]) -> int:
-        if not rows:
-            return 0
+    def _bulk_upsert_frame(self, table: str, frame: pl.DataFrame) -> int:
+        """LOAD DATA LOCAL INFILE du frame agrégé dans {table}_stage (temporaire), puis upsert ensembliste."""
+        cols = ",".join(frame.columns)
+        stage = f"{table}_stage"
+        fd, tsv_path = tempfile.mkstemp(prefix=f"{table}_", suffix=".tsv")
+        os.close(fd)
         conn = self.connection_pool.get_connection() if self.connection_pool else self.connection
         cur = conn.cursor()
-        q, _ = self._prepare_insert_statement_lieu(table)
-        total = 0
-        chunk = 10000
-        for i in range(0, len(rows), chunk):
-            part = rows[i:i+chunk]
-            cur.executemany(q, part)
+        try:
+            frame.write_csv(tsv_path, separator="\t", include_header=False, null_value=r"\N", date_format="%Y-%m-%d")
+            # Table temporaire: propre à la connexion, sans index, supprimée à la fermeture
+            cur.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {stage} AS SELECT {cols} FROM {table} WHERE 1=0")
+            cur.execute(f"TRUNCATE TABLE {stage}")
+            cur.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {stage} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' OPTIONALLY ENCLOSED BY '\"' "
+                # Échappement par défaut explicite: \N = NULL, aucun antislash dans les données (_checked_fact_frame)
+                "ESCAPED BY '\\\\' "
+                f"LINES TERMINATED BY '\\n' ({cols})",
+                (tsv_path,),
+            )
+            # LOAD DATA LOCAL implique IGNORE: toute conversion forcée n'est qu'un avertissement
+            cur.execute("SHOW WARNINGS")
+            warnings = [w for w in cur.fetchall() if w[0] != "Note"]
+            if warnings:
+                raise ValueError(f"LOAD DATA {stage}: {len(warnings)} avertissement(s), ex: {warnings[0][2]}")
+            cur.execute(
+                f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} "
+                "ON DUPLICATE KEY UPDATE volume=VALUES(volume)"
+            )
             conn.commit()
-            total += len(part)
-        cur.close()
-        if conn != self.connection:
-            conn.close()
-        return total
+            return frame.height
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            if conn != self.connection:
+                conn.close()
+            os.remove(tsv_path)
+
+    def upsert_fact_frame(self, table: str, frame: pl.DataFrame) -> int:
+        """Upsert d'un frame agrégé (colonnes de la table): LOAD DATA si volumineux, INSERT multi-lignes sinon."""
+        frame = _checked_fact_frame(table, frame)
+        if frame.height == 0:
+            return 0
+        if self.bulk_load_enabled and frame.height >= BULK_LOAD_MIN_ROWS:
+            try:
+                t0 = time.time()
+                n = self._bulk_upsert_frame(table, frame)
+                logger.info(" -> LOAD DATA %s: %s lignes en %.1fs", table, f"{n:,}", time.time() - t0)
+                return n
+            except Error as e:
+                # Seul local_infile désactivé/refusé justifie le repli définitif; interblocage,
+                # délai de verrou, pool épuisé... remontent à l'appelant
+                if e.errno not in LOCAL_INFILE_ERRNOS:
+                    raise
+                logger.warning("LOAD DATA indisponible (%s) — repli sur INSERT multi-lignes", e)
+                self.bulk_load_enabled = False
+        return self._insert_frame_values(table, frame)
 
     # --------------- Date dim (batch) ---------------
 
-    def upsert_dim_dates_from_df(self, df: pl.DataFrame):
+    def _dim_dates_frame(self, df: pl.DataFrame) -> Optional[pl.DataFrame]:
+        """Lignes dim_dates (une par date) dérivées d'un fichier, sans accès à la base."""
         if "date" not in df.columns:
-            return
+            return None
         # Agréger par date (max des flags ; premier jour_semaine)
         cols_present = set(df.columns)
         base = df.select(
@@ -787,9 +1065,12 @@ class FactTablePopulator:
                     pl.col("date").dt.week().alias("semaine"),  # <- ISO week (fix)
                 ])
         )
-        rows = g.select(
+        return g.select(
             "date","vacances_a","vacances_b","vacances_c","ferie","jour_semaine","mois","annee","trimestre","semaine"
-        ).rows()
+        )
+
+    def _insert_dim_dates(self, dates: Optional[pl.DataFrame]):
+        rows = dates.rows() if dates is not None else []
         if rows:
             q = """
             INSERT IGNORE INTO dim_dates(date,vacances_a,vacances_b,vacances_c,ferie,jour_semaine,mois,annee,trimestre,semaine)
@@ -802,50 +1083,36 @@ class FactTablePopulator:
 
     @staticmethod
     def determine_file_type(filename: str) -> Optional[str]:
-        base = filename.replace(".csv", "")
-        if re.search(r"semaine", base, re.IGNORECASE):
-            return None
-        if re.match(r"^SejourDuree_(20\d{2}B\d+).*$", base, re.IGNORECASE):
-            return "SejourDuree"
-        if re.match(r"^SejourDuree_Departement_(20\d{2}B\d+).*$", base, re.IGNORECASE):
-            return "SejourDuree_Departement"
-        if re.match(r"^SejourDuree_Pays_(20\d{2}B\d+).*$", base, re.IGNORECASE):
-            return "SejourDuree_Pays"
-        if re.match(r"^Nuitee_20\d{2}B\d+_[^_]+$", base):
-            return "Nuitee"
-        if re.match(r"^Diurne_20\d{2}B\d+_[^_]+$", base):
-            return "Diurne"
-        if re.match(r"^Nuitee_Pays_20\d{2}B\d+", base):
-            return "Nuitee_Pays"
-        if re.match(r"^Diurne_Pays_20\d{2}B\d+", base):
-            return "Diurne_Pays"
-        if re.match(r"^Nuitee_Departement_20\d{2}B\d+", base, re.IGNORECASE):
-            return "Nuitee_Departement"
-        if re.match(r"^Diurne_Departement_20\d{2}B\d+", base, re.IGNORECASE):
-            return "Diurne_Departement"
-        if re.match(r"^Nuitee_Regions_20\d{2}B\d+", base) or re.match(r"^Diurne_Regions_20\d{2}B\d+", base):
-            return None
-        return None
+        # Regex partagées avec l'extraction sélective (config_filtering)
+        return get_hist_file_type(filename)
 
     @staticmethod
     def determine_lieu_file_type_strict(filename: str) -> Optional[str]:
-        if re.search(r"semaine", filename, re.IGNORECASE):
-            return None
-        base = filename[:-4] if filename.lower().endswith(".csv") else filename
-        parts = re.split(r"_(?=20\d{2}B)", base)
-        if len(parts) < 2:
-            return None
-        prefix = parts[0]
-        return prefix if prefix in ALLOWED_LIEU_PREFIXES else None
+        return get_lieu_file_type(filename)
 
     # --------------- CSV reading ---------------
 
+    def _iter_source_csv(self):
+        """CSV à charger: arborescence extraite, ou membres des ZIP en mode lecture directe"""
+        if self.source_zip_dir:
+            return iter_zip_csv(self.source_zip_dir)
+        return self.data_path.rglob("*.csv")
+
+    def _source_root(self) -> Path:
+        return self.source_zip_dir or self.data_path
+
     def _read_csv_useful(self, csv_file: Path, use_cols: set) -> Optional[pl.DataFrame]:
-        df = pl.read_csv(csv_file, separator=";", infer_schema_length=300)
-        cols = [c for c in df.columns if c in use_cols]
-        if not cols:
+        # Staging Parquet partagé: parse + normalisation une seule fois par contenu de fichier
+        df = load_staged(csv_file, columns=use_cols, separator=";", infer_schema_length=300)
+        if df.width == 0:
             return None
-        df = df.select(cols)
+        # Libellés (et leurs versions _norm) en dictionnaire: normalisation et jointures sur les seuls distincts
+        cat_cols = [
+            c for c, dtype in df.schema.items()
+            if dtype == pl.String and (c in CATEGORICAL_COLS or c.removesuffix(NORM_SUFFIX) in CATEGORICAL_COLS)
+        ]
+        if cat_cols:
+            df = df.with_columns(pl.col(cat_cols).cast(pl.Categorical))
         # cast volume
         if "Volume" in df.columns:
             df = df.with_columns(_safe_cast_int("Volume").alias("Volume"))
@@ -888,7 +1155,8 @@ class FactTablePopulator:
         df = df.filter(pl.col("id_zone").is_not_null() & pl.col("id_provenance").is_not_null() & pl.col("id_categorie").is_not_null())
         return df
 
-    def _prepare_dep_mapping_and_update_regions(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _prepare_dep_mapping(self, df: pl.DataFrame) -> Tuple[pl.DataFrame, List[Tuple[str, Optional[str], Optional[str]]]]:
+        """Mapping des départements + triplets (département, région, nouvelle région) à reporter dans dim_departements."""
         dep_expr = _coalesce_existing(df, list(DEPT_FALLBACK_COLS))
         df = df.with_columns(dep_expr.alias("NomDepartementEff"))
         df = self._df_map_dim(df, "NomDepartementEff", "departements", "id_departement")
@@ -896,16 +1164,17 @@ class FactTablePopulator:
         dep_trip = (
             df.select([
                 pl.col("NomDepartementEff").alias("dep"),
-                _normalize_expr("NomRegion").alias("region") if "NomRegion" in df.columns else pl.lit(None).alias("region"),
-                _normalize_expr("NomNouvelleRegion").alias("nregion") if "NomNouvelleRegion" in df.columns else pl.lit(None).alias("nregion"),
+                pl.col("NomRegion").cast(pl.String).alias("region") if "NomRegion" in df.columns else pl.lit(None, dtype=pl.String).alias("region"),
+                pl.col("NomNouvelleRegion").cast(pl.String).alias("nregion") if "NomNouvelleRegion" in df.columns else pl.lit(None, dtype=pl.String).alias("nregion"),
             ])
             .drop_nulls(subset=["dep"])
             .unique()
+            # Normalisation des régions sur les seuls triplets distincts
+            .with_columns(_normalize_expr("region").alias("region"), _normalize_expr("nregion").alias("nregion"))
+            .unique()
         )
         triples = [(r["dep"], r["region"], r["nregion"]) for r in dep_trip.iter_rows(named=True)]
-        if triples:
-            self._batch_upsert_dep_regions(triples)
-        return df
+        return df, triples
 
     def _prepare_pays_mapping(self, df: pl.DataFrame) -> pl.DataFrame:
         if "Pays" not in df.columns:
@@ -926,7 +1195,7 @@ class FactTablePopulator:
         df = df.with_columns(pl.col("id_commune").fill_null(0).cast(pl.Int64))
         return df
 
-    def _aggregate_and_build_rows(self, df: pl.DataFrame, keys: List[str], table: str) -> List[Tuple]:
+    def _aggregate_fact_frame(self, df: pl.DataFrame, keys: List[str], table: str) -> pl.DataFrame:
         agg = (
             df.select(keys + ["Volume"])
               .group_by(keys)
@@ -945,9 +1214,9 @@ class FactTablePopulator:
             cols = ["date","id_zone","id_provenance","id_categorie","id_departement","volume"]
         else:
             cols = ["date","id_zone","id_provenance","id_categorie","volume"]
-        return agg.select(cols).rows()
+        return agg.select(cols)
 
-    def _aggregate_and_build_rows_lieu(self, df: pl.DataFrame, keys: List[str], table: str) -> List[Tuple]:
+    def _aggregate_fact_frame_lieu(self, df: pl.DataFrame, keys: List[str], table: str) -> pl.DataFrame:
         agg = df.select(keys + ["Volume"]).group_by(keys).agg(pl.col("Volume").sum().alias("volume"))
         if table.endswith("_departement"):
             cols = ["date","jour_semaine","id_zone","id_provenance","id_categorie","id_departement","id_epci","id_commune","volume"]
@@ -955,95 +1224,39 @@ class FactTablePopulator:
             cols = ["date","jour_semaine","id_zone","id_provenance","id_categorie","id_pays","id_epci","id_commune","volume"]
         else:
             cols = ["date","jour_semaine","id_zone","id_provenance","id_categorie","id_epci","id_commune","volume"]
-        return agg.select(cols).rows()
+        return agg.select(cols)
 
     # --------------- Process HISTORIC files (vectorized) ---------------
 
-    def process_csv_file(self, csv_file: Path, file_type: str) -> int:
-        path_str = str(csv_file.resolve())
-        if self._is_file_processed(path_str):
-            logger.info("[HIST] %s -> DÉJÀ TRAITÉ", csv_file.name)
-            return 0
-
-        logger.info("[HIST] %s -> %s", csv_file.name, file_type)
-        table = self.file_to_table_mapping[file_type]
-
-        use_cols = {
-            "Date","ZoneObservation","Zone","Provenance","CategorieVisiteur","Volume",
-            "DureeSejour","DureeSejourNum","NomDepartement","Pays",
-            "VacancesA","VacancesB","VacancesC","Ferie","JourDeLaSemaine",
-            "vacances_a","vacances_b","vacances_c","ferie","jour_semaine",
-            "NomRegion","NomNouvelleRegion"
-        }
-
-        df = self._read_csv_useful(csv_file, use_cols)
+    def transform_csv_file(self, csv_file: Path, file_type: str, table: str) -> Optional[Dict[str, Any]]:
+        """
+        Lecture + mapping + agrégation d'un fichier historique, sans écriture en base:
+        {"facts": frame agrégé, "dates": lignes dim_dates, "dep_regions": triplets régions}, None si vide.
+        """
+        df = self._read_csv_useful(csv_file, HIST_USE_COLS)
         if df is None or df.height == 0:
-            return 0
+            return None
 
         df = self._prepare_common_id_mapping(df)
-        self.upsert_dim_dates_from_df(df.select("date","jour_semaine","vacances_a","vacances_b","vacances_c","ferie"))
+        dates = self._dim_dates_frame(df.select("date","jour_semaine","vacances_a","vacances_b","vacances_c","ferie"))
+        dep_regions = []
 
         if file_type == "SejourDuree":
             if "DureeSejour" in df.columns:
-                df = df.with_columns(_normalize_expr("DureeSejour").alias("DureeSejour_norm"))
-                uniq = df.select("DureeSejour_norm").drop_nulls().unique().to_series().to_list()
-                if uniq:
-                    self.cursor.executemany(
-                        """
-                        INSERT INTO dim_durees_sejour(libelle, nb_nuits, ordre)
-                        VALUES (%s, NULL, NULL)
-                        ON DUPLICATE KEY UPDATE id_duree=LAST_INSERT_ID(id_duree)
-                        """,
-                        [(u,) for u in uniq]
-                    )
-                    self.connection.commit()
-                self.cursor.execute("SELECT id_duree, libelle FROM dim_durees_sejour")
-                map_d = {normalize_str_light(n): i for i, n in self.cursor.fetchall() if n}
-                map_df = pl.DataFrame({"DureeSejour_norm": list(map_d.keys()), "id_duree": list(map_d.values())})
-                df = df.join(map_df, on="DureeSejour_norm", how="left")
+                df = self._df_map_duree(df)
             keys = ["date","id_zone","id_provenance","id_categorie","id_duree"]
         elif file_type == "SejourDuree_Departement":
-            df = self._prepare_dep_mapping_and_update_regions(df)
+            df, dep_regions = self._prepare_dep_mapping(df)
             if "DureeSejour" in df.columns:
-                df = df.with_columns(_normalize_expr("DureeSejour").alias("DureeSejour_norm"))
-                uniq = df.select("DureeSejour_norm").drop_nulls().unique().to_series().to_list()
-                if uniq:
-                    self.cursor.executemany(
-                        """
-                        INSERT INTO dim_durees_sejour(libelle, nb_nuits, ordre)
-                        VALUES (%s, NULL, NULL)
-                        ON DUPLICATE KEY UPDATE id_duree=LAST_INSERT_ID(id_duree)
-                        """,
-                        [(u,) for u in uniq]
-                    )
-                    self.connection.commit()
-                self.cursor.execute("SELECT id_duree, libelle FROM dim_durees_sejour")
-                map_d = {normalize_str_light(n): i for i, n in self.cursor.fetchall() if n}
-                map_df = pl.DataFrame({"DureeSejour_norm": list(map_d.keys()), "id_duree": list(map_d.values())})
-                df = df.join(map_df, on="DureeSejour_norm", how="left")
+                df = self._df_map_duree(df)
             keys = ["date","id_zone","id_provenance","id_categorie","id_departement","id_duree"]
         elif file_type == "SejourDuree_Pays":
             df = self._prepare_pays_mapping(df)
             if "DureeSejour" in df.columns:
-                df = df.with_columns(_normalize_expr("DureeSejour").alias("DureeSejour_norm"))
-                uniq = df.select("DureeSejour_norm").drop_nulls().unique().to_series().to_list()
-                if uniq:
-                    self.cursor.executemany(
-                        """
-                        INSERT INTO dim_durees_sejour(libelle, nb_nuits, ordre)
-                        VALUES (%s, NULL, NULL)
-                        ON DUPLICATE KEY UPDATE id_duree=LAST_INSERT_ID(id_duree)
-                        """,
-                        [(u,) for u in uniq]
-                    )
-                    self.connection.commit()
-                self.cursor.execute("SELECT id_duree, libelle FROM dim_durees_sejour")
-                map_d = {normalize_str_light(n): i for i, n in self.cursor.fetchall() if n}
-                map_df = pl.DataFrame({"DureeSejour_norm": list(map_d.keys()), "id_duree": list(map_d.values())})
-                df = df.join(map_df, on="DureeSejour_norm", how="left")
+                df = self._df_map_duree(df)
             keys = ["date","id_zone","id_provenance","id_categorie","id_pays","id_duree"]
         elif file_type in ("Nuitee_Departement","Diurne_Departement"):
-            df = self._prepare_dep_mapping_and_update_regions(df)
+            df, dep_regions = self._prepare_dep_mapping(df)
             keys = ["date","id_zone","id_provenance","id_categorie","id_departement"]
         elif file_type in ("Nuitee_Pays","Diurne_Pays"):
             df = self._prepare_pays_mapping(df)
@@ -1052,49 +1265,52 @@ class FactTablePopulator:
             keys = ["date","id_zone","id_provenance","id_categorie"]
 
         df = df.filter(pl.col("Volume") > 0)
-        rows = self._aggregate_and_build_rows(df, keys, table)
-        inserted = self.insert_batch_tuples(table, rows)
+        return {"facts": self._aggregate_fact_frame(df, keys, table), "dates": dates, "dep_regions": dep_regions}
+
+    def _apply_dimension_updates(self, result: Dict[str, Any]):
+        """Écritures de dimensions d'un fichier transformé (dim_dates, régions): toujours par la connexion principale."""
+        self._insert_dim_dates(result["dates"])
+        self._batch_upsert_dep_regions(result["dep_regions"])
 
+    def _record_processed(self, csv_file: Path, file_type: str, inserted: int):
         self.stats[f"files_processed_{file_type}"] += 1
         self.stats[f"rows_inserted_{file_type}"] += inserted
-        logger.info(" -> %s lignes upsertées", f"{inserted:,}")
-
-        self._mark_file_processed(path_str)
-        return inserted
+        self._mark_file_processed(str(csv_file.resolve()))
 
-    # --------------- Process Lieu* files (vectorized) ---------------
-
-    def process_lieu_csv_file(self, csv_file: Path, file_type: str) -> int:
+    def process_csv_file(self, csv_file: Path, file_type: str) -> int:
         path_str = str(csv_file.resolve())
         if self._is_file_processed(path_str):
-            logger.info("[Lieu*] %s -> DÉJÀ TRAITÉ", csv_file.name)
+            logger.info("[HIST] %s -> DÉJÀ TRAITÉ", csv_file.name)
             return 0
 
-        logger.info("[Lieu*] %s -> %s", csv_file.name, file_type)
-        table = self.lieu_file_to_table_mapping[file_type]
+        logger.info("[HIST] %s -> %s", csv_file.name, file_type)
+        table = self.file_to_table_mapping[file_type]
 
-        use_cols = {
-            "Date","VacancesA","VacancesB","VacancesC","Ferie","JourDeLaSemaine",
-            "vacances_a","vacances_b","vacances_c","ferie","jour_semaine",
-            "Provenance","ZoneObservation","Zone","CategorieVisiteur","Volume",
-            "NomDepartement","Departement","Pays",
-            "DeptZoneDiurneSoir","DeptZoneNuiteeSoir","DeptZoneDiurneVeille","DeptZoneNuiteeVeille",
-            "EPCIZoneNuiteeSoir","EPCIZoneDiurneSoir","EPCIZoneNuiteeVeille","EPCIZoneDiurneVeille","EPCI","NomEPCI",
-            "CodeInseeNuiteeSoir","CodeInseeDiurneSoir","CodeInseeNuiteeVeille","CodeInseeDiurneVeille","CodeInsee","CodeINSEE",
-            "ZoneNuiteeSoir","ZoneDiurneSoir","ZoneNuiteeVeille","ZoneDiurneVeille","Zone","Commune","NomCommune",
-            "NomRegion","NomNouvelleRegion"
-        }
+        result = self.transform_csv_file(csv_file, file_type, table)
+        if result is None:
+            return 0
+        self._apply_dimension_updates(result)
+        inserted = self.upsert_fact_frame(table, result["facts"])
+
+        logger.info(" -> %s lignes upsertées", f"{inserted:,}")
+        self._record_processed(csv_file, file_type, inserted)
+        return inserted
+
+    # --------------- Process Lieu* files (vectorized) ---------------
 
-        df = self._read_csv_useful(csv_file, use_cols)
+    def transform_lieu_csv_file(self, csv_file: Path, file_type: str, table: str) -> Optional[Dict[str, Any]]:
+        """Équivalent de transform_csv_file pour les fichiers Lieu*."""
+        df = self._read_csv_useful(csv_file, LIEU_USE_COLS)
         if df is None or df.height == 0:
-            return 0
+            return None
 
         df = self._prepare_common_id_mapping(df)
-        self.upsert_dim_dates_from_df(df.select("date","jour_semaine","vacances_a","vacances_b","vacances_c","ferie"))
+        dates = self._dim_dates_frame(df.select("date","jour_semaine","vacances_a","vacances_b","vacances_c","ferie"))
         df = self._prepare_epci_commune_mapping(df)
+        dep_regions = []
 
         if file_type.endswith("_Departement"):
-            df = self._prepare_dep_mapping_and_update_regions(df)
+            df, dep_regions = self._prepare_dep_mapping(df)
             keys = ["date","jour_semaine","id_zone","id_provenance","id_categorie","id_departement","id_epci","id_commune"]
         elif file_type.endswith("_Pays"):
             df = self._prepare_pays_mapping(df)
@@ -1103,29 +1319,321 @@ class FactTablePopulator:
             keys = ["date","jour_semaine","id_zone","id_provenance","id_categorie","id_epci","id_commune"]
 
         df = df.filter(pl.col("Volume") > 0)
-        rows = self._aggregate_and_build_rows_lieu(df, keys, table)
-        inserted = self.insert_batch_tuples_lieu(table, rows)
+        return {"facts": self._aggregate_fact_frame_lieu(df, keys, table), "dates": dates, "dep_regions": dep_regions}
 
-        self.stats[f"files_processed_{file_type}"] += 1
-        self.stats[f"rows_inserted_{file_type}"] += inserted
-        logger.info(" -> %s lignes upsertées", f"{inserted:,}")
+    def process_lieu_csv_file(self, csv_file: Path, file_type: str) -> int:
+        path_str = str(csv_file.resolve())
+        if self._is_file_processed(path_str):
+            logger.info("[Lieu*] %s -> DÉJÀ TRAITÉ", csv_file.name)
+            return 0
 
-        self._mark_file_processed(path_str)
+        logger.info("[Lieu*] %s -> %s", csv_file.name, file_type)
+        table = self.lieu_file_to_table_mapping[file_type]
+
+        result = self.transform_lieu_csv_file(csv_file, file_type, table)
+        if result is None:
+            return 0
+        self._apply_dimension_updates(result)
+        inserted = self.upsert_fact_frame(table, result["facts"])
+
+        logger.info(" -> %s lignes upsertées", f"{inserted:,}")
+        self._record_processed(csv_file, file_type, inserted)
         return inserted
 
-    # --------------- Orchestration ---------------
+    # --------------- Pipelined sequential load ---------------
 
-    def process_all_csv_files(self):
-        logger.info("=== PASSE HISTORIQUE VECTORISÉE ===")
-        if not self.data_path.exists():
-            logger.error("Dossier absent: %s", self.data_path)
+    def _process_files_pipelined(self, jobs: List[Tuple[Path, str, bool, str]], label: str):
+        """
+        Pipeline borné (path, type, lieu, table): un thread lit, transforme et écrit les dimensions
+        (connexion principale), le thread courant upserte les faits (connexion du pool).
+        Les durées par étape sont cumulées dans stage_timings.
+        """
+        ready: queue.Queue = queue.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+        end_of_stream = object()
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        timings: Dict[str, float] = defaultdict(float)
+
+        def offer(item) -> bool:
+            # put bloquant (contre-pression), abandonné si l'étape d'insertion s'est arrêtée
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    pass
             return False
 
+        def produce():
+            current_type = None
+            try:
+                for csv_file, file_type, lieu, table in jobs:
+                    if file_type != current_type:
+                        current_type = file_type
+                        n = sum(1 for job in jobs if job[1] == file_type)
+                        logger.info("\n=== TYPE %s %s (%d fichiers) ===", label, file_type, n)
+                    if self._is_file_processed(str(csv_file.resolve())):
+                        logger.info("[%s] %s -> DÉJÀ TRAITÉ", label, csv_file.name)
+                        continue
+                    logger.info("[%s] %s -> %s", label, csv_file.name, file_type)
+
+                    t0 = time.perf_counter()
+                    transform = self.transform_lieu_csv_file if lieu else self.transform_csv_file
+                    result = transform(csv_file, file_type, table)
+                    t1 = time.perf_counter()
+                    timings["transformation"] += t1 - t0
+                    if result is None:
+                        continue
+                    self._apply_dimension_updates(result)
+                    t2 = time.perf_counter()
+                    timings["dimensions"] += t2 - t1
+                    if not offer((csv_file, file_type, lieu, table, result["facts"])):
+                        return
+                    timings["attente_file_pleine"] += time.perf_counter() - t2
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                offer(end_of_stream)
+
+        start = time.perf_counter()
+        producer = threading.Thread(target=produce, name=f"etl-transform-{label}", daemon=True)
+        producer.start()
+        try:
+            while True:
+                t0 = time.perf_counter()
+                item = ready.get()
+                t1 = time.perf_counter()
+                timings["attente_transformation"] += t1 - t0
+                if item is end_of_stream:
+                    break
+                csv_file, file_type, lieu, table, facts = item
+                inserted = self.upsert_fact_frame(table, facts)
+                timings["insertion"] += time.perf_counter() - t1
+                logger.info(" -> %s: %s lignes upsertées", csv_file.name, f"{inserted:,}")
+                self._record_processed(csv_file, file_type, inserted)
+        finally:
+            stop.set()
+            producer.join()
+        timings["total"] += time.perf_counter() - start
+        for stage, seconds in timings.items():
+            self.stage_timings[stage] += seconds
+        self._log_stage_timings(label, timings)
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _log_stage_timings(label: str, t: Dict[str, float]):
+        busy = t["transformation"] + t["dimensions"] + t["insertion"]
+        logger.info(
+            "Pipeline %s: transformation %.1fs, dimensions %.1fs, insertion %.1fs | "
+            "attente transformation %.1fs, attente file pleine %.1fs | total %.1fs (recouvrement %.1fs)",
+            label, t["transformation"], t["dimensions"], t["insertion"],
+            t["attente_transformation"], t["attente_file_pleine"], t["total"], max(0.0, busy - t["total"]),
+        )
+
+    # --------------- Cross-file consolidation ---------------
+
+    def _consolidate_type(self, file_type: str, files: List[Path], lieu: bool, table: str) -> int:
+        """
+        Transforme les fichiers d'un type du plus ancien au plus récent bimestre, concatène
+        paresseusement leurs frames agrégés et ne garde, par clé unique, que la dernière valeur.
+        Un seul upsert pour le type; les fichiers sont marqués traités ensuite.
+        """
+        pending = sorted(
+            (p for p in files if not self._is_file_processed(str(p.resolve()))),
+            key=_bimestre_key,
+        )
+        if not pending:
+            return 0
+
+        logger.info("\n=== CONSOLIDATION %s (%d fichiers -> %s) ===", file_type, len(pending), table)
+        transform = self.transform_lieu_csv_file if lieu else self.transform_csv_file
+        frames: List[pl.LazyFrame] = []
+        rows_in = 0
+        for csv_file in pending:
+            result = transform(csv_file, file_type, table)
+            if result is None:
+                continue
+            self._apply_dimension_updates(result)
+            rows_in += result["facts"].height
+            frames.append(result["facts"].lazy())
+
+        inserted = 0
+        if frames:
+            columns = frames[0].columns
+            keys = [c for c in columns if c not in NON_KEY_FACT_COLS]
+            # Frames dans l'ordre des bimestres: keep="last" = bimestre le plus récent
+            merged = pl.concat(frames).unique(subset=keys, keep="last", maintain_order=True).collect()
+            logger.info(" -> %s lignes agrégées, %s clés distinctes", f"{rows_in:,}", f"{merged.height:,}")
+            inserted = self.upsert_fact_frame(table, merged)
+            logger.info(" -> %s lignes upsertées", f"{inserted:,}")
+
+        self.stats[f"rows_inserted_{file_type}"] += inserted
+        for csv_file in pending:
+            self.stats[f"files_processed_{file_type}"] += 1
+            self._mark_file_processed(str(csv_file.resolve()))
+        return inserted
+
+    def process_files_consolidated(self, hist_files: Dict[str, List[Path]], lieu_files: Dict[str, List[Path]]) -> bool:
+        logger.info("=== CHARGEMENT CONSOLIDÉ PAR TYPE (dernier bimestre prioritaire) ===")
+        for ft, files in hist_files.items():
+            self._consolidate_type(ft, files, False, self.file_to_table_mapping[ft])
+        for ft, files in lieu_files.items():
+            self._consolidate_type(ft, files, True, self.lieu_file_to_table_mapping[ft])
+        return True
+
+    # --------------- Parallel load ---------------
+
+    def _dimension_snapshot(self) -> Tuple[Dict[str, Dict[str, int]], Dict[str, int]]:
+        """Mappings libellé -> id transmis aux processus de travail (figés après prepare_dimensions)."""
+        return {key: dim.ids for key, dim in self.dim_cache.items()}, self.dim_communes_by_insee.ids
+
+    def _upsert_table_serialized(self, lock: threading.Lock, table: str, frame: pl.DataFrame) -> int:
+        # Une seule écriture à la fois par table: pas de verrous concurrents sur les mêmes index uniques
+        with lock:
+            return self.upsert_fact_frame(table, frame)
+
+    def process_files_parallel(self, hist_files: Dict[str, List[Path]], lieu_files: Dict[str, List[Path]]) -> bool:
+        """
+        Chargement parallèle de tous les fichiers en attente:
+        - lecture + transformations Polars dans TRANSFORM_WORKERS processus (mapping en lecture seule)
+        - écritures de dimensions sérialisées ici, sur la connexion principale
+        - upserts des tables de faits en parallèle sur le pool, un fichier à la fois par table et
+          dans l'ordre des bimestres (file par table): le plus récent est écrit en dernier
+        """
+        logger.info("=== CHARGEMENT PARALLÈLE ===")
+        jobs = [(p, ft, False, self.file_to_table_mapping[ft]) for ft, files in hist_files.items() for p in files]
+        jobs += [(p, ft, True, self.lieu_file_to_table_mapping[ft]) for ft, files in lieu_files.items() for p in files]
+        if not jobs:
+            logger.info("Aucun fichier à traiter (checkpoint).")
+            return True
+        jobs.sort(key=lambda job: _bimestre_key(job[0]))
+
+        # Connexions du pool: la principale, une par table écrite en parallèle, une de réserve
+        writers = max(1, min(CONNECTION_POOL_SIZE - 2, len({table for *_, table in jobs})))
+        logger.info("Fichiers: %d, processus de transformation: %d, tables écrites en parallèle: %d",
+                    len(jobs), TRANSFORM_WORKERS, writers)
+
+        # File par table (ordre des bimestres): un fichier n'est upserté qu'après les précédents
+        table_queues: Dict[str, deque] = defaultdict(deque)
+        for job in jobs:
+            table_queues[job[3]].append(job)
+        ready: Dict[Path, Optional[Dict[str, Any]]] = {}
+        failed_tables: Set[str] = set()
+        busy_tables: Set[str] = set()
+
+        dim_ids, commune_ids = self._dimension_snapshot()
+        table_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        ok = True
+        with ProcessPoolExecutor(
+            max_workers=TRANSFORM_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_transform_worker,
+            initargs=(self.test_mode, dim_ids, commune_ids),
+        ) as transform_pool, ThreadPoolExecutor(max_workers=writers) as upsert_pool:
+            transforms = {
+                transform_pool.submit(_transform_file_worker, p, ft, table, lieu): (p, ft, lieu, table)
+                for p, ft, lieu, table in jobs
+            }
+            upserts = {}
+            pending = set(transforms)
+
+            def submit_next(table: str):
+                # Tête de file prête et table libre: upsert suivant; fichiers vides enregistrés au passage
+                queue_ = table_queues[table]
+                while queue_ and table not in busy_tables and queue_[0][0] in ready:
+                    p, ft, _, _ = queue_.popleft()
+                    result = ready.pop(p)
+                    if result is None:
+                        continue
+                    upsert = upsert_pool.submit(self._upsert_table_serialized, table_locks[table], table, result["facts"])
+                    upserts[upsert] = (p, ft, table)
+                    busy_tables.add(table)
+                    pending.add(upsert)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    if fut in upserts:
+                        p, ft, table = upserts.pop(fut)
+                        busy_tables.discard(table)
+                        try:
+                            inserted = fut.result()
+                        except Exception as e:
+                            logger.error("Upsert %s: %s", p.name, e)
+                            failed_tables.add(table)
+                            ok = False
+                            continue
+                        logger.info("[%s] %s -> %s lignes upsertées", ft, p.name, f"{inserted:,}")
+                        self._record_processed(p, ft, inserted)
+                        submit_next(table)
+                        continue
+
+                    p, ft, lieu, table = transforms.pop(fut)
+                    if table in failed_tables:
+                        continue
+                    try:
+                        status, result = fut.result()
+                        if status == "missing":
+                            # Libellé non couvert par la pré-passe: transformation ici (insertions de
+                            # dimensions comprises), upsert par la même file que les autres fichiers
+                            logger.info("[%s] %s -> dimension à compléter (%s), transformation locale", ft, p.name, result)
+                            result = (self.transform_lieu_csv_file if lieu else self.transform_csv_file)(p, ft, table)
+                        if result is not None:
+                            self._apply_dimension_updates(result)
+                    except Exception as e:
+                        logger.error("Transformation %s: %s", p.name, e)
+                        failed_tables.add(table)
+                        ok = False
+                        continue
+                    ready[p] = result
+                    submit_next(table)
+
+        for table in sorted(failed_tables):
+            # Fichiers plus récents non écrits: repris au prochain passage, après le fichier en échec
+            logger.warning("Table %s: %d fichier(s) reporté(s) après un échec", table, len(table_queues[table]))
+        return ok
+
+    # --------------- Orchestration ---------------
+
+    def _collect_hist_files(self) -> Dict[str, List[Path]]:
+        """Fichiers historiques en attente (hors checkpoint), par type."""
         files_by_type = defaultdict(list)
-        for p in self.data_path.rglob("*.csv"):
+        for p in self._iter_source_csv():
             ft = self.determine_file_type(p.name)
             if ft and ft in self.file_to_table_mapping and not self._is_file_processed(str(p.resolve())):
                 files_by_type[ft].append(p)
+        if self.test_mode:
+            files_by_type = defaultdict(list, {ft: files[:3] for ft, files in files_by_type.items()})
+        return files_by_type
+
+    def _collect_lieu_files(self) -> Dict[str, List[Path]]:
+        """Fichiers Lieu* en attente (type mappé vers une table, hors checkpoint), par type."""
+        lst: List[Tuple[str, Path]] = []
+        for p in self._iter_source_csv():
+            if re.search(r"semaine", p.name, re.IGNORECASE):
+                continue
+            ft = self.determine_lieu_file_type_strict(p.name)
+            if ft and ft in self.lieu_file_to_table_mapping and not self._is_file_processed(str(p.resolve())):
+                lst.append((ft, p))
+
+        if self.test_mode:
+            lst = lst[:max(1, min(30, len(lst)))]
+            logger.info("Mode test: %d fichiers Lieu*", len(lst))
+
+        by_type = defaultdict(list)
+        for ft, p in lst:
+            by_type[ft].append(p)
+        return by_type
+
+    def process_all_csv_files(self, files_by_type: Optional[Dict[str, List[Path]]] = None):
+        logger.info("=== PASSE HISTORIQUE VECTORISÉE ===")
+        if not self._source_root().exists():
+            logger.error("Dossier absent: %s", self._source_root())
+            return False
+
+        if files_by_type is None:
+            files_by_type = self._collect_hist_files()
 
         total = sum(len(v) for v in files_by_type.values())
         if total == 0:
@@ -1134,44 +1642,40 @@ class FactTablePopulator:
 
         logger.info("Fichiers à traiter (historiques): %d", total)
 
+        if self.connection_pool is not None:
+            # Par type, du plus ancien au plus récent bimestre: le dernier upsert d'une clé est le plus récent
+            jobs = [(p, ft, False, self.file_to_table_mapping[ft]) for ft, files in files_by_type.items() for p in _by_bimestre(files)]
+            self._process_files_pipelined(jobs, "HIST")
+            return True
+
         for ft, files in files_by_type.items():
             logger.info("\n=== TYPE: %s (%d fichiers) ===", ft, len(files))
-            if self.test_mode:
-                files = files[:3]
-            for p in files:
+            for p in _by_bimestre(files):
                 self.process_csv_file(p, ft)
 
         return True
 
-    def process_lieu_files(self):
+    def process_lieu_files(self, by_type: Optional[Dict[str, List[Path]]] = None):
         logger.info("=== PASSE Lieu* VECTORISÉE ===")
-        if not self.data_path.exists():
-            logger.error("Dossier absent: %s", self.data_path)
+        if not self._source_root().exists():
+            logger.error("Dossier absent: %s", self._source_root())
             return False
 
-        lst: List[Tuple[str, Path]] = []
-        for p in self.data_path.rglob("*.csv"):
-            if re.search(r"semaine", p.name, re.IGNORECASE):
-                continue
-            ft = self.determine_lieu_file_type_strict(p.name)
-            if ft:
-                lst.append((ft, p))
-
-        if self.test_mode:
-            lst = lst[:max(1, min(30, len(lst)))]
-            logger.info("Mode test: %d fichiers Lieu*", len(lst))
+        if by_type is None:
+            by_type = self._collect_lieu_files()
 
-        if not lst:
+        if not by_type:
             logger.info("Aucun fichier Lieu* détecté.")
             return True
 
-        by_type = defaultdict(list)
-        for ft, p in lst:
-            by_type[ft].append(p)
+        if self.connection_pool is not None:
+            jobs = [(p, ft, True, self.lieu_file_to_table_mapping[ft]) for ft, files in by_type.items() for p in _by_bimestre(files)]
+            self._process_files_pipelined(jobs, "Lieu*")
+            return True
 
         for ft, files in by_type.items():
             logger.info("\n=== TYPE Lieu* %s (%d fichiers) ===", ft, len(files))
-            for p in files:
+            for p in _by_bimestre(files):
                 self.process_lieu_csv_file(p, ft)
 
         return True
@@ -1182,6 +1686,8 @@ class FactTablePopulator:
         total_rows = sum(v for k, v in self.stats.items() if k.startswith("rows_inserted_"))
         logger.info("Total fichiers traités: %s", f"{total_files:,}")
         logger.info("Total lignes upsertées: %s", f"{total_rows:,}")
+        if self.stage_timings:
+            self._log_stage_timings("global", self.stage_timings)
 
         for table in self.lieu_file_to_table_mapping.values():
             try:
@@ -1203,8 +1709,19 @@ class FactTablePopulator:
             self.enforce_unique_constraints_and_cleanup()
             self.load_dimension_cache()
 
-            ok_hist = self.process_all_csv_files()
-            ok_lieu = self.process_lieu_files()
+            hist_files = lieu_files = None
+            if self._source_root().exists():
+                # Dimensions de tous les fichiers en attente résolues en une passe
+                hist_files, lieu_files = self._collect_hist_files(), self._collect_lieu_files()
+                self.prepare_dimensions(hist_files, lieu_files)
+
+            if CROSS_FILE_AGG and hist_files is not None:
+                ok_hist = ok_lieu = self.process_files_consolidated(hist_files, lieu_files)
+            elif PARALLEL_LOAD and hist_files is not None:
+                ok_hist = ok_lieu = self.process_files_parallel(hist_files, lieu_files)
+            else:
+                ok_hist = self.process_all_csv_files(hist_files)
+                ok_lieu = self.process_lieu_files(lieu_files)
             self.print_final_stats()
 
             if ok_hist and ok_lieu:
@@ -1232,6 +1749,32 @@ class FactTablePopulator:
             logger.info("Connexions fermées")
 
 
+# =========================
+# Parallel load workers
+# =========================
+
+_WORKER_POPULATOR: Optional[FactTablePopulator] = None
+
+def _init_transform_worker(test_mode: bool, dim_ids: Dict[str, Dict[str, int]], commune_ids: Dict[str, int]):
+    """Processus de transformation: populator sans connexion, dimensions figées en lecture seule."""
+    global _WORKER_POPULATOR
+    pop = FactTablePopulator(test_mode=test_mode, resume_from_checkpoint=False)
+    pop.offline_dims = True
+    pop.dim_cache = {key: DimensionMap(ids) for key, ids in dim_ids.items()}
+    pop.dim_communes_by_insee = DimensionMap(commune_ids)
+    _WORKER_POPULATOR = pop
+
+def _transform_file_worker(csv_file: Path, file_type: str, table: str, lieu: bool) -> Tuple[str, Any]:
+    """("ok", résultat de transform_*) ou ("missing", détail) si un libellé manque au mapping."""
+    pop = _WORKER_POPULATOR
+    try:
+        if lieu:
+            return "ok", pop.transform_lieu_csv_file(csv_file, file_type, table)
+        return "ok", pop.transform_csv_file(csv_file, file_type, table)
+    except MissingDimensionLabels as e:
+        return "missing", str(e)
+
+
 # =========================
 # Script principal
 # =========================
@@ -1239,7 +1782,8 @@ class FactTablePopulator:
 if __name__ == "__main__":
     print("=== ETL FLUXVISION VECTORISÉ — i5-1240P ===\n")
     print(f"Machine détectée: Intel i5-1240P ({CPU_COUNT} cœurs), {psutil.virtual_memory().total // (1024**3)} Go RAM")
-    print(f"Optimisations: agrégation avant UPSERT, joins vectorisés, batch_size={OPTIMIZED_BATCH_SIZE}, pool_connexions={CONNECTION_POOL_SIZE}\n")
+    print(f"Optimisations: agrégation avant UPSERT, joins vectorisés, batch_size={OPTIMIZED_BATCH_SIZE}, pool_connexions={CONNECTION_POOL_SIZE}")
+    print(f"Chargement parallèle: {'ACTIVÉ (' + str(TRANSFORM_WORKERS) + ' processus)' if PARALLEL_LOAD else 'DÉSACTIVÉ'}\n")
 
     try:
         mode = input("Mode? (t=test, p=production, f=force sans checkpoint): ").lower().strip()
@@ -1257,10 +1801,16 @@ if __name__ == "__main__":
         if confirm != "oui":
             sys.exit(0)
 
+    # Lecture directe des ZIP (sans data_extracted) si FV_SOURCE_ZIP_DIR est défini
+    source_zip_dir = os.getenv("FV_SOURCE_ZIP_DIR")
+    if source_zip_dir:
+        print(f"Lecture directe des archives ZIP: {source_zip_dir}\n")
+
     pop = FactTablePopulator(
         test_mode=test_mode,
         batch_size=OPTIMIZED_BATCH_SIZE,
         resume_from_checkpoint=resume_checkpoint,
+        source_zip_dir=source_zip_dir,
     )
     try:
         ok = pop.run_population()